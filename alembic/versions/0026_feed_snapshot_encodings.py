@@ -0,0 +1,21 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0026_feed_snapshot_encodings"
+down_revision = "0025_catalog_run_link_set"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("feed_snapshots", sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+    op.add_column("feed_snapshots", sa.Column("brotli_storage_uri", sa.Text(), nullable=True))
+    op.add_column("feed_snapshots", sa.Column("brotli_size_bytes", sa.BigInteger(), nullable=True))
+    op.add_column("feed_snapshots", sa.Column("zstd_storage_uri", sa.Text(), nullable=True))
+    op.add_column("feed_snapshots", sa.Column("zstd_size_bytes", sa.BigInteger(), nullable=True))
+
+def downgrade():
+    op.drop_column("feed_snapshots", "zstd_size_bytes")
+    op.drop_column("feed_snapshots", "zstd_storage_uri")
+    op.drop_column("feed_snapshots", "brotli_size_bytes")
+    op.drop_column("feed_snapshots", "brotli_storage_uri")
+    op.drop_column("feed_snapshots", "size_bytes")
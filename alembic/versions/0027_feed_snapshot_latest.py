@@ -0,0 +1,44 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0027_feed_snapshot_latest"
+down_revision = "0026_feed_snapshot_encodings"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # newest-first lookups per feed (DISTINCT ON / ORDER BY ... LIMIT 1) become index-only walks
+    op.create_index(
+        "ix_feed_snapshots_latest_lookup",
+        "feed_snapshots",
+        ["tenant_id", "partner_id", "destination", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+    op.create_table(
+        "feed_snapshot_latest",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("partner_id", sa.String(), sa.ForeignKey("partners.id"), primary_key=True),
+        sa.Column("destination", sa.String(length=120), primary_key=True),
+        sa.Column("snapshot_id", sa.String(), sa.ForeignKey("feed_snapshots.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_feed_snapshot_latest_created", "feed_snapshot_latest", ["created_at"], unique=False)
+    op.create_index("ix_feed_snapshot_latest_partner_dest", "feed_snapshot_latest", ["partner_id", "destination"], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO feed_snapshot_latest (tenant_id, partner_id, destination, snapshot_id, created_at)
+        SELECT DISTINCT ON (tenant_id, partner_id, destination)
+               tenant_id, partner_id, destination, id, created_at
+        FROM feed_snapshots
+        ORDER BY tenant_id, partner_id, destination, created_at DESC, id DESC
+        """
+    )
+
+def downgrade():
+    op.drop_index("ix_feed_snapshot_latest_partner_dest", table_name="feed_snapshot_latest")
+    op.drop_index("ix_feed_snapshot_latest_created", table_name="feed_snapshot_latest")
+    op.drop_table("feed_snapshot_latest")
+    op.drop_index("ix_feed_snapshots_latest_lookup", table_name="feed_snapshots")
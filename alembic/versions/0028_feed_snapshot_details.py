@@ -0,0 +1,39 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0028_feed_snapshot_details"
+down_revision = "0027_feed_snapshot_latest"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "feed_snapshot_details",
+        sa.Column("snapshot_id", sa.String(), sa.ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("warnings", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("skipped", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+    # move the capped detail lists out of meta
+    op.execute(
+        """
+        INSERT INTO feed_snapshot_details (snapshot_id, warnings, skipped)
+        SELECT id, COALESCE(meta->'warnings', '[]'::jsonb), COALESCE(meta->'skipped', '[]'::jsonb)
+        FROM feed_snapshots
+        WHERE meta ? 'warnings' OR meta ? 'skipped'
+        """
+    )
+    op.execute("UPDATE feed_snapshots SET meta = meta - 'warnings' - 'skipped' WHERE meta ? 'warnings' OR meta ? 'skipped'")
+
+def downgrade():
+    op.execute(
+        """
+        UPDATE feed_snapshots s
+        SET meta = s.meta || jsonb_build_object('warnings', d.warnings, 'skipped', d.skipped)
+        FROM feed_snapshot_details d
+        WHERE d.snapshot_id = s.id
+        """
+    )
+    op.drop_table("feed_snapshot_details")
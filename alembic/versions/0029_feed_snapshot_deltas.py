@@ -0,0 +1,37 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0029_feed_snapshot_deltas"
+down_revision = "0028_feed_snapshot_details"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("feed_snapshots", sa.Column("item_hashes_uri", sa.Text(), nullable=True))
+
+    op.create_table(
+        "feed_snapshot_deltas",
+        sa.Column("snapshot_id", sa.String(), sa.ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("base_snapshot_id", sa.String(), sa.ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("format", sa.String(length=40), nullable=False),
+        sa.Column("storage_uri", sa.String(length=500), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("content_hash", sa.String(length=80), nullable=False),
+        sa.Column("gzip_storage_uri", sa.Text(), nullable=True),
+        sa.Column("gzip_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("brotli_storage_uri", sa.Text(), nullable=True),
+        sa.Column("brotli_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("zstd_storage_uri", sa.Text(), nullable=True),
+        sa.Column("zstd_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("added_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("changed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("removed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # pruning a base snapshot cascades to the deltas built against it
+    op.create_index("ix_feed_snapshot_deltas_base", "feed_snapshot_deltas", ["base_snapshot_id"], unique=False)
+
+def downgrade():
+    op.drop_index("ix_feed_snapshot_deltas_base", table_name="feed_snapshot_deltas")
+    op.drop_table("feed_snapshot_deltas")
+    op.drop_column("feed_snapshots", "item_hashes_uri")
@@ -0,0 +1,29 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0030_feed_snapshot_parts"
+down_revision = "0029_feed_snapshot_deltas"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "feed_snapshot_parts",
+        sa.Column("snapshot_id", sa.String(), sa.ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("part_no", sa.Integer(), primary_key=True),
+        sa.Column("format", sa.String(length=40), nullable=False),
+        sa.Column("storage_uri", sa.String(length=500), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("content_hash", sa.String(length=80), nullable=False),
+        sa.Column("listing_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("gzip_storage_uri", sa.Text(), nullable=True),
+        sa.Column("gzip_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("brotli_storage_uri", sa.Text(), nullable=True),
+        sa.Column("brotli_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("zstd_storage_uri", sa.Text(), nullable=True),
+        sa.Column("zstd_size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table("feed_snapshot_parts")
@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0031_feed_structure_errors"
+down_revision = "0030_feed_snapshot_parts"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        "feed_snapshot_details",
+        sa.Column("structure_errors", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'[]'::jsonb")),
+    )
+
+def downgrade():
+    op.drop_column("feed_snapshot_details", "structure_errors")
@@ -0,0 +1,33 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0032_partner_mapping_keys"
+down_revision = "0031_feed_structure_errors"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "partner_mapping_keys",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("partner_id", sa.String(), sa.ForeignKey("partners.id"), primary_key=True),
+        sa.Column("destination", sa.String(length=120), primary_key=True),
+        sa.Column("namespace", sa.String(length=80), primary_key=True),
+        sa.Column("key", sa.String(length=400), primary_key=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_partner_mapping_keys_partner_dest", "partner_mapping_keys", ["partner_id", "destination"], unique=False)
+
+    # a partner's keys are built from one full scan by the worker, queued by the first read
+    op.create_table(
+        "partner_mapping_key_builds",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("partner_id", sa.String(), sa.ForeignKey("partners.id"), primary_key=True),
+        sa.Column("built_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table("partner_mapping_key_builds")
+    op.drop_index("ix_partner_mapping_keys_partner_dest", table_name="partner_mapping_keys")
+    op.drop_table("partner_mapping_keys")
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from app.core.db import get_db
 from app.services.internal_admin import require_internal_admin
 from app.services.audit import audit
+from app.services.mapping_cache import get_mapping_cache
 
 from app.schemas.catalog_import import (
     EnumCatalogImportRequest,
@@ -67,6 +68,7 @@ async def apply_enum(destination: str, namespace: str, body: EnumCatalogImportRe
         detail={"namespace": run.namespace, "summary": run.summary, "source": run.source},
     )
     await db.commit()
+    await get_mapping_cache().invalidate([run.destination])
     return CatalogImportResponse(
         run_id=run.id, destination=run.destination, kind=run.kind, namespace=run.namespace,
         country_code=run.country_code, status=run.status, summary=run.summary,
@@ -120,6 +122,7 @@ async def apply_areas(destination: str, body: GeoCatalogImportRequest, db: Async
         detail={"country_code": run.country_code, "summary": run.summary, "source": run.source},
     )
     await db.commit()
+    await get_mapping_cache().invalidate([run.destination])
     return CatalogImportResponse(
         run_id=run.id, destination=run.destination, kind=run.kind, namespace=run.namespace,
         country_code=run.country_code, status=run.status, summary=run.summary,
@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
+from sqlalchemy.exc import NoResultFound
 
 from app.core.db import get_db
 from app.services.internal_admin import require_internal_admin
 from app.services.audit import audit
-from app.services.catalog_sets import submit_catalog_set, reject_catalog_set, rollback_active_catalog_set, activate_catalog_set
+from app.services.catalog_sets import submit_catalog_set, reject_catalog_set, rollback_active_catalog_set, activate_catalog_set, diff_catalog_set
 
 from app.models.destination_catalog_set import DestinationCatalogSet
 from app.models.destination_catalog_set_item import DestinationCatalogSetItem
 
 from app.services.catalog_sets_builder import create_draft_catalog_set_from_run
+from app.services.mapping_cache import get_mapping_cache
 
 
 router = APIRouter()
@@ -132,19 +134,44 @@ async def draft_from_import(destination: str, run_id: str, body: dict, db: Async
 async def submit_set(catalog_set_id: str, db: AsyncSession = Depends(get_db)):
     cs = await submit_catalog_set(db, catalog_set_id=catalog_set_id, actor_id="internal")
 
-    await audit(db, None, None, "internal", "catalog_set.submitted", "destination_catalog_set", cs.id, {"destination": cs.destination})
+    await audit(
+        db, tenant_id=None, partner_id=None, actor_api_key_id="internal", action="catalog_set.submitted",
+        target_type="destination_catalog_set", target_id=cs.id, detail={"destination": cs.destination},
+    )
     await db.commit()
     return {"id": cs.id, "status": cs.status}
 
 
 
+@router.get("/admin/catalog-sets/{catalog_set_id}/diff", dependencies=[Depends(require_internal_admin)])
+async def catalog_set_diff(catalog_set_id: str, db: AsyncSession = Depends(get_db)):
+    try:
+        diff = await diff_catalog_set(db, catalog_set_id=catalog_set_id)
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail="catalog set not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    # staging tables only
+    await db.rollback()
+    return {"id": catalog_set_id, "diff": diff.summary()}
+
+
 @router.post("/admin/catalog-sets/{catalog_set_id}:approve", dependencies=[Depends(require_internal_admin)])
 async def approve_set(catalog_set_id: str, db: AsyncSession = Depends(get_db)):
-    cs = await activate_catalog_set(db, catalog_set_id=catalog_set_id, actor_id="internal")
+    try:
+        cs, diff = await activate_catalog_set(db, catalog_set_id=catalog_set_id, actor_id="internal")
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
 
-    await audit(db, None, None, "internal", "catalog_set.approved", "destination_catalog_set", cs.id, {"destination": cs.destination, "country_code": cs.country_code})
+    await audit(
+        db, tenant_id=None, partner_id=None, actor_api_key_id="internal", action="catalog_set.approved",
+        target_type="destination_catalog_set", target_id=cs.id,
+        detail={"destination": cs.destination, "country_code": cs.country_code, "diff": diff.summary()},
+    )
     await db.commit()
-    return {"id": cs.id, "status": cs.status}
+    await get_mapping_cache().invalidate([cs.destination])
+    return {"id": cs.id, "status": cs.status, "changed": diff.changed}
 
 
 
@@ -152,7 +179,10 @@ async def approve_set(catalog_set_id: str, db: AsyncSession = Depends(get_db)):
 async def reject_set(catalog_set_id: str, body: dict, db: AsyncSession = Depends(get_db)):
     reason = body.get("reason")
     cs = await reject_catalog_set(db, catalog_set_id=catalog_set_id, actor_id="internal", reason=reason)
-    await audit(db, None, None, "internal", "catalog_set.rejected", "destination_catalog_set", cs.id, {"reason": reason})
+    await audit(
+        db, tenant_id=None, partner_id=None, actor_api_key_id="internal", action="catalog_set.rejected",
+        target_type="destination_catalog_set", target_id=cs.id, detail={"reason": reason},
+    )
     await db.commit()
     return {"id": cs.id, "status": cs.status}
 
@@ -166,7 +196,20 @@ async def rollback_set(destination: str, body: dict, db: AsyncSession = Depends(
     if not to_id:
         raise HTTPException(status_code=422, detail="to_catalog_set_id required")
 
-    cs = await rollback_active_catalog_set(db, destination=dest, country_code=(cc.upper().strip() if cc else None), to_catalog_set_id=to_id, actor_id="internal")
-    await audit(db, None, None, "internal", "catalog_set.rollback", "destination_catalog_set", cs.id, {"destination": cs.destination, "country_code": cs.country_code})
+    try:
+        cs, diff = await rollback_active_catalog_set(
+            db, destination=dest, country_code=(cc.upper().strip() if cc else None), to_catalog_set_id=to_id, actor_id="internal",
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
+    await audit(
+        db, tenant_id=None, partner_id=None, actor_api_key_id="internal", action="catalog_set.rollback",
+        target_type="destination_catalog_set", target_id=cs.id,
+        detail={"destination": cs.destination, "country_code": cs.country_code, "diff": diff.summary()},
+    )
     await db.commit()
-    return {"id": cs.id, "status": cs.status}
\ No newline at end of file
+    if diff.changed:
+        await get_mapping_cache().invalidate([cs.destination])
+    return {"id": cs.id, "status": cs.status, "changed": diff.changed}
\ No newline at end of file
@@ -8,6 +8,7 @@ from app.core.db import get_db
 from app.models.destination_enum_mapping import DestinationEnumMapping
 from app.schemas.destination_enum_admin import DestinationEnumUpsert, DestinationEnumBulkUpsert
 from app.services.internal_admin import require_internal_admin
+from app.services.mapping_cache import get_mapping_cache
 
 router = APIRouter()
 
@@ -47,6 +48,7 @@ async def upsert_destination_enum(body: DestinationEnumUpsert, db: AsyncSession
     )
     
     await db.commit()
+    await get_mapping_cache().invalidate([dest])
     return {
         "destination": row.destination,
         "namespace": row.namespace,
@@ -91,4 +93,5 @@ async def bulk_upsert_destination_enums(body: DestinationEnumBulkUpsert, db: Asy
     )
 
     await db.commit()
+    await get_mapping_cache().invalidate([dest])
     return {"destination": dest, "namespace": ns, "count": count}
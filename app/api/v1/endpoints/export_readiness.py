@@ -2,18 +2,16 @@ from __future__ import annotations
 
 from app.services.feed_urls import build_public_feed_url
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.db import get_db
 from app.services.auth import Actor, require_partner_admin
 from app.models.partner_destination_setting import PartnerDestinationSetting
-from app.models.feed_snapshot import FeedSnapshot
+from app.services.feed_snapshots import latest_feed_snapshot
 from app.destinations.registry import get_destination_connector
 from app.destinations.mapping_registry import get_mapping_plugin
-from app.destinations.mapping_base import MappingKeySet
-from app.canonical.v1.listing import ListingCanonicalV1
-from app.models.listing import Listing
+from app.services.partner_mapping_keys import load_partner_mapping_keys, request_mapping_key_build
 from app.services.partner_destination_config import ensure_feed_token
 
 router = APIRouter()
@@ -56,13 +54,7 @@ async def export_readiness(
     caps = connector.capabilities()
 
     # Latest snapshot (for hosted feeds)
-    latest = (await db.execute(
-        select(FeedSnapshot).where(
-            FeedSnapshot.tenant_id == actor.tenant_id,
-            FeedSnapshot.partner_id == partner_id,
-            FeedSnapshot.destination == dest,
-        ).order_by(desc(FeedSnapshot.created_at)).limit(1)
-    )).scalar_one_or_none()
+    latest = await latest_feed_snapshot(db, tenant_id=actor.tenant_id, partner_id=partner_id, destination=dest)
 
     # Feed URL (only for hosted_feed)
     feed_url = None
@@ -86,29 +78,20 @@ async def export_readiness(
     except Exception:
         plugin = None
 
+    keys = None
     if plugin:
-        rows = (await db.execute(select(Listing).where(
-            Listing.tenant_id == actor.tenant_id,
-            Listing.partner_id == partner_id,
-            Listing.schema == "canonical.listing",
-            Listing.schema_version == "1.0",
-        ))).scalars().all()
-
-        agg_enum: dict[str, set[str]] = {}
-        agg_geo: set[str] = set()
-
-        for r in rows:
-            can = ListingCanonicalV1.model_validate(r.payload)
-            ks = plugin.required_mapping_keys(can)
-            for ns, skeys in ks.enum_keys.items():
-                agg_enum.setdefault(ns, set()).update(skeys)
-            agg_geo |= set(ks.geo_keys)
+        # maintained on every listing write; built once per partner by the worker
+        keys = await load_partner_mapping_keys(db, tenant_id=actor.tenant_id, partner_id=partner_id, destination=dest)
+        if keys is None:
+            request_mapping_key_build(tenant_id=actor.tenant_id, partner_id=partner_id)
+            warnings.append({"code": "MAPPING_KEYS_NOT_BUILT", "message": "Mapping keys are being built; retry shortly"})
 
+    if plugin and keys is not None:
         check = await plugin.check_mappings(
             db=db,
             tenant_id=actor.tenant_id,
             partner_id=partner_id,
-            keys=MappingKeySet(enum_keys=agg_enum, geo_keys=agg_geo),
+            keys=keys,
         )
 
         missing = {
@@ -121,8 +104,8 @@ async def export_readiness(
         if include_import_templates:
             # enum templates
             enum_payloads = []
-            for ns, keys in check.missing.enum_keys.items():
-                clean = [k for k in keys if not str(k).startswith("<")]
+            for ns, ns_keys in check.missing.enum_keys.items():
+                clean = [k for k in ns_keys if not str(k).startswith("<")]
                 if not clean:
                     continue
                 enum_payloads.append({
@@ -154,6 +137,7 @@ async def export_readiness(
             "listing_count": latest.listing_count,
             "meta": latest.meta,
         },
+        "mapping_keys": "not_built" if plugin and keys is None else "built",
         "missing_mappings": missing,
         "warnings": warnings,
         "import_templates": import_templates,
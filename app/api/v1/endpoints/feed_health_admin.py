@@ -3,105 +3,106 @@ from __future__ import annotations
 from datetime import datetime, timezone, timedelta
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, desc
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
 from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_latest import FeedSnapshotLatest
 from app.services.internal_admin import require_internal_admin
 
 router = APIRouter()
 
 
+def _latest_snapshots():
+    # One row per feed: the pointer table, joined to its snapshot by primary key
+    return select(FeedSnapshot).join(FeedSnapshotLatest, FeedSnapshotLatest.snapshot_id == FeedSnapshot.id)
+
+
+def _feed_row(s: FeedSnapshot) -> dict:
+    meta = s.meta or {}
+    return {
+        "tenant_id": s.tenant_id,
+        "partner_id": s.partner_id,
+        "destination": s.destination,
+        "created_at": s.created_at.isoformat() if s.created_at else None,
+        "listing_count": s.listing_count,
+        "warnings_count": meta.get("warnings_count", 0),
+        "skipped_count": meta.get("skipped_count", 0),
+        "parse_ok": meta.get("parse_ok", True),
+        "parse_ms": meta.get("parse_ms", 0),
+        "structure_errors_count": meta.get("structure_errors_count", 0),
+        "listing_inclusion_policy": meta.get("listing_inclusion_policy"),
+        "generator": meta.get("generator"),
+    }
+
+
 @router.get("/admin/health/feeds", dependencies=[Depends(require_internal_admin)])
 async def feeds_health_admin(
     stale_minutes: int = Query(default=30, ge=1, le=1440),
     limit: int = Query(default=500, ge=1, le=5000),
     db: AsyncSession = Depends(get_db),
 ):
-    # Simple approach: grab recent snapshots then dedupe.
-    # TODO (perf): switch to DISTINCT ON (tenant_id, partner_id, destination) in Postgres.
-    rows = (
-        await db.execute(
-            select(FeedSnapshot)
-            .order_by(desc(FeedSnapshot.created_at))
-            .limit(limit)
-        )
-    ).scalars().all()
-
+    """
+    Health of every feed's latest snapshot. All filtering/ordering runs in SQL over the
+    feed_snapshot_latest pointers, so cost tracks the rows returned, not the snapshot history.
+    """
     now = datetime.now(timezone.utc)
     cutoff = now - timedelta(minutes=stale_minutes)
 
-    # Deduplicate by (tenant_id, partner_id, destination) picking newest
-    latest_by: dict[tuple[str | None, str, str], FeedSnapshot] = {}
-    for s in rows:
-        k = (getattr(s, "tenant_id", None), s.partner_id, s.destination)
-        if k not in latest_by:
-            latest_by[k] = s
+    latest_count = (await db.execute(select(func.count()).select_from(FeedSnapshotLatest))).scalar_one()
 
-    latest = list(latest_by.values())
+    # Oldest first: the most overdue feeds are the ones to look at
+    stale_rows = (
+        await db.execute(
+            _latest_snapshots()
+            .where(FeedSnapshotLatest.created_at < cutoff)
+            .order_by(FeedSnapshotLatest.created_at.asc())
+            .limit(limit)
+        )
+    ).scalars().all()
 
     stale = []
-    for s in latest:
-        if s.created_at and s.created_at < cutoff:
-            meta = s.meta or {}
-            stale.append({
-                "tenant_id": getattr(s, "tenant_id", None),
-                "partner_id": s.partner_id,
-                "destination": s.destination,
-                "age_minutes": int((now - s.created_at).total_seconds() // 60),
-                "created_at": s.created_at.isoformat(),
-                "listing_count": s.listing_count,
-                "warnings_count": meta.get("warnings_count", 0),
-                "skipped_count": meta.get("skipped_count", 0),
-                "parse_ok": meta.get("parse_ok", True),
-                "parse_ms": meta.get("parse_ms", 0),
-                "listing_inclusion_policy": meta.get("listing_inclusion_policy"),
-                "generator": meta.get("generator"),
-            })
+    for s in stale_rows:
+        row = _feed_row(s)
+        row["age_minutes"] = int((now - s.created_at).total_seconds() // 60)
+        stale.append(row)
 
     # Top warning feeds (include parse_ok and skipped_count)
-    top_warning_feeds = sorted(
-        [
-            {
-                "tenant_id": getattr(s, "tenant_id", None),
-                "partner_id": s.partner_id,
-                "destination": s.destination,
-                "created_at": s.created_at.isoformat() if s.created_at else None,
-                "listing_count": s.listing_count,
-                "warnings_count": (s.meta or {}).get("warnings_count", 0),
-                "skipped_count": (s.meta or {}).get("skipped_count", 0),
-                "parse_ok": (s.meta or {}).get("parse_ok", True),
-                "parse_ms": (s.meta or {}).get("parse_ms", 0),
-                "listing_inclusion_policy": (s.meta or {}).get("listing_inclusion_policy"),
-                "generator": (s.meta or {}).get("generator"),
-            }
-            for s in latest
-        ],
-        key=lambda x: (x["warnings_count"], x["skipped_count"]),
-        reverse=True,
-    )[:20]
-
-    # count parse failures
+    warnings_count = func.coalesce(FeedSnapshot.meta["warnings_count"].as_integer(), 0)
+    skipped_count = func.coalesce(FeedSnapshot.meta["skipped_count"].as_integer(), 0)
+    top_warning_feeds = [
+        _feed_row(s)
+        for s in (
+            await db.execute(
+                _latest_snapshots()
+                .order_by(warnings_count.desc(), skipped_count.desc())
+                .limit(20)
+            )
+        ).scalars().all()
+    ]
+
+    # parse failures
     parse_failures = [
         {
-            "tenant_id": getattr(s, "tenant_id", None),
-            "partner_id": s.partner_id,
-            "destination": s.destination,
-            "created_at": s.created_at.isoformat() if s.created_at else None,
-            "warnings_count": (s.meta or {}).get("warnings_count", 0),
-            "skipped_count": (s.meta or {}).get("skipped_count", 0),
-            "parse_ms": (s.meta or {}).get("parse_ms", 0),
+            k: v for k, v in _feed_row(s).items()
+            if k in ("tenant_id", "partner_id", "destination", "created_at", "warnings_count", "skipped_count", "parse_ms", "structure_errors_count")
         }
-        for s in latest
-        if (s.meta or {}).get("parse_ok") is False
-    ][:50]
+        for s in (
+            await db.execute(
+                _latest_snapshots()
+                .where(FeedSnapshot.meta["parse_ok"].as_boolean().is_(False))
+                .order_by(FeedSnapshotLatest.created_at.desc())
+                .limit(50)
+            )
+        ).scalars().all()
+    ]
 
     return {
         "stale_cutoff_minutes": stale_minutes,
-        "latest_count": len(latest),
+        "latest_count": latest_count,
         "stale": stale,
         "top_warning_feeds": top_warning_feeds,
         "parse_failures": parse_failures,
-        "note": "This endpoint dedupes from the most recent snapshots. Increase limit if you have many partners; later switch to DISTINCT ON for correctness+speed.",
+        "note": "Computed over the latest snapshot of every feed (feed_snapshot_latest); `limit` caps the stale list.",
     }
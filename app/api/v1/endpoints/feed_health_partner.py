@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
+from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
-from app.models.feed_snapshot import FeedSnapshot
+from app.services.feed_snapshots import latest_feed_snapshot, load_snapshot_details
 from app.services.auth import Actor, require_partner_admin
 
 router = APIRouter()
@@ -18,6 +18,7 @@ async def feed_health_partner(
     partner_id: str,
     destination: str,
     stale_minutes: int = Query(default=30, ge=1, le=1440),
+    include_details: bool = Query(default=False),
     actor: Actor = Depends(require_partner_admin),
     db: AsyncSession = Depends(get_db),
 ):
@@ -26,15 +27,7 @@ async def feed_health_partner(
 
     dest = destination.lower().strip()
 
-    snap = (
-        await db.execute(
-            select(FeedSnapshot).where(
-                FeedSnapshot.tenant_id == actor.tenant_id,
-                FeedSnapshot.partner_id == partner_id,
-                FeedSnapshot.destination == dest,
-            ).order_by(desc(FeedSnapshot.created_at)).limit(1)
-        )
-    ).scalar_one_or_none()
+    snap = await latest_feed_snapshot(db, tenant_id=actor.tenant_id, partner_id=partner_id, destination=dest)
 
     if not snap:
         raise HTTPException(status_code=404, detail="No snapshot available")
@@ -45,7 +38,7 @@ async def feed_health_partner(
 
     meta = snap.meta or {}
 
-    return {
+    body: dict[str, Any] = {
         "partner_id": partner_id,
         "destination": dest,
         "stale": is_stale,
@@ -63,5 +56,12 @@ async def feed_health_partner(
             "skipped_by_reason": meta.get("skipped_by_reason", {}),
             "parse_ok": meta.get("parse_ok", True),
             "parse_ms": meta.get("parse_ms", 0),
+            "structure_errors_count": meta.get("structure_errors_count", 0),
         },
     }
+
+    # capped per-listing warnings/skips live in their own table; only read when asked for
+    if include_details:
+        body["latest_snapshot"].update(await load_snapshot_details(db, snap.id))
+
+    return body
@@ -1,4 +1,5 @@
 from app.services.audit import audit
+from app.services.feed_meta_cache import get_feed_meta_cache
 from app.services.feed_urls import build_public_feed_url
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
@@ -86,6 +87,8 @@ async def rotate_feed_token(
     )
     
     await db.commit()
+    # the old token must stop working on every API process right away
+    await get_feed_meta_cache().invalidate(partner_id, [dest])
 
     return {
         "destination": dest,
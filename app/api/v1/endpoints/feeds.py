@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
-from app.models.feed_snapshot import FeedSnapshot
+from app.services.feed_snapshots import latest_feed_snapshot
 from app.services.auth import Actor, require_partner_admin
 
 router = APIRouter()
@@ -20,13 +19,7 @@ async def get_latest_feed(
 
     dest = destination.lower().strip()
 
-    snap = (await db.execute(
-        select(FeedSnapshot).where(
-            FeedSnapshot.tenant_id == actor.tenant_id,
-            FeedSnapshot.partner_id == partner_id,
-            FeedSnapshot.destination == dest,
-        ).order_by(desc(FeedSnapshot.created_at)).limit(1)
-    )).scalar_one_or_none()
+    snap = await latest_feed_snapshot(db, tenant_id=actor.tenant_id, partner_id=partner_id, destination=dest)
 
     if not snap:
         raise HTTPException(status_code=404, detail="No feed snapshot found")
@@ -16,7 +16,13 @@ from app.schemas.geo_admin import (
     GeoBulkImportAreas,
     DestinationGeoAreaMappingUpsert,
 )
+from app.services.audit import audit
+from app.services.auth import Actor
+from app.services.catalog_bulk import bulk_upsert_geo_areas, bulk_upsert_geo_cities
+from app.services.geo_catalog import catalog_slugs, load_geo_catalog
+from app.services.geo_resolver import geo_pair
 from app.services.internal_admin import require_internal_admin
+from app.services.mapping_cache import get_mapping_cache
 
 router = APIRouter()
 
@@ -34,88 +40,88 @@ async def upsert_country(code: str, body: GeoCountryUpsert, db: AsyncSession = D
     )
     row = (await db.execute(stmt)).scalar_one()
     await db.commit()
+    await get_mapping_cache().invalidate()
     return {"id": row.id, "code": row.code, "name": row.name}
 
 @router.post("/admin/geo/cities/bulk", dependencies=[Depends(require_internal_admin)])
-async def bulk_import_cities(body: GeoBulkImportCities, db: AsyncSession = Depends(get_db)):
+async def bulk_import_cities(body: GeoBulkImportCities, db: AsyncSession = Depends(get_db), actor: Actor = Depends(require_internal_admin)):
     country = (await db.execute(select(GeoCountry).where(GeoCountry.code == body.country_code.upper().strip()))).scalar_one_or_none()
     if not country:
         raise HTTPException(status_code=404, detail="Country not found")
 
-    inserted = 0
-    for c in body.cities:
-        stmt = (
-            insert(GeoCity)
-            .values(country_id=country.id, name=c.name, slug=c.slug.lower().strip())
-            .on_conflict_do_update(
-                constraint="uq_geo_city_slug",
-                set_={"name": c.name},
-            )
-        )
-        await db.execute(stmt)
-        inserted += 1
+    stored = (await db.execute(select(GeoCity.slug).where(GeoCity.country_id == country.id))).scalars().all()
+    items = catalog_slugs(stored, [(c.slug, c.name) for c in body.cities], key=lambda slug: geo_pair(country.code, slug, None)[0])
+    inserted = await bulk_upsert_geo_cities(db, country_id=country.id, items=items)
+    await audit(
+        db,
+        tenant_id=None,
+        partner_id=None,
+        actor_api_key_id=getattr(actor, "api_key_id", None),
+        action="admin.geo_cities.import",
+        target_type="geo_country",
+        target_id=country.code,
+        detail={"country_code": country.code, "count": inserted},
+    )
 
     await db.commit()
+    await get_mapping_cache().invalidate()
     return {"country_code": country.code, "count": inserted}
 
 @router.post("/admin/geo/areas/bulk", dependencies=[Depends(require_internal_admin)])
-async def bulk_import_areas(body: GeoBulkImportAreas, db: AsyncSession = Depends(get_db)):
-    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == body.country_code.upper().strip()))).scalar_one_or_none()
-    if not country:
+async def bulk_import_areas(body: GeoBulkImportAreas, db: AsyncSession = Depends(get_db), actor: Actor = Depends(require_internal_admin)):
+    # stored slugs are not normalized (lefkosa_merkez): match through the catalog, like the resolver
+    catalog = await load_geo_catalog(db, country_code=body.country_code)
+    if not catalog:
         raise HTTPException(status_code=404, detail="Country not found")
 
-    city = (await db.execute(select(GeoCity).where(
-        GeoCity.country_id == country.id,
-        GeoCity.slug == body.city_slug.lower().strip(),
-    ))).scalar_one_or_none()
-    if not city:
+    city_key, _ = geo_pair(catalog.country_code, body.city_slug, None)
+    city_id = catalog.cities.get(city_key)
+    if not city_id:
         raise HTTPException(status_code=404, detail="City not found")
-
-    inserted = 0
-    for a in body.areas:
-        stmt = (
-            insert(GeoArea)
-            .values(city_id=city.id, name=a.name, slug=a.slug.lower().strip())
-            .on_conflict_do_update(
-                constraint="uq_geo_area_slug",
-                set_={"name": a.name},
-            )
-        )
-        await db.execute(stmt)
-        inserted += 1
+    city_slug = (await db.execute(select(GeoCity.slug).where(GeoCity.id == city_id))).scalar_one()
+
+    stored = (await db.execute(select(GeoArea.slug).where(GeoArea.city_id == city_id))).scalars().all()
+    items = catalog_slugs(stored, [(a.slug, a.name) for a in body.areas], key=lambda slug: geo_pair(catalog.country_code, city_key, slug)[1])
+    inserted = await bulk_upsert_geo_areas(db, city_id=city_id, items=items)
+    await audit(
+        db,
+        tenant_id=None,
+        partner_id=None,
+        actor_api_key_id=getattr(actor, "api_key_id", None),
+        action="admin.geo_areas.import",
+        target_type="geo_city",
+        target_id=city_id,
+        detail={"country_code": catalog.country_code, "city_slug": city_slug, "count": inserted},
+    )
 
     await db.commit()
-    return {"country_code": country.code, "city_slug": city.slug, "count": inserted}
+    await get_mapping_cache().invalidate()
+    return {"country_code": catalog.country_code, "city_slug": city_slug, "count": inserted}
 
 @router.put("/admin/geo/destinations/area-mapping", dependencies=[Depends(require_internal_admin)])
 async def upsert_destination_area_mapping(body: DestinationGeoAreaMappingUpsert, db: AsyncSession = Depends(get_db)):
     dest = body.destination.lower().strip()
 
-    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == body.country_code.upper().strip()))).scalar_one_or_none()
-    if not country:
+    catalog = await load_geo_catalog(db, country_code=body.country_code)
+    if not catalog:
         raise HTTPException(status_code=404, detail="Country not found")
-
-    city = (await db.execute(select(GeoCity).where(
-        GeoCity.country_id == country.id,
-        GeoCity.slug == body.city_slug.lower().strip(),
-    ))).scalar_one_or_none()
-    if not city:
+    if not catalog.has_city(body.city_slug):
         raise HTTPException(status_code=404, detail="City not found")
-
-    area = (await db.execute(select(GeoArea).where(
-        GeoArea.city_id == city.id,
-        GeoArea.slug == body.area_slug.lower().strip(),
-    ))).scalar_one_or_none()
-    if not area:
+    ids = catalog.resolve(body.city_slug, body.area_slug)
+    if not ids:
         raise HTTPException(status_code=404, detail="Area not found")
+    city_id, area_id = ids
+    city_slug, area_slug = (await db.execute(
+        select(GeoCity.slug, GeoArea.slug).join(GeoArea, GeoArea.city_id == GeoCity.id).where(GeoArea.id == area_id)
+    )).one()
 
     stmt = (
         insert(DestinationGeoMapping)
         .values(
             destination=dest,
-            geo_country_id=country.id,
-            geo_city_id=city.id,
-            geo_area_id=area.id,
+            geo_country_id=catalog.country_id,
+            geo_city_id=city_id,
+            geo_area_id=area_id,
             destination_city_id=body.destination_city_id,
             destination_area_id=body.destination_area_id,
             created_by="internal",
@@ -134,12 +140,13 @@ async def upsert_destination_area_mapping(body: DestinationGeoAreaMappingUpsert,
 
     row = (await db.execute(stmt)).scalar_one()
     await db.commit()
+    await get_mapping_cache().invalidate([dest])
 
     return {
         "destination": row.destination,
-        "country_code": country.code,
-        "city_slug": city.slug,
-        "area_slug": area.slug,
+        "country_code": catalog.country_code,
+        "city_slug": city_slug,
+        "area_slug": area_slug,
         "destination_city_id": row.destination_city_id,
         "destination_area_id": row.destination_area_id,
     }
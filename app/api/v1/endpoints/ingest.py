@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.db import get_db
 from app.schemas.ingest import IngestListingRequest, IngestListingResponse
 from app.services.auth import Actor, require_partner_admin 
 from app.services.ingest import ingest_listing, IngestError
+from app.services.rate_limit import enforce_rate_limit
 
 from app.models.outbox import OutboxEvent
 
@@ -16,10 +18,18 @@ async def ingest_listing_endpoint(
     partner_key: str,
     source_listing_id: str,
     body: IngestListingRequest,
+    response: Response,
     actor: Actor = Depends(require_partner_admin),
     db: AsyncSession = Depends(get_db),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ) -> IngestListingResponse:
+    # Per API key, same limiter as the public feeds
+    response.headers.update(await enforce_rate_limit(
+        key=f"ingest:{actor.api_key_id}",
+        limit=settings.ingest_rate_limit_per_minute,
+        window_seconds=60,
+    ))
+
     if not idempotency_key:
         raise HTTPException(status_code=400, detail="Idempotency-Key header is required")
 
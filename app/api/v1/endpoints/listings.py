@@ -15,6 +15,7 @@ from app.services.idempotency import (
     store_idempotency_response,
     )
 from app.services.listings import upsert_listing_record
+from app.services.partner_mapping_keys import apply_mapping_key_changes, listing_mapping_keys
 
 router = APIRouter()
 
@@ -178,9 +179,11 @@ async def delete_listing(
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
+    old_keys = listing_mapping_keys(listing)
     listing.is_active = False
     listing.status = "archived"
     listing.updated_by = actor.api_key_id
+    await apply_mapping_key_changes(db, tenant_id=actor.tenant_id, partner_id=partner_id, old=old_keys, new=set())
 
     db.add(
         OutboxEvent(
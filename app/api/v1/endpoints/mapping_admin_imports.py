@@ -1,49 +1,29 @@
 from app.services import audit
 from app.services.auth import Actor
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
 from app.services.internal_admin import require_internal_admin
+from app.services.catalog_bulk import bulk_upsert_enum_mappings, bulk_upsert_geo_mappings
+from app.services.geo_catalog import load_geo_catalog
+from app.services.mapping_cache import get_mapping_cache
 
 from app.schemas.mapping_diff import DestinationEnumDictImport, DestinationAreaDictImport
-from app.models.destination_enum_mapping import DestinationEnumMapping
-from app.models.geo_country import GeoCountry
-from app.models.geo_city import GeoCity
-from app.models.geo_area import GeoArea
-from app.models.destination_geo_mapping import DestinationGeoMapping
 
 router = APIRouter()
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
-
 @router.post("/admin/import/destination-enums", dependencies=[Depends(require_internal_admin)])
 async def import_destination_enums(body: DestinationEnumDictImport, db: AsyncSession = Depends(get_db), actor: Actor = Depends(require_internal_admin),):
     dest = body.destination.lower().strip()
     ns = body.namespace.lower().strip()
 
-    count = 0
-    for k, v in body.mappings.items():
-        stmt = (
-            insert(DestinationEnumMapping)
-            .values(
-                destination=dest,
-                namespace=ns,
-                source_key=str(k).strip(),
-                destination_value=str(v).strip(),
-                created_by="internal",
-                updated_by="internal",
-            )
-            .on_conflict_do_update(
-                constraint="uq_dest_enum_map",
-                set_={"destination_value": str(v).strip(), "updated_by": "internal"},
-            )
-        )
-        await db.execute(stmt)
-        count += 1
+    count = await bulk_upsert_enum_mappings(
+        db,
+        destination=dest,
+        items=[(ns, str(k).strip(), str(v).strip()) for k, v in body.mappings.items()],
+        actor_id="internal",
+    )
 
     await audit(
         db,
@@ -57,6 +37,7 @@ async def import_destination_enums(body: DestinationEnumDictImport, db: AsyncSes
     )
 
     await db.commit()
+    await get_mapping_cache().invalidate([dest])
     return {"destination": dest, "namespace": ns, "count": count}
 
 
@@ -67,51 +48,21 @@ async def import_destination_areas(body: DestinationAreaDictImport, db: AsyncSes
     country_code = body.country_code.upper().strip()
 
 
-    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == country_code))).scalar_one_or_none()
-    if not country:
+    catalog = await load_geo_catalog(db, country_code=country_code)
+    if not catalog:
         raise HTTPException(status_code=404, detail="Country not found")
 
-    count = 0
+    items = []
     skipped = 0
-
     for k, area_id in body.mappings.items():
         # key: city_slug:area_slug
-        if ":" not in k:
-            skipped += 1
-            continue
-
-        city_slug, area_slug = k.split(":", 1)
-        city_slug = _slug(city_slug)
-        area_slug = _slug(area_slug)
-
-        city = (await db.execute(select(GeoCity).where(GeoCity.country_id == country.id, GeoCity.slug == city_slug))).scalar_one_or_none()
-        if not city:
-            skipped += 1
-            continue
-
-        area = (await db.execute(select(GeoArea).where(GeoArea.city_id == city.id, GeoArea.slug == area_slug))).scalar_one_or_none()
-        if not area:
+        ids = catalog.resolve(*k.split(":", 1)) if ":" in k else None
+        if not ids:
             skipped += 1
             continue
+        items.append((*ids, str(area_id).strip()))
 
-        stmt = (
-            insert(DestinationGeoMapping)
-            .values(
-                destination=dest,
-                geo_country_id=country.id,
-                geo_city_id=city.id,
-                geo_area_id=area.id,
-                destination_area_id=str(area_id).strip(),
-                created_by="internal",
-                updated_by="internal",
-            )
-            .on_conflict_do_update(
-                constraint="uq_dest_geo_area",
-                set_={"destination_area_id": str(area_id).strip(), "updated_by": "internal"},
-            )
-        )
-        await db.execute(stmt)
-        count += 1
+    count = await bulk_upsert_geo_mappings(db, destination=dest, country_id=catalog.country_id, items=items, actor_id="internal")
 
     await audit(
         db,
@@ -125,4 +76,5 @@ async def import_destination_areas(body: DestinationAreaDictImport, db: AsyncSes
     )
 
     await db.commit()
-    return {"destination": dest, "country_code": country.code, "count": count}
+    await get_mapping_cache().invalidate([dest])
+    return {"destination": dest, "country_code": catalog.country_code, "count": count}
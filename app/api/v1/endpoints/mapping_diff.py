@@ -1,29 +1,20 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
-from app.models.listing import Listing
 from app.models.partner_destination_setting import PartnerDestinationSetting
 from app.services.auth import Actor, require_partner_admin
-from app.canonical.v1.listing import ListingCanonicalV1
+from app.models.listing import Listing
+from app.services.partner_mapping_keys import load_partner_mapping_keys, request_mapping_key_build
 
-from app.services.destination_mapping import resolve_dest_enum
-from app.models.geo_country import GeoCountry
-from app.models.geo_city import GeoCity
-from app.models.geo_area import GeoArea
-from app.models.destination_geo_mapping import DestinationGeoMapping
 from app.destinations.mapping_registry import get_mapping_plugin
-from app.destinations.mapping_base import MappingKeySet
 
 router = APIRouter()
 
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
-
 @router.get("/partners/{partner_id}/destinations/{destination}/mapping-diff")
 async def mapping_diff(
     partner_id: str,
@@ -46,13 +37,6 @@ async def mapping_diff(
     if not setting:
         raise HTTPException(status_code=404, detail="Destination not enabled")
 
-    rows = (await db.execute(select(Listing).where(
-        Listing.tenant_id == actor.tenant_id,
-        Listing.partner_id == partner_id,
-        Listing.schema == "canonical.listing",
-        Listing.schema_version == "1.0",
-    ))).scalars().all()
-
     missing_property_types: set[str] = set()
     missing_currencies: set[str] = set()
     missing_geo: set[str] = set()
@@ -61,21 +45,30 @@ async def mapping_diff(
 
     plugin = get_mapping_plugin(dest)
 
-    agg_enum: dict[str, set[str]] = {}
-    agg_geo: set[str] = set()
-    
-
-    for r in rows:
-        can = ListingCanonicalV1.model_validate(r.payload)
-        ks = plugin.required_mapping_keys(can)
-        for ns, skeys in ks.enum_keys.items():
-            agg_enum.setdefault(ns, set()).update(skeys)
-        agg_geo |= set(ks.geo_keys)
-
-    check = await plugin.check_mappings(db=db, tenant_id=actor.tenant_id, partner_id=partner_id, keys=MappingKeySet(agg_enum, agg_geo))
+    checked = (await db.execute(select(func.count()).select_from(Listing).where(
+        Listing.tenant_id == actor.tenant_id,
+        Listing.partner_id == partner_id,
+        Listing.schema == "canonical.listing",
+        Listing.schema_version == "1.0",
+        Listing.is_active.is_(True),
+    ))).scalar_one()
+
+    keys = await load_partner_mapping_keys(db, tenant_id=actor.tenant_id, partner_id=partner_id, destination=dest)
+    if keys is None:
+        request_mapping_key_build(tenant_id=actor.tenant_id, partner_id=partner_id)
+        return {
+            "destination": dest,
+            "checked": checked,
+            "mapping_keys": "not_built",
+            "missing": {"enums": {}, "geo": []},
+            "warnings": [{"code": "MAPPING_KEYS_NOT_BUILT", "message": "Mapping keys are being built; retry shortly"}],
+        }
+
+    check = await plugin.check_mappings(db=db, tenant_id=actor.tenant_id, partner_id=partner_id, keys=keys)
     return {
     "destination": dest,
-    "checked": len(rows),
+    "checked": checked,
+    "mapping_keys": "built",
     "missing": {
         "enums": {ns: sorted(list(v)) for ns, v in check.missing.enum_keys.items()},
         "geo": sorted(list(check.missing.geo_keys)),
@@ -4,19 +4,16 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
-from app.models.listing import Listing
 from app.models.partner_destination_setting import PartnerDestinationSetting
 from app.services.auth import Actor, require_partner_admin
-from app.canonical.v1.listing import ListingCanonicalV1
-from app.services.destination_mapping import load_dest_enum_maps, resolve_enum_with_fallback
+from app.canonical.trusted import load_stored_listing
+from app.services.listing_scan import iter_partner_listings
+from app.services.destination_mapping import load_dest_enum_maps, load_geo_resolver, resolve_enum_with_fallback
+from app.services.geo_resolver import fold_slug, geo_pair
 
 
 router = APIRouter()
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
-
-
 @router.get("/partners/{partner_id}/destinations/{destination}/validate-mapping")
 async def validate_destination_mapping(
     partner_id: str,
@@ -67,21 +64,27 @@ async def validate_destination_mapping(
     cfg_type_map = cfg.get("type_id_map") or {}
     cfg_currency_map = cfg.get("currency_id_map") or {}
     cfg_rooms_map = cfg.get("room_count_id_map") or {}
-    cfg_area_map = cfg.get("area_id_map") or {}
-
-    rows = (await db.execute(select(Listing).where(
-        Listing.tenant_id == actor.tenant_id,
-        Listing.partner_id == partner_id,
-        Listing.schema == "canonical.listing",
-        Listing.schema_version == "1.0",
-    ).limit(limit))).scalars().all()
+    # config keys are "city:area" or "city"; compare them the way the catalog is compared
+    cfg_area_map = {
+        ":".join(fold_slug(part) for part in str(k).split(":", 1)): v
+        for k, v in (cfg.get("area_id_map") or {}).items()
+    }
+    geo = await load_geo_resolver(db, destination="101evler")
 
     errors: list[dict] = []
     warnings: list[dict] = []
     ok = 0
+    checked = 0
 
-    for r in rows:
-        can = ListingCanonicalV1.model_validate(r.payload)
+    async for r in iter_partner_listings(
+        db,
+        tenant_id=actor.tenant_id,
+        partner_id=partner_id,
+        payload_paths=("list_price", "property", "address"),
+        limit=limit,
+    ):
+        checked += 1
+        can = load_stored_listing(r)
         
         listing_errors: list[dict] = []
         listing_warnings: list[dict] = []
@@ -131,14 +134,17 @@ async def validate_destination_mapping(
             elif room_source == "config_fallback":
                 listing_warnings.append({"code": "ROOM_COUNT_ID_FALLBACK", "detail": {"rooms": rooms_val}, "source": "config_fallback"})
 
-        # Area mapping (config for now, supports city:area then city)
-        city_slug = _slug(can.address.city) if can.address and can.address.city else ""
-        area_slug = _slug(getattr(can.address, "area", None) or "") if can.address else ""
+        # Area mapping: DB catalog, then config (supports city:area then city)
+        city = can.address.city if can.address else None
+        area = getattr(can.address, "area", None) if can.address else None
+        city_slug, area_slug = geo_pair("NCY", city, area)
         area_key = f"{city_slug}:{area_slug}" if area_slug else city_slug
 
-        area_id = None
-        if area_key:
+        area_id = geo.resolve("NCY", city, area)
+        if not area_id and area_key:
             area_id = cfg_area_map.get(area_key) or cfg_area_map.get(city_slug)
+            if area_id:
+                listing_warnings.append({"code": "AREA_ID_FALLBACK", "detail": {"area_key": area_key}, "source": "config_fallback"})
 
         if not area_id:
             listing_errors.append({"code": "MISSING_AREA_ID", "detail": {"city": city_slug, "area": area_slug, "area_key": area_key}})
@@ -153,7 +159,7 @@ async def validate_destination_mapping(
 
     return {
         "destination": dest,
-        "checked": len(rows),
+        "checked": checked,
         "ok": ok,
         "error_count": len(errors),
         "warning_count": len(warnings),
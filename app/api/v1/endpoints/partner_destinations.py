@@ -10,6 +10,7 @@ from app.services.auth import Actor, require_partner_admin
 from app.destinations.registry import supported_destinations
 from app.services.redaction import redact_payload
 from app.services.audit import audit
+from app.services.feed_meta_cache import get_feed_meta_cache
 
 
 router = APIRouter()
@@ -112,6 +113,8 @@ async def upsert_partner_destination(
 
     row = (await db.execute(stmt)).scalar_one()
     await db.commit()
+    # enabled flag / feed_token may have changed
+    await get_feed_meta_cache().invalidate(partner_id, [dest_norm])
 
     return PartnerDestinationOut(
         destination=row.destination,
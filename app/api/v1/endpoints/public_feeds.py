@@ -1,22 +1,26 @@
 from __future__ import annotations
 import hashlib
 from datetime import timezone
-from email.utils import format_datetime
-from pathlib import Path
-from urllib.parse import urlparse
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import escape, quoteattr
 
 from app.destinations.feeds.registry import get_feed_plugin
-from app.services.rate_limit import TokenRateLimiter
-from app.services.storage import LocalObjectStore
+from app.services.feed_meta_cache import FeedArtifactMeta, FeedMeta, get_feed_meta_cache, token_hash
+from app.services.feed_encodings import IDENTITY, negotiate_encoding, snapshot_variants
+from app.services.rate_limit import enforce_rate_limit
+from app.services.storage import ObjectStore, get_object_store
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 
 from app.core.config import settings
 from app.core.db import get_db
 from app.models.partner_destination_setting import PartnerDestinationSetting
-from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_delta import FeedSnapshotDelta
+from app.models.feed_snapshot_part import FeedSnapshotPart
+from app.services.feed_urls import build_public_feed_part_url, build_public_feed_url
+from app.services.feed_snapshots import latest_feed_snapshot
 
 router = APIRouter()
 
@@ -24,8 +28,8 @@ router = APIRouter()
 CACHE_MAX_AGE_SECONDS = 60
 
 # Create once (reuse Redis pool)
-_limiter = TokenRateLimiter(settings.redis_url)
-_store = LocalObjectStore(settings.feed_storage_dir)
+_store = get_object_store()
+_meta_cache = get_feed_meta_cache()
 
 def _media_type(ext: str) -> str:
     ext = (ext or "").lower().strip()
@@ -70,38 +74,105 @@ def _token_key(token: str) -> str:
 
 
 async def _rate_limit_or_429(*, partner_id: str, dest: str, token: str) -> dict[str, str]:
-    rl = await _limiter.allow(
+    return await enforce_rate_limit(
         key=f"public_feed:{partner_id}:{dest}:{_token_key(token)}",
-        limit=60,
+        limit=settings.public_feed_rate_limit_per_minute,
         window_seconds=60,
     )
-    if not rl.allowed:
-        # include Retry-After
-        raise HTTPException(
-            status_code=429,
-            detail="Rate limit exceeded",
-            headers={"Retry-After": str(rl.reset_seconds)},
+
+
+async def _load_feed_meta(*, db: AsyncSession, store: ObjectStore, partner_id: str, dest: str) -> FeedMeta:
+    """
+    Cache miss path: setting + latest snapshot from the DB, and a check the object exists.
+    """
+    setting = (
+        await db.execute(
+            select(PartnerDestinationSetting).where(
+                PartnerDestinationSetting.partner_id == partner_id,
+                PartnerDestinationSetting.destination == dest,
+                PartnerDestinationSetting.is_enabled.is_(True),
+            )
         )
+    ).scalar_one_or_none()
+
+    if not setting:
+        raise HTTPException(status_code=404, detail="Feed not enabled")
+
+    cfg = setting.config or {}
+    token = cfg.get("feed_token")
+    if not token:
+        raise HTTPException(status_code=403, detail="Invalid token")
+
+    snap = await latest_feed_snapshot(db, tenant_id=None, partner_id=partner_id, destination=dest)
+
+    if not snap:
+        return FeedMeta(token_hash=token_hash(str(token)))
+
+    try:
+        path = store.local_path(snap.storage_uri)
+    except ValueError:
+        raise HTTPException(status_code=501, detail="Unsupported storage URI")
+
+    if path is not None:
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="Snapshot file missing")
+    elif await store.size(snap.storage_uri) is None:
+        raise HTTPException(status_code=404, detail="Snapshot file missing")
 
-    return {
-        "X-RateLimit-Limit": "60",
-        "X-RateLimit-Remaining": str(rl.remaining),
-        "X-RateLimit-Reset": str(rl.reset_seconds),
+    deltas = {
+        d.base_snapshot_id: FeedArtifactMeta(
+            content_hash=d.content_hash,
+            storage_uri=d.storage_uri,
+            size_bytes=d.size_bytes,
+            variants=snapshot_variants(d),
+        )
+        for d in (await db.execute(
+            select(FeedSnapshotDelta).where(FeedSnapshotDelta.snapshot_id == snap.id)
+        )).scalars().all()
     }
 
+    parts = tuple(
+        FeedArtifactMeta(
+            content_hash=p.content_hash,
+            storage_uri=p.storage_uri,
+            size_bytes=p.size_bytes,
+            variants=snapshot_variants(p),
+            listing_count=p.listing_count,
+        )
+        for p in (await db.execute(
+            select(FeedSnapshotPart).where(FeedSnapshotPart.snapshot_id == snap.id).order_by(FeedSnapshotPart.part_no)
+        )).scalars().all()
+    )
 
-async def _resolve_snapshot_and_headers(
+    return FeedMeta(
+        token_hash=token_hash(str(token)),
+        format=(snap.format or "").lower().strip(),
+        content_hash=snap.content_hash,
+        last_modified=_http_date(snap.created_at),
+        storage_uri=snap.storage_uri,
+        size_bytes=snap.size_bytes,
+        variants=snapshot_variants(snap),
+        listing_count=snap.listing_count,
+        snapshot_id=snap.id,
+        deltas=deltas,
+        parts=parts,
+    )
+
+
+async def _authorized_meta(
     *,
     db: AsyncSession,
-    store: LocalObjectStore,
+    store: ObjectStore,
     partner_id: str,
     destination: str,
-    ext: str,
+    ext: str | None,
     token: str,
-    request: Request,
-):
+) -> tuple[str, FeedMeta]:
+    """
+    (destination, FeedMeta) of a feed with a snapshot, once the token checks out.
+    ext=None skips the format check (the part index is XML for every feed format).
+    """
     dest = destination.lower().strip()
-    ext = ext.lower().strip()
 
     # Validate ext matches plugin contract
     try:
@@ -109,82 +180,223 @@ async def _resolve_snapshot_and_headers(
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Unknown destination: {dest}")
 
+    ext = plugin.format if ext is None else ext.lower().strip()
     if ext != plugin.format:
         raise HTTPException(status_code=404, detail="Unsupported format")
 
-    setting = (
-        await db.execute(
-            select(PartnerDestinationSetting).where(
-                PartnerDestinationSetting.partner_id == partner_id,
-                PartnerDestinationSetting.destination == dest,
-                PartnerDestinationSetting.is_enabled.is_(True),
-            )
-        )
-    ).scalar_one_or_none()
-
-    if not setting:
-        raise HTTPException(status_code=404, detail="Feed not enabled")
+    # Hot path: no DB and no filesystem access while the cached entry is current
+    meta = await _meta_cache.get(
+        partner_id, dest,
+        lambda: _load_feed_meta(db=db, store=store, partner_id=partner_id, dest=dest),
+    )
 
-    cfg = setting.config or {}
-    if cfg.get("feed_token") != token:
+    if not meta.token_matches(token):
         raise HTTPException(status_code=403, detail="Invalid token")
 
-    snap = (
-        await db.execute(
-            select(FeedSnapshot).where(
-                FeedSnapshot.partner_id == partner_id,
-                FeedSnapshot.destination == dest,
-            ).order_by(desc(FeedSnapshot.created_at)).limit(1)
-        )
-    ).scalar_one_or_none()
-
-    if not snap:
+    if meta.storage_uri is None:
         raise HTTPException(status_code=404, detail="No snapshot available")
 
      # extra safety: snapshot format should match ext
-    if (snap.format or "").lower().strip() != ext:
+    if meta.format != ext:
         raise HTTPException(status_code=404, detail="No snapshot available for requested format")
-    
-    etag = _etag_value(snap.content_hash)
-    last_modified = _http_date(snap.created_at)
+
+    return dest, meta
+
+
+async def _resolve_snapshot_and_headers(
+    *,
+    db: AsyncSession,
+    store: ObjectStore,
+    partner_id: str,
+    destination: str,
+    ext: str,
+    token: str,
+    request: Request,
+    since: str | None = None,
+    part: int | None = None,
+):
+    dest, meta = await _authorized_meta(
+        db=db, store=store, partner_id=partner_id, destination=destination, ext=ext, token=token,
+    )
+
+    content_hash, uri, size, variants = meta.content_hash, meta.storage_uri, meta.size_bytes, meta.variants
+    delta = None
+    if part is not None:
+        if not 0 <= part < len(meta.parts):
+            raise HTTPException(status_code=404, detail="No such feed part")
+        p = meta.parts[part]
+        content_hash, uri, size, variants = p.content_hash, p.storage_uri, p.size_bytes, p.variants
+    elif meta.parts:
+        # sharded: the snapshot's own object is only the internal part index
+        index_url = request.url.replace(path=request.url.path.rsplit(".", 1)[0] + "/index.xml")
+        raise HTTPException(status_code=302, detail="Feed is sharded; see its index", headers={"Location": str(index_url)})
+    elif since:
+        # Delta mode: the changes since the client's snapshot, when that delta was built;
+        # otherwise (base pruned, too old, or no delta support) the full feed
+        delta = meta.deltas.get(since)
+        if delta is not None:
+            content_hash, uri, size, variants = delta.content_hash, delta.storage_uri, delta.size_bytes, delta.variants
 
     headers = {
-        "ETag": etag,
+        "ETag": _etag_value(content_hash),
         "Cache-Control": f"public, max-age={CACHE_MAX_AGE_SECONDS}",
-        "Last-Modified": last_modified,
+        "Last-Modified": meta.last_modified,
         "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+        # the `since` value for the client's next delta request
+        "X-Feed-Snapshot": meta.snapshot_id or "",
     }
+    if since and part is None:
+        headers["X-Feed-Delta"] = f"since={since}" if delta is not None else "full"
+
+    # Serve the precompressed variant the client weighs highest (q-values), else the plain feed
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), variants)
+    if encoding is None:
+        raise HTTPException(status_code=406, detail="No acceptable content encoding", headers={"Vary": "Accept-Encoding"})
+
+    chosen_uri = uri
+    if encoding != IDENTITY:
+        chosen_uri, size = variants[encoding]
+        headers["Content-Encoding"] = encoding
+        # each encoding is its own representation: a strong ETag must differ per variant
+        headers["ETag"] = _etag_value(f"{content_hash}-{encoding}")
+
+    # objects are immutable (content-addressed); existence was checked when the entry was loaded
+    path = store.local_path(chosen_uri)
 
-    accept_encoding = (request.headers.get("accept-encoding") or "").lower()
-    wants_gzip = "gzip" in accept_encoding
+    return dest, chosen_uri, path, size, headers
 
-    chosen_uri = snap.storage_uri
-    if wants_gzip and snap.gzip_storage_uri:
-        chosen_uri = snap.gzip_storage_uri
-        headers["Content-Encoding"] = "gzip"
 
+def _not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """
+    RFC 9110 §13.2.2: If-None-Match decides when present; If-Modified-Since only otherwise.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _if_none_match_matches(if_none_match, headers["ETag"])
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or not headers.get("Last-Modified"):
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+        modified = parsedate_to_datetime(headers["Last-Modified"])
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified <= since
+
+
+def _byte_range(request: Request, headers: dict[str, str], size: int) -> tuple[int, int] | None:
+    """
+    Inclusive (start, end) of a single satisfiable "bytes=" Range, or None to send the full body
+    (no/unsupported/multi/invalid range, or an If-Range that no longer matches).
+    """
+    range_header = request.headers.get("range")
+    if not range_header:
+        return None
+
+    # If-Range is a strong comparison: only our exact ETag or Last-Modified resumes a download
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() not in (headers["ETag"], headers.get("Last-Modified")):
+        return None
+
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
     try:
-        path = store.resolve_path(chosen_uri)
+        if first == "":
+            # suffix range: the last N bytes ("-0" is unsatisfiable)
+            n = int(last)
+            start, end = (max(0, size - n) if n > 0 else size), size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                # last-pos before first-pos is invalid, not unsatisfiable: ignore the header
+                return None
+            end = min(int(last), size - 1) if last else size - 1
     except ValueError:
-        raise HTTPException(status_code=501, detail="Non-file storage not supported yet")
+        return None
 
-    if not path.exists():
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def _feed_response(
+    *,
+    request: Request,
+    store: ObjectStore,
+    uri: str,
+    path,
+    size: int | None,
+    ext: str,
+    headers: dict[str, str],
+) -> Response:
+    """
+    Local files go through FileResponse, which answers Range/If-Range itself and hands the
+    file to the server for zero-copy sending when it supports the ASGI pathsend extension.
+    Remote objects are redirected to a presigned URL (when enabled; the object store serves
+    ranges) or streamed through, honouring a single byte range.
+    """
+    if path is not None:
+        return FileResponse(path, media_type=_media_type(ext), headers=headers)
+
+    if settings.s3_redirect_public_feeds:
+        overrides = {"content-type": _media_type(ext)}
+        if headers.get("Content-Encoding"):
+            overrides["content-encoding"] = headers["Content-Encoding"]
+        url = store.presigned_url(uri, expires_seconds=settings.s3_presign_expires_seconds, response_headers=overrides)
+        if url:
+            redirect_headers = {k: v for k, v in headers.items() if k.startswith("X-RateLimit")}
+            redirect_headers["Cache-Control"] = "no-store"
+            return RedirectResponse(url, status_code=302, headers=redirect_headers)
+
+    if size is None:
+        size = await store.size(uri)
+    if size is None:
         raise HTTPException(status_code=404, detail="Snapshot file missing")
 
-    return dest, path, headers
+    byte_range = _byte_range(request, headers, size)
+    if byte_range is None:
+        return StreamingResponse(
+            store.iter_bytes(uri),
+            media_type=_media_type(ext),
+            headers={**headers, "Content-Length": str(size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        store.iter_bytes(uri, start=start, end=end),
+        status_code=206,
+        media_type=_media_type(ext),
+        headers={
+            **headers,
+            "Content-Length": str(end - start + 1),
+            "Content-Range": f"bytes {start}-{end}/{size}",
+        },
+    )
 
 
-@router.get("/feeds/{partner_id}/{destination}.xml")
+@router.get("/feeds/{partner_id}/{destination}.{ext}")
 async def get_public_feed_xml(
     partner_id: str,
     destination: str,
     ext: str,
     request: Request,
     token: str = Query(..., min_length=10),
+    since: str | None = Query(default=None, max_length=64),
     db: AsyncSession = Depends(get_db),
 ):
 
-    dest, path, headers = await _resolve_snapshot_and_headers(
+    dest, uri, path, size, headers = await _resolve_snapshot_and_headers(
         db=db,
         store=_store,
         partner_id=partner_id,
@@ -192,16 +404,17 @@ async def get_public_feed_xml(
         ext=ext,
         token=token,
         request=request,
+        since=since,
     )
 
     # Rate limit (after auth)
     rl_headers = await _rate_limit_or_429(partner_id=partner_id, dest=dest, token=token)
     headers.update(rl_headers)
 
-    if _if_none_match_matches(request.headers.get("if-none-match"), headers["ETag"]):
+    if _not_modified(request, headers):
         return Response(status_code=304, headers=headers)
 
-    return FileResponse(path, media_type=_media_type(ext), headers=headers)
+    return await _feed_response(request=request, store=_store, uri=uri, path=path, size=size, ext=ext, headers=headers)
 
 
 @router.head("/feeds/{partner_id}/{destination}.{ext}")
@@ -211,10 +424,47 @@ async def head_public_feed_xml(
     ext: str,
     request: Request,
     token: str = Query(..., min_length=10),
+    since: str | None = Query(default=None, max_length=64),
     db: AsyncSession = Depends(get_db),
 ):
 
-    dest, path, headers = await _resolve_snapshot_and_headers(
+    dest, uri, path, size, headers = await _resolve_snapshot_and_headers(
+        db=db,
+        store=_store,
+        partner_id=partner_id,
+        destination=destination,
+        ext=ext,
+        token=token,
+        request=request,
+        since=since,
+    )
+
+    rl_headers = await _rate_limit_or_429(partner_id=partner_id, dest=dest, token=token)
+    headers.update(rl_headers)
+
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    # Answered from the stored sizes; only snapshots built before sizes were recorded need a lookup
+    if size is None:
+        size = await _store.size(uri)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    headers["Content-Type"] = _media_type(ext)
+    return Response(status_code=200, headers=headers)
+
+
+@router.get("/feeds/{partner_id}/{destination}/parts/{part_no}.{ext}")
+async def get_public_feed_part(
+    partner_id: str,
+    destination: str,
+    part_no: int,
+    ext: str,
+    request: Request,
+    token: str = Query(..., min_length=10),
+    db: AsyncSession = Depends(get_db),
+):
+    dest, uri, path, size, headers = await _resolve_snapshot_and_headers(
         db=db,
         store=_store,
         partner_id=partner_id,
@@ -222,12 +472,116 @@ async def head_public_feed_xml(
         ext=ext,
         token=token,
         request=request,
+        part=part_no,
     )
 
     rl_headers = await _rate_limit_or_429(partner_id=partner_id, dest=dest, token=token)
     headers.update(rl_headers)
 
-    if _if_none_match_matches(request.headers.get("if-none-match"), headers["ETag"]):
+    if _not_modified(request, headers):
         return Response(status_code=304, headers=headers)
 
-    return Response(status_code=200, headers=headers)
\ No newline at end of file
+    return await _feed_response(request=request, store=_store, uri=uri, path=path, size=size, ext=ext, headers=headers)
+
+
+@router.head("/feeds/{partner_id}/{destination}/parts/{part_no}.{ext}")
+async def head_public_feed_part(
+    partner_id: str,
+    destination: str,
+    part_no: int,
+    ext: str,
+    request: Request,
+    token: str = Query(..., min_length=10),
+    db: AsyncSession = Depends(get_db),
+):
+    dest, uri, path, size, headers = await _resolve_snapshot_and_headers(
+        db=db,
+        store=_store,
+        partner_id=partner_id,
+        destination=destination,
+        ext=ext,
+        token=token,
+        request=request,
+        part=part_no,
+    )
+
+    rl_headers = await _rate_limit_or_429(partner_id=partner_id, dest=dest, token=token)
+    headers.update(rl_headers)
+
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    if size is None:
+        size = await _store.size(uri)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    headers["Content-Type"] = _media_type(ext)
+    return Response(status_code=200, headers=headers)
+
+
+def _part_index_body(*, meta: FeedMeta, partner_id: str, dest: str, token: str) -> bytes:
+    """
+    Sitemap-style manifest: one <part> per shard with its URL and ETag, so a portal only
+    re-downloads the parts whose ETag changed. An unsharded feed lists itself as its only part.
+    """
+    if meta.parts:
+        entries = [
+            (
+                build_public_feed_part_url(
+                    public_base_url=settings.public_base_url, partner_id=partner_id, destination=dest, part_no=n, token=token,
+                ),
+                p.content_hash,
+                p.listing_count,
+                p.size_bytes,
+            )
+            for n, p in enumerate(meta.parts)
+        ]
+    else:
+        entries = [(
+            build_public_feed_url(public_base_url=settings.public_base_url, partner_id=partner_id, destination=dest, token=token),
+            meta.content_hash,
+            meta.listing_count,
+            meta.size_bytes,
+        )]
+
+    lines = [f'<?xml version="1.0" encoding="UTF-8"?>\n<feedindex snapshot={quoteattr(meta.snapshot_id or "")}>']
+    for loc, content_hash, listing_count, size_bytes in entries:
+        lines.append(
+            f"<part><loc>{escape(loc)}</loc><etag>{escape(_etag_value(content_hash))}</etag>"
+            + (f"<listing_count>{listing_count}</listing_count>" if listing_count is not None else "")
+            + (f"<size_bytes>{size_bytes}</size_bytes>" if size_bytes is not None else "")
+            + "</part>"
+        )
+    lines.append("</feedindex>")
+    return "".join(lines).encode("utf-8")
+
+
+@router.api_route("/feeds/{partner_id}/{destination}/index.xml", methods=["GET", "HEAD"])
+async def get_public_feed_index(
+    partner_id: str,
+    destination: str,
+    request: Request,
+    token: str = Query(..., min_length=10),
+    db: AsyncSession = Depends(get_db),
+):
+    dest, meta = await _authorized_meta(
+        db=db, store=_store, partner_id=partner_id, destination=destination, ext=None, token=token,
+    )
+
+    rl_headers = await _rate_limit_or_429(partner_id=partner_id, dest=dest, token=token)
+
+    body = _part_index_body(meta=meta, partner_id=partner_id, dest=dest, token=token)
+    headers = {
+        "ETag": _etag_value(hashlib.sha256(body).hexdigest()[:32]),
+        "Cache-Control": f"public, max-age={CACHE_MAX_AGE_SECONDS}",
+        "Last-Modified": meta.last_modified,
+        "X-Feed-Snapshot": meta.snapshot_id or "",
+        **rl_headers,
+    }
+    headers = {k: v for k, v in headers.items() if v}
+
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    if request.method == "HEAD":
+        return Response(status_code=200, headers={**headers, "Content-Length": str(len(body)), "Content-Type": "application/xml"})
+    return Response(content=body, media_type="application/xml", headers=headers)
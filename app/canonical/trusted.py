@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import copy
+import types
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Protocol, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from app.canonical.registry import resolve_schema
+from app.core.config import settings
+
+
+_Converter = Callable[[Any], Any]
+
+_MISSING = object()
+
+
+class StoredCanonical(Protocol):
+    schema: str
+    schema_version: str
+    payload: dict[str, Any]
+    content_hash: str | None
+
+
+class CanonicalView:
+    """
+    Read-only, attribute-compatible view over a stored canonical payload.
+
+    Nothing is validated or copied up-front: each field is read from the stored dict on first
+    access (defaults filled in, nested models wrapped in views, datetimes parsed) and cached.
+    Scalars come back exactly as stored, i.e. in their write-time normalized JSON form.
+    """
+    __slots__ = ("_data", "_cache")
+
+    model_type: ClassVar[type[BaseModel]]
+
+    def __init__(self, data: dict[str, Any]):
+        self._data = data
+        self._cache: dict[str, Any] = {}
+
+    def to_model(self) -> BaseModel:
+        """
+        Fully validated model, for callers that need the real thing.
+        """
+        return self.model_type.model_validate(self._data)
+
+    def model_dump(self, *, mode: str = "python", exclude_none: bool = False, **kwargs: Any) -> dict[str, Any]:
+        # Stored payloads are exactly model_dump(mode="json", exclude_none=True)
+        if mode == "json" and exclude_none and not kwargs:
+            return copy.deepcopy(self._data)
+        return self.to_model().model_dump(mode=mode, exclude_none=exclude_none, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+
+class _Field:
+    __slots__ = ("name", "default", "factory", "convert")
+
+    def __init__(self, name: str, default: Any, factory: Callable[[], Any] | None, convert: _Converter | None):
+        self.name = name
+        self.default = default
+        self.factory = factory
+        self.convert = convert
+
+    def __get__(self, obj: CanonicalView | None, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        cache = obj._cache
+        if self.name in cache:
+            return cache[self.name]
+
+        v = obj._data.get(self.name, _MISSING)
+        if v is _MISSING:
+            v = self.factory() if self.factory is not None else self.default
+        elif v is not None and self.convert is not None:
+            v = self.convert(v)
+        cache[self.name] = v
+        return v
+
+
+_VIEWS: dict[type[BaseModel], type[CanonicalView]] = {}
+
+
+def _converter_for(annotation: Any) -> _Converter | None:
+    """
+    How to turn a stored JSON value back into something attribute-compatible (None = as is).
+    """
+    origin = get_origin(annotation)
+
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        return _converter_for(args[0]) if len(args) == 1 else None
+
+    if origin is list:
+        args = get_args(annotation)
+        inner = _converter_for(args[0]) if args else None
+        if inner is None:
+            return None
+        return lambda v: [inner(x) for x in v] if isinstance(v, list) else v
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            view = view_class(annotation)
+            return lambda v: view(v) if isinstance(v, dict) else v
+        if issubclass(annotation, datetime):
+            return lambda v: datetime.fromisoformat(v) if isinstance(v, str) else v
+
+    return None
+
+
+def view_class(model: type[BaseModel]) -> type[CanonicalView]:
+    """
+    CanonicalView subclass exposing `model`'s fields (built once per model class).
+    """
+    cls = _VIEWS.get(model)
+    if cls is None:
+        ns: dict[str, Any] = {"__slots__": (), "model_type": model}
+        for name, field in model.model_fields.items():
+            default = None if field.default is PydanticUndefined else field.default
+            ns[name] = _Field(name, default, field.default_factory, _converter_for(field.annotation))  # type: ignore[arg-type]
+        cls = _VIEWS[model] = type(f"{model.__name__}View", (CanonicalView,), ns)
+    return cls
+
+
+def is_trusted(*, schema: str, schema_version: str, payload: dict[str, Any], content_hash: str | None) -> bool:
+    """
+    A stored payload is trusted when it carries a write-path content hash and its embedded
+    schema/version match the row's. Anything else goes through full validation.
+    """
+    return (
+        settings.canonical_trusted_load
+        and isinstance(payload, dict)
+        and isinstance(content_hash, str)
+        and content_hash.startswith("sha256:")
+        and payload.get("schema") == schema
+        and payload.get("schema_version") == schema_version
+    )
+
+
+def load_canonical(
+    *,
+    schema: str,
+    schema_version: str,
+    payload: dict[str, Any],
+    content_hash: str | None,
+) -> Any:
+    """
+    Load a stored canonical payload: a trusted view when gated in, model_validate otherwise.
+    """
+    Model: Type[BaseModel] = resolve_schema(schema, schema_version)
+    if is_trusted(schema=schema, schema_version=schema_version, payload=payload, content_hash=content_hash):
+        return view_class(Model)(payload)
+    return Model.model_validate(payload)
+
+
+def load_stored_listing(listing: StoredCanonical) -> Any:
+    """
+    load_canonical() for a Listing row (or anything with schema/schema_version/payload/content_hash).
+    """
+    return load_canonical(
+        schema=listing.schema,
+        schema_version=listing.schema_version,
+        payload=listing.payload,
+        content_hash=listing.content_hash,
+    )
@@ -37,5 +37,75 @@ class Settings(BaseSettings):
     
     feed_storage_dir: str = "./var/feeds"
 
+    # Feed object store: "local" (feed_storage_dir) or "s3" (any S3-compatible endpoint, e.g. MinIO)
+    feed_storage_backend: str = "local"
+    s3_endpoint_url: str = "http://localhost:9000"
+    s3_region: str = "us-east-1"
+    s3_bucket: str = "feeds"
+    s3_key_prefix: str = ""
+    s3_access_key_id: str = "IN_ENV"
+    s3_secret_access_key: SecretStr = SecretStr("IN_ENV")
+    s3_part_size_bytes: int = 8 * 1024 * 1024  # multipart part size (S3 minimum is 5 MiB)
+    # Public feeds on s3: redirect to a presigned URL instead of proxying the bytes
+    s3_redirect_public_feeds: bool = False
+    s3_presign_expires_seconds: int = 300
+
+    # Precompressed feed variants built alongside each snapshot (Content-Encoding tokens;
+    # br/zstd need the optional brotli/zstandard packages) and their levels
+    feed_encodings: str = "gzip,br,zstd"
+    feed_gzip_level: int = 6
+    feed_brotli_quality: int = 5
+    feed_zstd_level: int = 9
+
+    # Public feed endpoint: in-process snapshot metadata cache (coherent via Redis version keys);
+    # the TTL only bounds staleness if an invalidation is lost
+    feed_meta_cache_ttl_seconds: int = 300
+    feed_meta_cache_max_entries: int = 10000
+
+    # Destination enum/area mappings: in-process cache, reloaded when a catalog change bumps
+    # its Redis version key; the TTL only bounds staleness if a bump is lost
+    mapping_cache_ttl_seconds: int = 600
+
+    # Rate limits (requests per minute) and the per-process pre-check: each Redis call leases
+    # up to this fraction of the limit, spent locally for at most the TTL (0 = always ask Redis)
+    public_feed_rate_limit_per_minute: int = 60
+    ingest_rate_limit_per_minute: int = 600
+    rate_limit_local_fraction: float = 0.0
+    rate_limit_local_ttl_seconds: float = 1.0
+
+    # Feed object GC: how often the dispatcher prunes unreferenced objects, and the minimum
+    # age before an unreferenced object may go (covers builds whose snapshot is not committed yet)
+    feed_storage_gc_interval_seconds: int = 3600
+    feed_storage_gc_grace_seconds: int = 3600
+
+    # Feed snapshot retention (default per destination; a feed plugin may declare its own):
+    # keep the newest N, plus the newest of each day for this many days. Runs before the GC,
+    # deleting this many snapshot rows per transaction.
+    feed_retention_keep_last: int = 10
+    feed_retention_daily_days: int = 30
+    feed_retention_batch_size: int = 500
+
+    # Delta feeds ("changes since"): each new snapshot gets a delta against this many previous ones
+    feed_delta_bases: int = 3
+
+    # Feed dispatcher: partners built concurrently, per-partner timeout,
+    # and worker processes for the CPU phase (0 = render inline on the event loop)
+    feed_build_concurrency: int = 4
+    feed_build_timeout_seconds: int = 600
+    feed_build_processes: int = 2
+
+    # Rows per round trip for partner-wide listing scans (server-side cursor)
+    listing_scan_chunk_size: int = 1000
+
+    # Largest request body accepted once a `Content-Encoding: gzip` body is inflated
+    request_body_max_bytes: int = 64 * 1024 * 1024
+
+    # Deliveries per publish task; each task loads its deliveries' listings, mappings,
+    # credentials and identities with one query per table
+    publish_batch_size: int = 25
+
+    # Build canonical models from stored (already validated) payloads without re-validating
+    canonical_trusted_load: bool = True
+
 
 settings = Settings()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import json
+import zlib
+
+from app.core.config import settings
+
+
+class GzipRequestMiddleware:
+    """
+    Accept request bodies sent with `Content-Encoding: gzip` (large admin imports): the body is
+    inflated before routing, capped at settings.request_body_max_bytes once decompressed.
+    """
+
+    def __init__(self, app, max_bytes: int | None = None):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = scope["headers"]
+        encoding = next((v for k, v in headers if k == b"content-encoding"), b"").strip().lower()
+        if encoding != b"gzip":
+            return await self.app(scope, receive, send)
+
+        limit = self.max_bytes or settings.request_body_max_bytes
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks: list[bytes] = []
+        size = 0
+        more = True
+        try:
+            while more:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                more = message.get("more_body", False)
+                # at most one byte past the cap is inflated: enough to know it is exceeded
+                out = inflater.decompress(message.get("body", b""), limit - size + 1)
+                size += len(out)
+                if size > limit:
+                    return await _error(send, 413, "Decompressed request body too large")
+                chunks.append(out)
+            if not inflater.eof:
+                raise zlib.error("truncated gzip stream")
+        except zlib.error:
+            return await _error(send, 400, "Invalid gzip request body")
+
+        body = b"".join(chunks)
+        scope = dict(scope)
+        scope["headers"] = [
+            (k, v) for k, v in headers if k not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode())]
+
+        sent = False
+
+        async def inflated_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, inflated_receive, send)
+
+
+async def _error(send, status: int, detail: str) -> None:
+    payload = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+    })
+    await send({"type": "http.response.body", "body": payload})
@@ -1,4 +1,6 @@
 from app.destinations.registry import register
 from app.destinations.evler101.connector import Evler101HostedFeedConnector
+from app.destinations.partner_csv.connector import PartnerCSVHostedFeedConnector
 
 register(Evler101HostedFeedConnector())
+register(PartnerCSVHostedFeedConnector())
@@ -21,6 +21,7 @@ class Evler101HostedFeedConnector(DestinationConnector):
         return DestinationCapabilities(
             destination=self.destination,
             transport="hosted_feed",
+            auth="none",
             supports_delete=False,      # not specified yet
             supports_media=True,        # feed supports <ad_pictures> :contentReference[oaicite:7]{index=7}
             features={"timed_offers": False},
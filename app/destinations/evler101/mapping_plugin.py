@@ -1,22 +1,25 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from sqlalchemy import select
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.destinations.mapping_base import DestinationMappingPlugin, MappingKeySet, MappingCheckResult
 from app.canonical.v1.listing import ListingCanonicalV1
 from app.models.destination_enum_mapping import DestinationEnumMapping
 from app.models.geo_country import GeoCountry
-from app.models.geo_city import GeoCity
-from app.models.geo_area import GeoArea
-from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.services.destination_mapping import load_geo_resolver
+from app.services.geo_resolver import geo_key
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
+
+def _text_array(values: list[str]):
+    # one array parameter (`= ANY(:keys)`) instead of a parameter per key
+    return bindparam(None, values, type_=ARRAY(String), unique=True)
 
 
 class Evler101MappingPlugin:
     destination = "101evler"
+    payload_paths = ("property", "list_price", "address")
 
     def required_mapping_keys(self, listing: ListingCanonicalV1) -> MappingKeySet:
         enum: dict[str, set[str]] = {"property_type": set(), "currency": set(), "rooms": set()}
@@ -38,12 +41,9 @@ class Evler101MappingPlugin:
         if rooms is not None:
             enum["rooms"].add(str(rooms))
 
-        city_slug = _slug(listing.address.city) if listing.address else ""
-        area_slug = _slug(getattr(listing.address, "area", None) or "") if listing.address else ""
-        if city_slug and area_slug:
-            geo.add(f"{city_slug}:{area_slug}")
-        else:
-            geo.add(f"{city_slug}:{area_slug}")
+        city = listing.address.city if listing.address else None
+        area = getattr(listing.address, "area", None) if listing.address else None
+        geo.add(geo_key("NCY", city, area))
 
         return MappingKeySet(enum_keys=enum, geo_keys=geo)
 
@@ -55,25 +55,24 @@ class Evler101MappingPlugin:
         partner_id: str,
         keys: MappingKeySet,
     ) -> MappingCheckResult:
-        missing_enum: dict[str, set[str]] = {ns: set() for ns in keys.enum_keys.keys()}
+        missing_enum: dict[str, set[str]] = {}
         missing_geo: set[str] = set()
         warnings: list[dict] = []
 
         dest = self.destination
 
-        # Check enum mappings in DB
+        # Enum mappings: one query per namespace for all of its keys
         for ns, skeys in keys.enum_keys.items():
-            for k in skeys:
-                if k.startswith("<"):
-                    missing_enum[ns].add(k)
-                    continue
-                found = (await db.execute(select(DestinationEnumMapping.destination_value).where(
+            wanted = sorted(k for k in skeys if not k.startswith("<"))
+            found: set[str] = set()
+            if wanted:
+                found = set((await db.execute(select(DestinationEnumMapping.source_key).where(
                     DestinationEnumMapping.destination == dest,
                     DestinationEnumMapping.namespace == ns,
-                    DestinationEnumMapping.source_key == k,
-                ))).scalar_one_or_none()
-                if not found:
-                    missing_enum[ns].add(k)
+                    DestinationEnumMapping.source_key == any_(_text_array(wanted)),
+                    DestinationEnumMapping.destination_value != "",
+                ))).scalars().all())
+            missing_enum[ns] = set(skeys) - found
 
         # Geo mapping uses shared NCY catalogs
         country = (await db.execute(select(GeoCountry).where(GeoCountry.code == "NCY"))).scalar_one_or_none()
@@ -81,31 +80,9 @@ class Evler101MappingPlugin:
             missing_geo |= set(keys.geo_keys)
             warnings.append({"code": "MISSING_COUNTRY_CATALOG", "message": "GeoCountry NCY not found"})
         else:
-            for key in keys.geo_keys:
-                if ":" not in key:
-                    missing_geo.add(key)
-                    continue
-                city_slug, area_slug = key.split(":", 1)
-                city = (await db.execute(select(GeoCity).where(
-                    GeoCity.country_id == country.id,
-                    GeoCity.slug == city_slug,
-                ))).scalar_one_or_none()
-                if not city:
-                    missing_geo.add(key)
-                    continue
-                area = (await db.execute(select(GeoArea).where(
-                    GeoArea.city_id == city.id,
-                    GeoArea.slug == area_slug,
-                ))).scalar_one_or_none()
-                if not area:
-                    missing_geo.add(key)
-                    continue
-                dm = (await db.execute(select(DestinationGeoMapping).where(
-                    DestinationGeoMapping.destination == dest,
-                    DestinationGeoMapping.geo_area_id == area.id,
-                ))).scalar_one_or_none()
-                if not dm or not dm.destination_area_id:
-                    missing_geo.add(key)
+            # the process-wide resolver: no query per key (or per check, once cached)
+            resolver = await load_geo_resolver(db, destination=dest)
+            missing_geo = {key for key in keys.geo_keys if not resolver.resolve_key("NCY", key)}
 
         missing = MappingKeySet(enum_keys=missing_enum, geo_keys=missing_geo)
         ok = (all(len(v) == 0 for v in missing_enum.values()) and len(missing_geo) == 0)
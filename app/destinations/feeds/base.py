@@ -1,20 +1,117 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Protocol, Any
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Protocol, Any, Callable, Iterable
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.canonical.trusted import load_stored_listing
+from app.canonical.v1.listing import ListingCanonicalV1
+from app.destinations.feeds.sharding import FeedPart, ShardLimits
+
+# Compact listing row: (listing_id, agent_id, updated_at, payload, content_hash).
+# Plain tuples keep a partner scan cheap to pickle across the build process pool.
+ListingRow = tuple[str, str, datetime | None, dict[str, Any], str | None]
+
+
 @dataclass(frozen=True)
 class FeedBuildOutput:
+    """
+    A finished feed. `chunks` produces the serialized document lazily and is iterated once,
+    straight into the object store; `meta` is final once `chunks` is exhausted.
+    """
     format: str               # "xml" / "csv"
-    bytes: bytes
+    chunks: Iterable[bytes]
     listing_count: int
     meta: dict[str, Any]
-    content_hash: str
+    # Delta mode: listing id -> hash of its serialized ad (filled while `chunks` is iterated),
+    # and a renderer for the changes against a base snapshot's item_hashes (added/changed ads
+    # in full, removed ids). None when the plugin does not support deltas.
+    item_hashes: dict[str, str] | None = None
+    delta: Callable[[dict[str, str]], FeedBuildOutput] | None = None
+    # Sharding mode: the same listings as independently parseable parts (instead of `chunks`)
+    parts: Callable[[ShardLimits], list[FeedPart]] | None = None
+
+
+@dataclass(frozen=True)
+class FeedBuildContext:
+    """
+    Per-destination state loaded up-front from the DB (config, policy, mapping lookups).
+    Must stay picklable: writers may run in a worker process.
+    """
+    destination: str
+    config: dict[str, Any]
+    listing_inclusion_policy: str
+    lookups: dict[str, Any] = field(default_factory=dict)
+    # JSONB paths the writer reads (None = whole payload); lets scans project server-side
+    payload_paths: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True)
+class FeedRetentionPolicy:
+    """
+    Snapshots of one feed that survive pruning: the newest `keep_last`, plus the newest of each
+    UTC day for the last `daily_days` days. The latest snapshot is always kept.
+    """
+    keep_last: int
+    daily_days: int
+
+
+class FeedListing:
+    """
+    One scanned listing shared by every writer of a partner build.
+    The canonical model is loaded lazily and at most once, however many writers read it.
+    """
+    __slots__ = ("id", "agent_id", "updated_at", "payload", "content_hash", "_canonical")
+
+    # Partner scans only select canonical.listing@1.0 rows
+    schema = "canonical.listing"
+    schema_version = "1.0"
+
+    def __init__(self, row: ListingRow):
+        self.id, self.agent_id, self.updated_at, self.payload, self.content_hash = row
+        self._canonical: ListingCanonicalV1 | None = None
+
+    @property
+    def canonical(self) -> ListingCanonicalV1:
+        if self._canonical is None:
+            self._canonical = load_stored_listing(self)
+        return self._canonical
+
+
+class FeedWriter(Protocol):
+    def consume(self, listing: FeedListing) -> None:
+        ...
+
+    def finish(self) -> FeedBuildOutput:
+        ...
+
 
 class HostedFeedPlugin(Protocol):
     destination: str
     format: str  # "xml" | "csv" |
+    # optional `retention: FeedRetentionPolicy` attribute; settings.feed_retention_* otherwise
+    # optional `supports_delta = True`: writer outputs carry item_hashes + delta (changes-since feeds)
+    # sharding ("shard_max_listings" in the destination config) needs writer outputs with `parts`
+
+    async def prepare(
+        self,
+        *,
+        db: AsyncSession,
+        tenant_id: str,
+        partner_id: str,
+        config: dict[str, Any],
+    ) -> FeedBuildContext:
+        """
+        DB phase: load every lookup the writer needs. Listings are scanned by the caller.
+        """
+        ...
+
+    def open(self, ctx: FeedBuildContext) -> FeedWriter:
+        """
+        CPU phase: a fresh writer fed one listing at a time. No DB access allowed.
+        """
+        ...
 
     async def build(
         self,
@@ -24,4 +121,7 @@ class HostedFeedPlugin(Protocol):
         partner_id: str,
         config: dict[str, Any],
     ) -> FeedBuildOutput:
+        """
+        Compatibility wrapper: prepare + scan this partner's listings + finish.
+        """
         ...
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import AsyncIterator, Iterable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.destinations.feeds.base import FeedBuildContext, FeedBuildOutput, FeedListing, FeedWriter, ListingRow
+from app.services.listing_scan import iter_partner_listings
+
+async def scan_partner_rows(
+    db: AsyncSession,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    payload_paths: Sequence[str] | None = None,
+) -> AsyncIterator[ListingRow]:
+    """
+    Stream a partner's canonical listings once, as compact tuples, through a server-side cursor.
+    Ordered by id so feed output (and its content hash) is stable between builds.
+    """
+    async for r in iter_partner_listings(db, tenant_id=tenant_id, partner_id=partner_id, payload_paths=payload_paths):
+        yield (r.id, r.agent_id, r.updated_at, r.payload, r.content_hash)
+
+
+def payload_paths_for(contexts: Iterable[FeedBuildContext]) -> list[str] | None:
+    """
+    Union of the payload paths a set of prepared writers reads; None if any needs the full payload.
+    """
+    paths: dict[str, None] = {}
+    for ctx in contexts:
+        wanted = ctx.payload_paths
+        if wanted is None:
+            return None
+        paths.update(dict.fromkeys(wanted))
+    return list(paths)
+
+
+def fan_out(writers: Sequence[FeedWriter], rows: Iterable[ListingRow]) -> list[FeedBuildOutput]:
+    """
+    Feed every row to every writer (payload parsed at most once per row), then finish all.
+    Pure CPU: safe to run in a worker process.
+    """
+    for row in rows:
+        listing = FeedListing(row)
+        for w in writers:
+            w.consume(listing)
+    return [w.finish() for w in writers]
+
+
+async def stream_to_writers(
+    db: AsyncSession,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    writers: Sequence[FeedWriter],
+    payload_paths: Sequence[str] | None = None,
+) -> list[FeedBuildOutput]:
+    """
+    Inline variant of fan_out(): consume straight off the cursor without materializing the scan.
+    """
+    async for row in scan_partner_rows(db, tenant_id=tenant_id, partner_id=partner_id, payload_paths=payload_paths):
+        listing = FeedListing(row)
+        for w in writers:
+            w.consume(listing)
+    return [w.finish() for w in writers]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TypeVar
+from xml.sax.saxutils import quoteattr
+
+
+@dataclass(frozen=True)
+class FeedPart:
+    """
+    One shard of a sharded feed: a complete, independently parseable document. `chunks` may be
+    lazy (serialized as the part is stored) and is consumed once.
+    """
+    format: str
+    listing_count: int
+    chunks: Iterable[bytes]
+
+
+@dataclass(frozen=True)
+class ShardLimits:
+    max_listings: int
+    max_bytes: int | None = None
+
+
+def shard_limits(config: dict[str, Any]) -> ShardLimits | None:
+    """
+    Sharding mode from a destination setting's config ("shard_max_listings", optional
+    "shard_max_bytes"); None when the feed is a single document.
+    """
+    max_listings = int((config or {}).get("shard_max_listings") or 0)
+    if max_listings <= 0:
+        return None
+    max_bytes = int((config or {}).get("shard_max_bytes") or 0)
+    return ShardLimits(max_listings=max_listings, max_bytes=max_bytes or None)
+
+
+def _is_boundary(listing_id: str, every: int) -> bool:
+    h = hashlib.sha256(listing_id.encode("utf-8")).digest()
+    return int.from_bytes(h[:8], "big") % every == 0
+
+
+T = TypeVar("T")
+
+
+def split_items(
+    items: Iterable[tuple[str, T]],
+    *,
+    limits: ShardLimits,
+    size: Callable[[T], int] = len,  # type: ignore[assignment]
+) -> list[list[T]]:
+    """
+    Group (listing_id, item) pairs, sorted by listing id, into parts. Item sizes are only taken
+    when limits.max_bytes is set, so items need not be serialized yet otherwise.
+
+    Boundaries are content-defined: a part ends after a listing whose id hashes to a boundary
+    (about every max_listings/2 listings, never before max_listings/8), or when a hard limit
+    would be exceeded. Adding, changing or removing a listing therefore only rewrites its own
+    part (rarely its neighbour); every other part keeps its bytes, and so its ETag.
+    """
+    every = max(1, limits.max_listings // 2)
+    min_listings = max(1, limits.max_listings // 8)
+
+    parts: list[list[T]] = []
+    current: list[T] = []
+    current_bytes = 0
+    for listing_id, item in sorted(items, key=lambda it: it[0]):
+        item_bytes = size(item) if limits.max_bytes is not None else 0
+        if current and (
+            len(current) >= limits.max_listings
+            or (limits.max_bytes is not None and current_bytes + item_bytes > limits.max_bytes)
+        ):
+            parts.append(current)
+            current, current_bytes = [], 0
+        current.append(item)
+        current_bytes += item_bytes
+        if len(current) >= min_listings and _is_boundary(listing_id, every):
+            parts.append(current)
+            current, current_bytes = [], 0
+    if current or not parts:
+        parts.append(current)
+    return parts
+
+
+def part_index_xml(*, format: str, parts: Iterable[tuple[int, int, str]]) -> bytes:
+    """
+    Stored (token-free) index of a sharded snapshot: (listing_count, size_bytes, sha256) per part.
+    Its hash changes exactly when some part does.
+    """
+    lines = [f"<?xml version='1.0' encoding='utf-8'?>\n<feedindex format={quoteattr(format)}>"]
+    for n, (count, size, sha) in enumerate(parts):
+        lines.append(f'<part n="{n}" listing_count="{count}" size_bytes="{size}" sha256="{sha}"/>')
+    lines.append("</feedindex>")
+    return "".join(lines).encode("utf-8")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+
+@dataclass(frozen=True)
+class XmlItemProfile:
+    """
+    Structure every item element (e.g. <ad>) of a feed must have: these child tags, non-empty.
+    id_tag names the child identifying the item in errors.
+    """
+    item_tag: str
+    required: tuple[str, ...] = ()
+    id_tag: str | None = None
+
+
+class StreamingXmlCheck:
+    """
+    Incremental well-formedness (and optional item profile) check, fed the same chunks that are
+    written out. Finished elements are dropped as soon as they are checked, so memory stays
+    at about one item however large the document is.
+    """
+
+    def __init__(self, profile: XmlItemProfile | None = None, *, max_errors: int = 200):
+        self.profile = profile
+        self.max_errors = max_errors
+        self.well_formed = True
+        self.errors: list[dict[str, Any]] = []  # capped at max_errors
+        self.error_count = 0
+        self.elapsed_s = 0.0
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: list[ET.Element] = []
+        self._in_item = 0
+        self._items = 0
+
+    def _error(self, *, listing_id: str | None, code: str, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"listing_id": listing_id, "code": code, "message": message})
+
+    def _check_item(self, item: ET.Element) -> None:
+        profile = self.profile
+        listing_id = (item.findtext(profile.id_tag) or None) if profile.id_tag else None
+        for tag in profile.required:
+            if not (item.findtext(tag) or "").strip():
+                self._error(
+                    listing_id=listing_id or f"#{self._items}",
+                    code="XML_MISSING_TAG",
+                    message=f"<{profile.item_tag}> without <{tag}>",
+                )
+
+    def _drain(self) -> None:
+        item_tag = self.profile.item_tag if self.profile else None
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._stack.append(elem)
+                if elem.tag == item_tag:
+                    self._in_item += 1
+                continue
+
+            self._stack.pop()
+            if elem.tag == item_tag:
+                self._in_item -= 1
+                self._items += 1
+                self._check_item(elem)
+            if not self._in_item and self._stack:
+                # done with it: keep the tree from growing with the document
+                self._stack[-1].remove(elem)
+
+    def feed(self, chunk: bytes) -> None:
+        if not self.well_formed:
+            return
+        t0 = time.perf_counter()
+        try:
+            self._parser.feed(chunk)
+            self._drain()
+        except ET.ParseError as e:
+            self.well_formed = False
+            self._error(listing_id=None, code="XML_NOT_WELL_FORMED", message=str(e))
+        self.elapsed_s += time.perf_counter() - t0
+
+    def close(self) -> None:
+        if not self.well_formed:
+            return
+        t0 = time.perf_counter()
+        try:
+            self._parser.close()
+            self._drain()
+        except ET.ParseError as e:
+            self.well_formed = False
+            self._error(listing_id=None, code="XML_NOT_WELL_FORMED", message=str(e))
+        self.elapsed_s += time.perf_counter() - t0
+
+    def checked(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass `chunks` through unchanged, checking them on the way; results are final once exhausted.
+        """
+        for chunk in chunks:
+            self.feed(chunk)
+            yield chunk
+        self.close()
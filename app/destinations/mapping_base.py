@@ -21,6 +21,8 @@ class MappingCheckResult:
 
 class DestinationMappingPlugin(Protocol):
     destination: str
+    # JSONB paths required_mapping_keys() reads (None = whole payload)
+    payload_paths: tuple[str, ...] | None
 
     def required_mapping_keys(self, listing: ListingCanonicalV1) -> MappingKeySet:
         """
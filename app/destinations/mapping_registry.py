@@ -13,3 +13,7 @@ def get_mapping_plugin(destination: str) -> DestinationMappingPlugin:
     if key not in _PLUGINS:
         raise KeyError(f"No mapping plugin registered for destination={destination}")
     return _PLUGINS[key]
+
+
+def iter_mapping_plugins() -> list[DestinationMappingPlugin]:
+    return list(_PLUGINS.values())
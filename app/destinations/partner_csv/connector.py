@@ -9,6 +9,7 @@ class PartnerCSVHostedFeedConnector(DestinationConnector):
         return DestinationCapabilities(
             destination=self.destination,
             transport="hosted_feed",
+            auth="none",
             supports_delete=False,
             supports_media=False,
             listing_inclusion_policy="include_with_status",
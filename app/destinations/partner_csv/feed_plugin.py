@@ -1,86 +1,176 @@
 from __future__ import annotations
 import csv
-import hashlib
 from io import StringIO
-from typing import Any
+from tempfile import SpooledTemporaryFile
+from typing import Any, Iterator
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.destinations.feeds.base import FeedBuildOutput
+from app.destinations.feeds.base import FeedBuildContext, FeedBuildOutput, FeedListing
+from app.destinations.feeds.pipeline import stream_to_writers
 from app.destinations.registry import get_destination_connector
-from app.canonical.v1.listing import ListingCanonicalV1
-from app.models.listing import Listing
 from app.services.listing_state import canonical_status, should_include_listing
 from app.services.feed_stats import summarize_skips
 
-
-class PartnerCSVFeedPlugin:
-    destination = "partner_csv"
-    format = "csv"
-
-    async def build(self, *, db: AsyncSession, tenant_id: str, partner_id: str, config: dict[str, Any]) -> FeedBuildOutput:
-
-        connector = get_destination_connector(self.destination)
-        policy = connector.capabilities().listing_inclusion_policy
-
-        rows = (await db.execute(select(Listing).where(
-            Listing.tenant_id == tenant_id,
-            Listing.partner_id == partner_id,
-            Listing.schema == "canonical.listing",
-            Listing.schema_version == "1.0",
-        ))).scalars().all()
-
-        skipped: list[dict[str, Any]] = []
-
-        buf = StringIO()
-        w = csv.writer(buf)
-        w.writerow(["listing_id", "title", "price_amount", "currency", "city"])
-
-        # Header depends on policy
-        header = ["listing_id", "title", "price_amount", "currency", "city"]
+# CSV column -> canonical payload path (scalar leaves only, so scans project just these)
+CSV_COLUMNS: dict[str, str] = {
+    "listing_id": "canonical_id",
+    "source_listing_id": "source_listing_id",
+    "status": "status",
+    "purpose": "purpose",
+    "title": "title",
+    "price_amount": "list_price.amount",
+    "currency": "list_price.currency",
+    "city": "address.city",
+    "area": "address.area",
+    "region": "address.region",
+    "postal_code": "address.postal_code",
+    "country": "address.country",
+    "lat": "address.lat",
+    "lng": "address.lng",
+    "category": "property.category",
+    "bedrooms": "property.bedrooms",
+    "bathrooms": "property.bathrooms",
+    "area_m2": "property.area_m2",
+}
+DEFAULT_COLUMNS = ("listing_id", "title", "price_amount", "currency", "city")
+
+# Encoded rows are handed to the store in blocks of about this size
+CSV_CHUNK_SIZE = 64 * 1024
+
+# Encoded rows stay in memory up to this size while the scan runs, then spill to a temp file
+CSV_SPOOL_SIZE = 4 * 1024 * 1024
+
+
+def csv_columns(config: dict[str, Any], *, policy: str) -> list[str]:
+    """
+    Columns from the destination config ("columns": [...]), else the defaults (plus "status"
+    under include_with_status). Raises ValueError for unknown names.
+    """
+    wanted = (config or {}).get("columns")
+    if not wanted:
+        columns = list(DEFAULT_COLUMNS)
         if policy == "include_with_status":
-            header.append("status")
-        w.writerow(header)
-
-        count = 0
-        for r in rows:
-            status = canonical_status(r.payload)
-
-            # Exclude inactive if policy says so
-            if not should_include_listing(policy=policy, status=status):
-                skipped.append({"listing_id": str(r.id), "reason": "policy_excluded", "detail": f"status={status}"})
-                continue
-
-            can = ListingCanonicalV1.model_validate(r.payload)
-            price = can.list_price.amount if can.list_price else ""
-            cur = can.list_price.currency if can.list_price else ""
-            city = can.address.city if can.address else ""
-
-            out_row = [can.canonical_id, can.title or "", price, cur, city]
-            if policy == "include_with_status":
-                out_row.append(status)
-
-            w.writerow([can.canonical_id, can.title or "", price, cur, city])
-            count += 1
-
-        data = buf.getvalue().encode("utf-8")
-        h = hashlib.sha256(data).hexdigest()
-
-        skipped_by_reason = summarize_skips(skipped)
+            columns.append("status")
+        return columns
+
+    unknown = [c for c in wanted if c not in CSV_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown partner_csv columns: {', '.join(map(str, unknown))}")
+    return list(dict.fromkeys(wanted))
+
+
+def csv_payload_paths(columns: list[str]) -> tuple[str, ...]:
+    """
+    Payload paths a scan must project for these columns ("status" is always read by the policy).
+    """
+    return tuple(dict.fromkeys([CSV_COLUMNS["status"], *(CSV_COLUMNS[c] for c in columns)]))
+
+
+def _lookup(payload: dict[str, Any], path: tuple[str, ...]) -> Any:
+    value: Any = payload
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class PartnerCSVFeedWriter:
+    """
+    Reads the configured columns straight off the (projected) payload and encodes rows as they
+    arrive into a spooled file (memory up to CSV_SPOOL_SIZE, then disk); finish() streams the
+    header and then the spool back in CSV_CHUNK_SIZE blocks.
+    """
+
+    def __init__(self, ctx: FeedBuildContext):
+        self.policy = ctx.listing_inclusion_policy
+        self.columns = csv_columns(ctx.config, policy=self.policy)
+        self._paths = [tuple(CSV_COLUMNS[c].split(".")) for c in self.columns]
+        self.skipped: list[dict[str, Any]] = []
+        self.count = 0
+
+        self._spool = SpooledTemporaryFile(max_size=CSV_SPOOL_SIZE)
+        self._buf = StringIO()
+        self._w = csv.writer(self._buf)
+
+    def _flush(self) -> None:
+        data = self._buf.getvalue()
+        if data:
+            self._spool.write(data.encode("utf-8"))
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def consume(self, listing: FeedListing) -> None:
+        payload = listing.payload
+        status = canonical_status(payload)
+
+        # Exclude inactive if policy says so
+        if not should_include_listing(policy=self.policy, status=status):
+            self.skipped.append({"listing_id": str(listing.id), "reason": "policy_excluded", "detail": f"status={status}"})
+            return
+
+        row = [_lookup(payload, p) for p in self._paths]
+        if "status" in self.columns:
+            row[self.columns.index("status")] = status
+        if "listing_id" in self.columns and row[self.columns.index("listing_id")] is None:
+            row[self.columns.index("listing_id")] = listing.id
+        self._w.writerow(row)
+        self.count += 1
+        if self._buf.tell() >= CSV_CHUNK_SIZE:
+            self._flush()
+
+    def _chunks(self) -> Iterator[bytes]:
+        header = StringIO()
+        csv.writer(header).writerow(self.columns)
+        yield header.getvalue().encode("utf-8")
+        self._flush()
+        with self._spool as spool:
+            spool.seek(0)
+            while block := spool.read(CSV_CHUNK_SIZE):
+                yield block
+
+    def finish(self) -> FeedBuildOutput:
+        skipped_by_reason = summarize_skips(self.skipped)
 
         meta: dict[str, Any] = {
-            "generator": "partner_csv_v1",
-            "listing_inclusion_policy": policy,
+            "generator": "partner_csv_v2",
+            "listing_inclusion_policy": self.policy,
+            "columns": self.columns,
             "skipped_count": int(sum(skipped_by_reason.values())),
             "skipped_by_reason": dict(skipped_by_reason),
         }
-        meta["skipped"] = skipped[:200]
+        meta["skipped"] = self.skipped[:200]
 
         return FeedBuildOutput(
             format="csv",
-            bytes=data,
-            listing_count=count,
-            content_hash=h,
+            chunks=self._chunks(),
+            listing_count=self.count,
             meta=meta,
         )
+
+
+class PartnerCSVFeedPlugin:
+    destination = "partner_csv"
+    format = "csv"
+
+    async def prepare(self, *, db: AsyncSession, tenant_id: str, partner_id: str, config: dict[str, Any]) -> FeedBuildContext:
+
+        connector = get_destination_connector(self.destination)
+        policy = connector.capabilities().listing_inclusion_policy
+        columns = csv_columns(config, policy=policy)  # fail the build before scanning on a bad column set
+
+        return FeedBuildContext(
+            destination=self.destination,
+            config=dict(config or {}),
+            listing_inclusion_policy=policy,
+            payload_paths=csv_payload_paths(columns),
+        )
+
+    def open(self, ctx: FeedBuildContext) -> PartnerCSVFeedWriter:
+        return PartnerCSVFeedWriter(ctx)
+
+    async def build(self, *, db: AsyncSession, tenant_id: str, partner_id: str, config: dict[str, Any]) -> FeedBuildOutput:
+        ctx = await self.prepare(db=db, tenant_id=tenant_id, partner_id=partner_id, config=config)
+        (out,) = await stream_to_writers(db, tenant_id=tenant_id, partner_id=partner_id, writers=[self.open(ctx)], payload_paths=ctx.payload_paths)
+        return out
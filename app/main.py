@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 
 from app.api.v1.router import router as v1_router
+from app.core.request_encoding import GzipRequestMiddleware
 from app.core.telemetry import setup_telemetry
 
 app = FastAPI(title="Hub API", version="0.1.0")
 
+app.add_middleware(GzipRequestMiddleware)
 setup_telemetry(app)
 app.include_router(v1_router)
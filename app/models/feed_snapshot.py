@@ -1,5 +1,5 @@
 from app.core.ids import gen_id
-from sqlalchemy import String, ForeignKey, Text, Integer
+from sqlalchemy import BigInteger, Index, String, ForeignKey, Text, Integer, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -13,6 +13,10 @@ class FeedSnapshot(AuditMixin, Base):
     Represents a generated hosted feed file for a destination and partner.
     """
     __tablename__ = "feed_snapshots"
+    __table_args__ = (
+        # newest-first lookups per feed (latest snapshot, delta bases, retention)
+        Index("ix_feed_snapshots_latest_lookup", "tenant_id", "partner_id", "destination", text("created_at DESC")),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: gen_id("fds"))
 
@@ -32,8 +36,17 @@ class FeedSnapshot(AuditMixin, Base):
     # extra metadata (generator version, warnings, etc.)
     meta: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
 
-    # gzip 
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    # Precompressed variants (Content-Encoding gzip / br / zstd)
     gzip_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
     gzip_size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    brotli_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    brotli_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    zstd_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    zstd_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    # Delta feeds: gzipped JSON {listing_id: item hash} of this snapshot's ads
+    item_hashes_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class FeedSnapshotDelta(Base):
+    """
+    "Changes since" artifact: the ads added/changed in `snapshot_id` relative to
+    `base_snapshot_id`, plus removed ids. Same storage columns as FeedSnapshot.
+    A row with base == snapshot is the (empty) delta for clients already up to date.
+    """
+    __tablename__ = "feed_snapshot_deltas"
+
+    snapshot_id: Mapped[str] = mapped_column(String, ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True)
+    base_snapshot_id: Mapped[str] = mapped_column(String, ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True)
+
+    format: Mapped[str] = mapped_column(String(40), nullable=False)
+    storage_uri: Mapped[str] = mapped_column(String(500), nullable=False)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(80), nullable=False)
+
+    gzip_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    gzip_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    brotli_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    brotli_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    zstd_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    zstd_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    added_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    changed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    removed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_feed_snapshot_deltas_base", "base_snapshot_id"),
+    )
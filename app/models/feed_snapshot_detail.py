@@ -0,0 +1,24 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class FeedSnapshotDetail(Base):
+    """
+    Bulky per-listing build details of a FeedSnapshot (capped warnings / skipped / structure
+    error entries).
+    Kept out of feed_snapshots.meta so snapshot queries stay small; load it only when shown.
+    """
+    __tablename__ = "feed_snapshot_details"
+
+    snapshot_id: Mapped[str] = mapped_column(String, ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True)
+
+    warnings: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+    skipped: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+    structure_errors: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
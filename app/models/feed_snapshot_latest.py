@@ -0,0 +1,28 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class FeedSnapshotLatest(Base):
+    """
+    Pointer to the newest FeedSnapshot per partner feed; maintained in the same transaction
+    that creates the snapshot. `created_at` mirrors the snapshot's, for staleness scans.
+    """
+    __tablename__ = "feed_snapshot_latest"
+
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    partner_id: Mapped[str] = mapped_column(String, ForeignKey("partners.id"), primary_key=True)
+    destination: Mapped[str] = mapped_column(String(120), primary_key=True)
+
+    snapshot_id: Mapped[str] = mapped_column(String, ForeignKey("feed_snapshots.id", ondelete="CASCADE"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_feed_snapshot_latest_created", "created_at"),
+        Index("ix_feed_snapshot_latest_partner_dest", "partner_id", "destination"),
+    )
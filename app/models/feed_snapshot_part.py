@@ -0,0 +1,32 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class FeedSnapshotPart(Base):
+    """
+    One part of a sharded feed snapshot (the snapshot's own object is then the part index).
+    Same storage columns as FeedSnapshot; unchanged parts share objects across snapshots.
+    """
+    __tablename__ = "feed_snapshot_parts"
+
+    snapshot_id: Mapped[str] = mapped_column(String, ForeignKey("feed_snapshots.id", ondelete="CASCADE"), primary_key=True)
+    part_no: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    format: Mapped[str] = mapped_column(String(40), nullable=False)
+    storage_uri: Mapped[str] = mapped_column(String(500), nullable=False)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(80), nullable=False)
+    listing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    gzip_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    gzip_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    brotli_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    brotli_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    zstd_storage_uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    zstd_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class PartnerMappingKey(Base):
+    """
+    Distinct mapping keys (DestinationMappingPlugin.required_mapping_keys) across a partner's
+    active listings, with the number of listings needing each. Kept up to date on listing
+    upsert/delete, so readiness checks never rescan the listings.
+    """
+    __tablename__ = "partner_mapping_keys"
+
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    partner_id: Mapped[str] = mapped_column(String, ForeignKey("partners.id"), primary_key=True)
+    destination: Mapped[str] = mapped_column(String(120), primary_key=True)
+    namespace: Mapped[str] = mapped_column(String(80), primary_key=True)  # enum namespace, or "geo"
+    key: Mapped[str] = mapped_column(String(400), primary_key=True)
+
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_partner_mapping_keys_partner_dest", "partner_id", "destination"),
+    )
@@ -0,0 +1,20 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class PartnerMappingKeyBuild(Base):
+    """
+    Marks a partner whose partner_mapping_keys were built from a full scan; from then on the
+    incremental updates keep them exact. Partners without a row are built by the worker
+    (worker.tasks.rebuild_partner_mapping_keys), queued by the first read.
+    """
+    __tablename__ = "partner_mapping_key_builds"
+
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    partner_id: Mapped[str] = mapped_column(String, ForeignKey("partners.id"), primary_key=True)
+
+    built_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import uuid
+from typing import Any, Iterable, Sequence, cast
+
+from sqlalchemy import CursorResult, String, column, literal, select, table, text
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import TableClause
+
+from app.core.ids import gen_id
+from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.models.geo_area import GeoArea
+from app.models.geo_city import GeoCity
+
+
+async def stage_records(db: AsyncSession, columns: Sequence[str], records: list[tuple[str, ...]]) -> TableClause:
+    """
+    COPY `records` into a fresh temp table of text columns, on the session's connection
+    (dropped at commit). Returns a table() construct to select from.
+    """
+    name = f"_catalog_stage_{uuid.uuid4().hex[:12]}"
+    cols = ", ".join(f"{c} text NOT NULL" for c in columns)
+    await db.execute(text(f"CREATE TEMP TABLE {name} ({cols}) ON COMMIT DROP"))
+
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection  # the asyncpg connection
+    if driver is None:
+        raise RuntimeError("catalog staging needs an open driver connection")
+    await driver.copy_records_to_table(name, records=records, columns=list(columns))
+    return table(name, *(column(c, String) for c in columns))
+
+
+async def drop_stage(db: AsyncSession, stage: TableClause) -> None:
+    # one transaction may stage several batches; don't keep them around until commit
+    await db.execute(text(f"DROP TABLE {stage.name}"))
+
+
+async def _upsert(db: AsyncSession, stmt: Insert, stage: TableClause) -> int:
+    # INSERT statements return a CursorResult; rowcount counts inserted and updated rows
+    written = cast(CursorResult[Any], await db.execute(stmt)).rowcount
+    await drop_stage(db, stage)
+    return written
+
+
+async def bulk_upsert_enum_mappings(
+    db: AsyncSession,
+    *,
+    destination: str,
+    items: Iterable[tuple[str, str, str]],  # (namespace, source_key, destination_value)
+    actor_id: str,
+) -> int:
+    """
+    Upsert enum mappings with one COPY and one INSERT ... SELECT. The last item wins for a
+    repeated key. Returns the number of distinct keys written.
+    """
+    latest: dict[tuple[str, str], str] = {}
+    for ns, key, value in items:
+        latest[(ns, key)] = value
+    if not latest:
+        return 0
+
+    stage = await stage_records(
+        db, ("id", "namespace", "source_key", "destination_value"),
+        [(gen_id("dem"), ns, key, value) for (ns, key), value in latest.items()],
+    )
+    stmt = insert(DestinationEnumMapping).from_select(
+        ["id", "destination", "namespace", "source_key", "destination_value", "created_by", "updated_by"],
+        select(
+            stage.c.id,
+            literal(destination, String),
+            stage.c.namespace,
+            stage.c.source_key,
+            stage.c.destination_value,
+            literal(actor_id, String),
+            literal(actor_id, String),
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_dest_enum_map",
+        set_={"destination_value": stmt.excluded.destination_value, "updated_by": actor_id, "updated_at": func.now()},
+    )
+    return await _upsert(db, stmt, stage)
+
+
+async def bulk_upsert_geo_mappings(
+    db: AsyncSession,
+    *,
+    destination: str,
+    country_id: str,
+    items: Iterable[tuple[str, str, str]],  # (geo_city_id, geo_area_id, destination_area_id)
+    actor_id: str,
+) -> int:
+    """
+    Upsert destination area ids for catalog areas (resolved by the caller, see geo_catalog).
+    The last item wins for a repeated area. Returns the number of areas written.
+    """
+    latest: dict[str, tuple[str, str]] = {}
+    for city_id, area_id, d_area_id in items:
+        latest[area_id] = (city_id, d_area_id)
+    if not latest:
+        return 0
+
+    stage = await stage_records(
+        db, ("id", "geo_city_id", "geo_area_id", "destination_area_id"),
+        [(gen_id("dgm"), city_id, area_id, d) for area_id, (city_id, d) in latest.items()],
+    )
+    stmt = insert(DestinationGeoMapping).from_select(
+        ["id", "destination", "geo_country_id", "geo_city_id", "geo_area_id", "destination_area_id", "created_by", "updated_by"],
+        select(
+            stage.c.id,
+            literal(destination, String),
+            literal(country_id, String),
+            stage.c.geo_city_id,
+            stage.c.geo_area_id,
+            stage.c.destination_area_id,
+            literal(actor_id, String),
+            literal(actor_id, String),
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_dest_geo_area",
+        set_={"destination_area_id": stmt.excluded.destination_area_id, "updated_by": actor_id, "updated_at": func.now()},
+    )
+    return await _upsert(db, stmt, stage)
+
+
+async def bulk_upsert_geo_cities(db: AsyncSession, *, country_id: str, items: Iterable[tuple[str, str]]) -> int:
+    """
+    Upsert (slug, name) cities of one country. Returns the number of distinct slugs written.
+    """
+    latest = dict(items)
+    if not latest:
+        return 0
+
+    stage = await stage_records(db, ("id", "slug", "name"), [(gen_id("gcy"), slug, name) for slug, name in latest.items()])
+    stmt = insert(GeoCity).from_select(
+        ["id", "country_id", "slug", "name"],
+        select(stage.c.id, literal(country_id, String), stage.c.slug, stage.c.name),
+    )
+    stmt = stmt.on_conflict_do_update(constraint="uq_geo_city_slug", set_={"name": stmt.excluded.name})
+    return await _upsert(db, stmt, stage)
+
+
+async def bulk_upsert_geo_areas(db: AsyncSession, *, city_id: str, items: Iterable[tuple[str, str]]) -> int:
+    """
+    Upsert (slug, name) areas of one city. Returns the number of distinct slugs written.
+    """
+    latest = dict(items)
+    if not latest:
+        return 0
+
+    stage = await stage_records(db, ("id", "slug", "name"), [(gen_id("gar"), slug, name) for slug, name in latest.items()])
+    stmt = insert(GeoArea).from_select(
+        ["id", "city_id", "slug", "name"],
+        select(stage.c.id, literal(city_id, String), stage.c.slug, stage.c.name),
+    )
+    stmt = stmt.on_conflict_do_update(constraint="uq_geo_area_slug", set_={"name": stmt.excluded.name})
+    return await _upsert(db, stmt, stage)
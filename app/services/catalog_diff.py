@@ -0,0 +1,184 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from sqlalchemy import String, and_, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.core.ids import gen_id
+from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.services.catalog_bulk import drop_stage, stage_records
+
+# Changed rows kept on the diff (and so in the audit log); the counts are always complete
+DIFF_SAMPLE_LIMIT = 200
+
+
+@dataclass
+class CatalogDiff:
+    """
+    What a catalog set changes in the runtime mapping tables, per kind.
+    """
+    enum_insert: int = 0
+    enum_update: int = 0
+    enum_unchanged: int = 0
+    geo_insert: int = 0
+    geo_update: int = 0
+    geo_unchanged: int = 0
+    geo_unresolved: int = 0
+    changes: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def changed(self) -> int:
+        return self.enum_insert + self.enum_update + self.geo_insert + self.geo_update
+
+    def _record(self, kind: str, key: str, old: str | None, new: str) -> None:
+        if len(self.changes) < DIFF_SAMPLE_LIMIT:
+            self.changes.append({"kind": kind, "key": key, "old": old, "new": new})
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "enum": {"insert": self.enum_insert, "update": self.enum_update, "unchanged": self.enum_unchanged},
+            "geo": {
+                "insert": self.geo_insert,
+                "update": self.geo_update,
+                "unchanged": self.geo_unchanged,
+                "unresolved": self.geo_unresolved,
+            },
+            "changes": self.changes,
+            "changes_truncated": self.changed > len(self.changes),
+        }
+
+
+async def _enum_delta(db: AsyncSession, diff: CatalogDiff, *, destination: str, items: Iterable[tuple[str, str, str]], actor_id: str | None) -> None:
+    latest: dict[tuple[str, str], str] = {}
+    for ns, key, value in items:
+        latest[(ns, key)] = value
+    if not latest:
+        return
+
+    stage = await stage_records(
+        db, ("id", "namespace", "source_key", "destination_value"),
+        [(gen_id("dem"), ns, key, value) for (ns, key), value in latest.items()],
+    )
+    m = DestinationEnumMapping
+    joined = stage.outerjoin(m, and_(
+        m.destination == destination,
+        m.namespace == stage.c.namespace,
+        m.source_key == stage.c.source_key,
+    ))
+    differs = m.destination_value.is_distinct_from(stage.c.destination_value)
+
+    changed = (await db.execute(
+        select(stage.c.namespace, stage.c.source_key, stage.c.destination_value, m.destination_value)
+        .select_from(joined).where(differs)
+        .order_by(stage.c.namespace, stage.c.source_key)
+    )).all()
+    for ns, key, new, old in changed:
+        if old is None:
+            diff.enum_insert += 1
+        else:
+            diff.enum_update += 1
+        diff._record("enum", f"{ns}:{key}", old, new)
+    diff.enum_unchanged += len(latest) - len(changed)
+
+    if actor_id is not None and changed:
+        stmt = insert(m).from_select(
+            ["id", "destination", "namespace", "source_key", "destination_value", "created_by", "updated_by"],
+            select(
+                stage.c.id,
+                literal(destination, String),
+                stage.c.namespace,
+                stage.c.source_key,
+                stage.c.destination_value,
+                literal(actor_id, String),
+                literal(actor_id, String),
+            ).select_from(joined).where(differs),
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_dest_enum_map",
+            set_={"destination_value": stmt.excluded.destination_value, "updated_by": actor_id, "updated_at": func.now()},
+        )
+        await db.execute(stmt)
+    await drop_stage(db, stage)
+
+
+async def _geo_delta(
+    db: AsyncSession,
+    diff: CatalogDiff,
+    *,
+    destination: str,
+    country_id: str,
+    items: Iterable[tuple[str, str, str, str]],
+    actor_id: str | None,
+) -> None:
+    latest: dict[str, tuple[str, str, str]] = {}
+    for key, city_id, area_id, d_area_id in items:
+        latest[area_id] = (key, city_id, d_area_id)
+    if not latest:
+        return
+
+    stage = await stage_records(
+        db, ("id", "geo_key", "geo_city_id", "geo_area_id", "destination_area_id"),
+        [(gen_id("dgm"), key, city_id, area_id, d) for area_id, (key, city_id, d) in latest.items()],
+    )
+    m = DestinationGeoMapping
+    joined = stage.outerjoin(m, and_(m.destination == destination, m.geo_area_id == stage.c.geo_area_id))
+    differs = m.destination_area_id.is_distinct_from(stage.c.destination_area_id)
+
+    changed = (await db.execute(
+        select(stage.c.geo_key, stage.c.destination_area_id, m.id, m.destination_area_id)
+        .select_from(joined).where(differs)
+        .order_by(stage.c.geo_key)
+    )).all()
+    for key, new, existing_id, old in changed:
+        if existing_id is None:
+            diff.geo_insert += 1
+        else:
+            diff.geo_update += 1
+        diff._record("geo", key, old, new)
+    diff.geo_unchanged += len(latest) - len(changed)
+
+    if actor_id is not None and changed:
+        stmt = insert(m).from_select(
+            ["id", "destination", "geo_country_id", "geo_city_id", "geo_area_id", "destination_area_id", "created_by", "updated_by"],
+            select(
+                stage.c.id,
+                literal(destination, String),
+                literal(country_id, String),
+                stage.c.geo_city_id,
+                stage.c.geo_area_id,
+                stage.c.destination_area_id,
+                literal(actor_id, String),
+                literal(actor_id, String),
+            ).select_from(joined).where(differs),
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_dest_geo_area",
+            set_={"destination_area_id": stmt.excluded.destination_area_id, "updated_by": actor_id, "updated_at": func.now()},
+        )
+        await db.execute(stmt)
+    await drop_stage(db, stage)
+
+
+async def diff_catalog_items(
+    db: AsyncSession,
+    *,
+    destination: str,
+    enum_items: Iterable[tuple[str, str, str]],  # (namespace, source_key, destination_value)
+    geo_items: Iterable[tuple[str, str, str, str]] = (),  # (geo_key, geo_city_id, geo_area_id, destination_area_id)
+    country_id: str | None = None,
+    apply_as: str | None = None,
+) -> CatalogDiff:
+    """
+    Classify catalog items against the runtime mapping tables as insert/update/unchanged, one
+    joined query per kind. With apply_as (the actor id), also write the changed rows, one
+    INSERT ... SELECT per kind; unchanged rows are not touched.
+    """
+    diff = CatalogDiff()
+    await _enum_delta(db, diff, destination=destination, items=enum_items, actor_id=apply_as)
+    if country_id:
+        await _geo_delta(db, diff, destination=destination, country_id=country_id, items=geo_items, actor_id=apply_as)
+    return diff
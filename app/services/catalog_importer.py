@@ -1,21 +1,39 @@
 from __future__ import annotations
 from typing import Iterable
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
 
+from app.core.ids import gen_id
+from app.services.catalog_bulk import bulk_upsert_enum_mappings, bulk_upsert_geo_mappings
 from app.models.destination_catalog_import_run import DestinationCatalogImportRun
 from app.models.destination_catalog_import_item import DestinationCatalogImportItem
 from app.models.destination_enum_mapping import DestinationEnumMapping
 from app.models.destination_geo_mapping import DestinationGeoMapping
 from app.models.geo_country import GeoCountry
-from app.models.geo_city import GeoCity
-from app.models.geo_area import GeoArea
+from app.services.geo_catalog import load_geo_catalog
+from app.services.geo_resolver import geo_pair
 
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
+# multi-row VALUES per statement, well under the 32767 bind parameters a statement may carry
+ITEM_INSERT_BATCH = 1000
+
+
+def _item(run_id: str, key: str, value: str | None, existing_value: str | None, action: str, detail: dict) -> dict:
+    return {
+        "id": gen_id("dci"),
+        "run_id": run_id,
+        "key": key,
+        "value": value,
+        "existing_value": existing_value,
+        "action": action,
+        "detail": detail,
+    }
+
+
+async def _insert_items(db: AsyncSession, rows: list[dict]) -> None:
+    for i in range(0, len(rows), ITEM_INSERT_BATCH):
+        await db.execute(insert(DestinationCatalogImportItem).values(rows[i:i + ITEM_INSERT_BATCH]))
 
 
 async def preview_enum_import(
@@ -54,20 +72,14 @@ async def preview_enum_import(
     existing = {k: v for (k, v) in existing_rows}
 
     to_insert = to_update = noop = invalid = 0
+    item_rows: list[dict] = []
 
     for skey, dval in items:
         skey_n = str(skey).strip()
         dval_n = str(dval).strip()
         if not skey_n or not dval_n:
             invalid += 1
-            db.add(DestinationCatalogImportItem(
-                run_id=run.id,
-                key=skey_n or "<empty>",
-                value=dval_n or None,
-                existing_value=None,
-                action="invalid",
-                detail={"reason": "empty key/value"},
-            ))
+            item_rows.append(_item(run.id, skey_n or "<empty>", dval_n or None, None, "invalid", {"reason": "empty key/value"}))
             continue
 
         ex = existing.get(skey_n)
@@ -81,15 +93,9 @@ async def preview_enum_import(
             noop += 1
             action = "noop"
 
-        db.add(DestinationCatalogImportItem(
-            run_id=run.id,
-            key=skey_n,
-            value=dval_n,
-            existing_value=ex,
-            action=action,
-            detail={},
-        ))
+        item_rows.append(_item(run.id, skey_n, dval_n, ex, action, {}))
 
+    await _insert_items(db, item_rows)
     run.summary = {"to_insert": to_insert, "to_update": to_update, "unchanged": noop, "invalid": invalid}
     await db.flush()
     return run
@@ -106,31 +112,15 @@ async def apply_enum_import(
     ns = run.namespace or ""
 
     rows = (await db.execute(
-        select(DestinationCatalogImportItem).where(
+        select(DestinationCatalogImportItem.key, DestinationCatalogImportItem.value).where(
             DestinationCatalogImportItem.run_id == run.id,
             DestinationCatalogImportItem.action.in_(["insert", "update"]),
         )
-    )).scalars().all()
-
-    count = 0
-    for it in rows:
-        stmt = (
-            insert(DestinationEnumMapping)
-            .values(
-                destination=dest,
-                namespace=ns,
-                source_key=it.key,
-                destination_value=it.value,
-                created_by=actor_id,
-                updated_by=actor_id,
-            )
-            .on_conflict_do_update(
-                constraint="uq_dest_enum_map",
-                set_={"destination_value": it.value, "updated_by": actor_id},
-            )
-        )
-        await db.execute(stmt)
-        count += 1
+    )).all()
+
+    count = await bulk_upsert_enum_mappings(
+        db, destination=dest, items=[(ns, key, value) for key, value in rows], actor_id=actor_id,
+    )
 
     run.status = "applied"
     run.updated_by = actor_id
@@ -164,21 +154,18 @@ async def preview_geo_import(
     db.add(run)
     await db.flush()
 
-    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == cc))).scalar_one_or_none()
+    catalog = await load_geo_catalog(db, country_code=cc)
 
     # If country missing, all items invalid (still record run/items for visibility)
-    if not country:
-        invalid = len(items)
-        for city_slug, area_slug, d_area_id in items:
-            db.add(DestinationCatalogImportItem(
-                run_id=run.id,
-                key=f"{_slug(city_slug)}:{_slug(area_slug)}",
-                value=str(d_area_id).strip(),
-                existing_value=None,
-                action="invalid",
-                detail={"reason": f"country {cc} not found"},
-            ))
-        run.summary = {"to_insert": 0, "to_update": 0, "unchanged": 0, "invalid": invalid}
+    if not catalog:
+        await _insert_items(db, [
+            _item(
+                run.id, "%s:%s" % geo_pair(cc, city_slug, area_slug), str(d_area_id).strip(), None,
+                "invalid", {"reason": f"country {cc} not found"},
+            )
+            for city_slug, area_slug, d_area_id in items
+        ])
+        run.summary = {"to_insert": 0, "to_update": 0, "unchanged": 0, "invalid": len(items)}
         await db.flush()
         return run
 
@@ -186,62 +173,37 @@ async def preview_geo_import(
     existing_rows = (await db.execute(
         select(DestinationGeoMapping.geo_area_id, DestinationGeoMapping.destination_area_id).where(
             DestinationGeoMapping.destination == dest,
-            DestinationGeoMapping.geo_country_id == country.id,
+            DestinationGeoMapping.geo_country_id == catalog.country_id,
         )
     )).all()
     existing_by_area_id = {gid: did for (gid, did) in existing_rows}
 
     to_insert = to_update = noop = invalid = 0
+    item_rows: list[dict] = []
 
     for city_slug, area_slug, d_area_id in items:
-        cslug = _slug(city_slug)
-        aslug = _slug(area_slug)
+        cslug, aslug = geo_pair(cc, city_slug, area_slug)
         d_area = str(d_area_id).strip()
         key = f"{cslug}:{aslug}"
 
         if not cslug or not aslug or not d_area:
             invalid += 1
-            db.add(DestinationCatalogImportItem(
-                run_id=run.id,
-                key=key or "<empty>",
-                value=d_area or None,
-                existing_value=None,
-                action="invalid",
-                detail={"reason": "empty city/area/id"},
-            ))
+            item_rows.append(_item(run.id, key or "<empty>", d_area or None, None, "invalid", {"reason": "empty city/area/id"}))
             continue
 
-        city = (await db.execute(select(GeoCity).where(
-            GeoCity.country_id == country.id, GeoCity.slug == cslug
-        ))).scalar_one_or_none()
-        if not city:
+        if not catalog.has_city(cslug):
             invalid += 1
-            db.add(DestinationCatalogImportItem(
-                run_id=run.id,
-                key=key,
-                value=d_area,
-                existing_value=None,
-                action="invalid",
-                detail={"reason": f"GeoCity slug not found: {cslug}"},
-            ))
+            item_rows.append(_item(run.id, key, d_area, None, "invalid", {"reason": f"GeoCity slug not found: {cslug}"}))
             continue
 
-        area = (await db.execute(select(GeoArea).where(
-            GeoArea.city_id == city.id, GeoArea.slug == aslug
-        ))).scalar_one_or_none()
-        if not area:
+        ids = catalog.resolve(cslug, aslug)
+        if ids is None:
             invalid += 1
-            db.add(DestinationCatalogImportItem(
-                run_id=run.id,
-                key=key,
-                value=d_area,
-                existing_value=None,
-                action="invalid",
-                detail={"reason": f"GeoArea slug not found: {aslug}"},
-            ))
+            item_rows.append(_item(run.id, key, d_area, None, "invalid", {"reason": f"GeoArea slug not found: {aslug}"}))
             continue
+        city_id, area_id = ids
 
-        ex = existing_by_area_id.get(area.id)
+        ex = existing_by_area_id.get(area_id)
         if ex is None:
             to_insert += 1
             action = "insert"
@@ -252,15 +214,12 @@ async def preview_geo_import(
             noop += 1
             action = "noop"
 
-        db.add(DestinationCatalogImportItem(
-            run_id=run.id,
-            key=key,
-            value=d_area,
-            existing_value=ex,
-            action=action,
-            detail={"geo_area_id": area.id, "geo_city_id": city.id, "geo_country_id": country.id},
+        item_rows.append(_item(
+            run.id, key, d_area, ex, action,
+            {"geo_area_id": area_id, "geo_city_id": city_id, "geo_country_id": catalog.country_id},
         ))
 
+    await _insert_items(db, item_rows)
     run.summary = {"to_insert": to_insert, "to_update": to_update, "unchanged": noop, "invalid": invalid}
     await db.flush()
     return run
@@ -279,38 +238,19 @@ async def apply_geo_import(
     country = (await db.execute(select(GeoCountry).where(GeoCountry.code == cc))).scalar_one()
 
     rows = (await db.execute(
-        select(DestinationCatalogImportItem).where(
+        select(DestinationCatalogImportItem.value, DestinationCatalogImportItem.detail).where(
             DestinationCatalogImportItem.run_id == run.id,
             DestinationCatalogImportItem.action.in_(["insert", "update"]),
         )
-    )).scalars().all()
-
-    count = 0
-    for it in rows:
-        # geo ids were stored in detail during preview
-        geo_area_id = (it.detail or {}).get("geo_area_id")
-        geo_city_id = (it.detail or {}).get("geo_city_id")
-        if not geo_area_id or not geo_city_id:
-            continue
+    )).all()
 
-        stmt = (
-            insert(DestinationGeoMapping)
-            .values(
-                destination=dest,
-                geo_country_id=country.id,
-                geo_city_id=geo_city_id,
-                geo_area_id=geo_area_id,
-                destination_area_id=it.value,
-                created_by=actor_id,
-                updated_by=actor_id,
-            )
-            .on_conflict_do_update(
-                constraint="uq_dest_geo_area",
-                set_={"destination_area_id": it.value, "updated_by": actor_id},
-            )
-        )
-        await db.execute(stmt)
-        count += 1
+    # geo ids were stored in detail during preview
+    items = [
+        (detail["geo_city_id"], detail["geo_area_id"], value)
+        for value, detail in rows
+        if (detail or {}).get("geo_city_id") and (detail or {}).get("geo_area_id")
+    ]
+    count = await bulk_upsert_geo_mappings(db, destination=dest, country_id=country.id, items=items, actor_id=actor_id)
 
     run.status = "applied"
     run.updated_by = actor_id
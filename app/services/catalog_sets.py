@@ -1,135 +1,134 @@
 from __future__ import annotations
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql import func
 
 from app.models.destination_catalog_set import DestinationCatalogSet
 from app.models.destination_catalog_set_item import DestinationCatalogSetItem
 from app.models.destination_catalog_set_active import DestinationCatalogSetActive
 
-from app.models.destination_enum_mapping import DestinationEnumMapping
-from app.models.destination_geo_mapping import DestinationGeoMapping
-from app.models.geo_country import GeoCountry
-from app.models.geo_city import GeoCity
-from app.models.geo_area import GeoArea
+from app.services.catalog_diff import CatalogDiff, diff_catalog_items
+from app.services.geo_catalog import GeoCatalogSnapshot, load_geo_catalog
 
 
 
-def _slug(s: str) -> str:
-    return (s or "").strip().lower().replace(" ", "-")
-
-
 def _cc_key(country_code: str | None) -> str:
     # DB key convention: global scope => ""
     return (country_code or "").upper().strip()
 
 
-async def activate_catalog_set(
+async def _set_items(
     db: AsyncSession,
-    *,
-    catalog_set_id: str,
-    actor_id: str,
-) -> DestinationCatalogSet:
-    cs = (await db.execute(select(DestinationCatalogSet).where(DestinationCatalogSet.id == catalog_set_id))).scalar_one()
-
-    if cs.status not in ("pending", "draft"):
-        raise ValueError("Catalog set must be pending/draft to activate")
-
-    dest = cs.destination.lower().strip()
+    cs: DestinationCatalogSet,
+) -> tuple[list[tuple[str, str, str]], list[tuple[str, str, str, str]], int, GeoCatalogSnapshot | None]:
+    """
+    A set's normalized enum items and its geo items resolved against the country's catalog
+    (two queries). Returns (enum_items, geo_items, unresolved geo items, catalog).
+    """
     cc = _cc_key(cs.country_code)
 
-    # prefetch country for geo items
-    country = None
+    # prefetch the country's catalog for geo items
+    catalog = None
     if cc:
-        country = (await db.execute(
-            select(GeoCountry).where(GeoCountry.code == cc)
-        )).scalar_one()
+        catalog = await load_geo_catalog(db, country_code=cc)
+        if catalog is None:
+            raise ValueError(f"GeoCountry {cc} not found")
 
-    # apply all items into runtime lookup tables
     items = (await db.execute(
-        select(DestinationCatalogSetItem).where(DestinationCatalogSetItem.catalog_set_id == catalog_set_id)
-    )).scalars().all()
-
-
-    for it in items:
-        if it.kind == "enum":
-            ns = (it.namespace or "").lower().strip()
-            skey = (it.source_key or "").strip()
-            dval = (it.destination_value or "").strip()
-
-            if not ns or not skey or not dval:
+        select(
+            DestinationCatalogSetItem.kind,
+            DestinationCatalogSetItem.namespace,
+            DestinationCatalogSetItem.source_key,
+            DestinationCatalogSetItem.destination_value,
+            DestinationCatalogSetItem.geo_key,
+            DestinationCatalogSetItem.destination_area_id,
+        )
+        .where(DestinationCatalogSetItem.catalog_set_id == cs.id)
+        .order_by(DestinationCatalogSetItem.created_at, DestinationCatalogSetItem.id)
+    )).all()
+
+    enum_items: list[tuple[str, str, str]] = []
+    geo_items: list[tuple[str, str, str, str]] = []
+    unresolved = 0
+    for kind, namespace, source_key, destination_value, geo_key, destination_area_id in items:
+        if kind == "enum":
+            ns = (namespace or "").lower().strip()
+            skey = (source_key or "").strip()
+            dval = (destination_value or "").strip()
+            if ns and skey and dval:
+                enum_items.append((ns, skey, dval))
+
+        elif kind == "geo" and catalog:
+            geo_key = (geo_key or "").strip()
+            d_area_id = (destination_area_id or "").strip()
+            if not geo_key or not d_area_id or ":" not in geo_key:
                 continue
+            ids = catalog.resolve(*geo_key.split(":", 1))
+            if ids:
+                geo_items.append((geo_key, *ids, d_area_id))
+            else:
+                unresolved += 1
 
-            stmt = (
-                insert(DestinationEnumMapping)
-                .values(
-                    destination=dest,
-                    namespace=ns,
-                    source_key=skey,
-                    destination_value=dval,
-                    created_by=actor_id,
-                    updated_by=actor_id,
-                )
-                .on_conflict_do_update(
-                    constraint="uq_dest_enum_map",
-                    set_={"destination_value": dval, "updated_by": actor_id},
-                )
-            )
-            await db.execute(stmt)
+    return enum_items, geo_items, unresolved, catalog
 
-        elif it.kind == "geo":
-            if not country:
-                continue
-            
-            geo_key = (it.geo_key or "").strip()
-            d_area_id = (it.destination_area_id or "").strip()
-            if not geo_key or not d_area_id or ":" not in geo_key:
-                continue
 
-            city_slug, area_slug = geo_key.split(":", 1)
+async def diff_catalog_set(db: AsyncSession, *, catalog_set_id: str) -> CatalogDiff:
+    """
+    What activating the set would change right now (nothing is written).
+    """
+    cs = (await db.execute(select(DestinationCatalogSet).where(DestinationCatalogSet.id == catalog_set_id))).scalar_one()
+    enum_items, geo_items, unresolved, catalog = await _set_items(db, cs)
+    diff = await diff_catalog_items(
+        db,
+        destination=cs.destination.lower().strip(),
+        enum_items=enum_items,
+        geo_items=geo_items,
+        country_id=catalog.country_id if catalog else None,
+    )
+    diff.geo_unresolved = unresolved
+    return diff
 
-            city_slug = _slug(city_slug)
-            area_slug = _slug(area_slug)
 
-            city = (await db.execute(select(GeoCity).where(
-                GeoCity.country_id == country.id,
-                GeoCity.slug == city_slug
-            ))).scalar_one_or_none()
-            if not city:
-                continue
+async def activate_catalog_set(
+    db: AsyncSession,
+    *,
+    catalog_set_id: str,
+    actor_id: str,
+    rollback: bool = False,
+) -> tuple[DestinationCatalogSet, CatalogDiff]:
+    """
+    Apply the set to the runtime lookup tables and point the destination/country at it.
+    Only rows that differ are written; returns the set and the diff that was applied.
+    Rollbacks re-activate a previously active (now archived) set.
+    """
+    cs = (await db.execute(
+        select(DestinationCatalogSet).where(DestinationCatalogSet.id == catalog_set_id).with_for_update()
+    )).scalar_one()
+
+    allowed = ("active", "archived") if rollback else ("pending", "draft")
+    if cs.status not in allowed:
+        raise ValueError(f"Catalog set must be {'/'.join(allowed)} to {'roll back to' if rollback else 'activate'}")
 
-            area = (await db.execute(select(GeoArea).where(
-                GeoArea.city_id == city.id,
-                GeoArea.slug == area_slug
-            ))).scalar_one_or_none()
-            if not area:
-                continue
+    dest = cs.destination.lower().strip()
+    cc = _cc_key(cs.country_code)
 
-            stmt = (
-                insert(DestinationGeoMapping)
-                .values(
-                    destination=dest,
-                    geo_country_id=country.id,
-                    geo_city_id=city.id,
-                    geo_area_id=area.id,
-                    destination_area_id=d_area_id,
-                    created_by=actor_id,
-                    updated_by=actor_id,
-                )
-                .on_conflict_do_update(
-                    constraint="uq_dest_geo_area",
-                    set_={"destination_area_id": d_area_id, "updated_by": actor_id},
-                )
-            )
-            await db.execute(stmt)
+    enum_items, geo_items, unresolved, catalog = await _set_items(db, cs)
+    diff = await diff_catalog_items(
+        db,
+        destination=dest,
+        enum_items=enum_items,
+        geo_items=geo_items,
+        country_id=catalog.country_id if catalog else None,
+        apply_as=actor_id,
+    )
+    diff.geo_unresolved = unresolved
 
     # set active pointer
-    ptr = (await db.execute
-           (select(DestinationCatalogSetActive).where(
-        DestinationCatalogSetActive.destination == dest,
-        DestinationCatalogSetActive.country_code == cc,
-    )
+    ptr = (await db.execute(
+        select(DestinationCatalogSetActive).where(
+            DestinationCatalogSetActive.destination == dest,
+            DestinationCatalogSetActive.country_code == cc,
+        ).with_for_update()
     )).scalar_one_or_none()
 
     if not ptr:
@@ -140,6 +139,12 @@ async def activate_catalog_set(
         )
         db.add(ptr)
     else:
+        if ptr.active_catalog_set_id != cs.id:
+            await db.execute(
+                update(DestinationCatalogSet)
+                .where(DestinationCatalogSet.id == ptr.active_catalog_set_id)
+                .values(status="archived", updated_by=actor_id)
+            )
         ptr.active_catalog_set_id = cs.id
 
     cs.status = "active"
@@ -148,7 +153,7 @@ async def activate_catalog_set(
     cs.updated_by = actor_id
 
     await db.flush()
-    return cs
+    return cs, diff
 
 
 async def submit_catalog_set(db: AsyncSession, *, catalog_set_id: str, actor_id: str) -> DestinationCatalogSet:
@@ -178,16 +183,16 @@ async def rollback_active_catalog_set(
     country_code: str | None,
     to_catalog_set_id: str,
     actor_id: str,
-) -> DestinationCatalogSet:
+) -> tuple[DestinationCatalogSet, CatalogDiff]:
     dest = destination.lower().strip()
-    cc = (country_code.upper().strip() if country_code else None)
 
     target = (await db.execute(select(DestinationCatalogSet).where(DestinationCatalogSet.id == to_catalog_set_id))).scalar_one()
     
     if target.destination.lower().strip() != dest:
         raise ValueError("Catalog set destination mismatch")
 
-    if _cc_key(target.country_code) != cc:
+    if _cc_key(target.country_code) != _cc_key(country_code):
         raise ValueError("Catalog set country_code mismatch")
 
-    return await activate_catalog_set(db, catalog_set_id=to_catalog_set_id, actor_id=actor_id)
\ No newline at end of file
+    # only what differs from the current tables is rewritten
+    return await activate_catalog_set(db, catalog_set_id=to_catalog_set_id, actor_id=actor_id, rollback=True)
@@ -1,9 +1,9 @@
 from __future__ import annotations
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Iterable
 
-from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.services.geo_resolver import GeoResolver
+from app.services.mapping_cache import get_destination_mappings
 
 async def resolve_dest_enum(
     db: AsyncSession,
@@ -12,29 +12,16 @@ async def resolve_dest_enum(
     namespace: str,
     source_key: str,
 ) -> str | None:
-    row = (await db.execute(select(DestinationEnumMapping.destination_value).where(
-        DestinationEnumMapping.destination == destination,
-        DestinationEnumMapping.namespace == namespace,
-        DestinationEnumMapping.source_key == source_key,
-    ))).scalar_one_or_none()
-    return row
+    return (await get_destination_mappings(db, destination)).enum(namespace, source_key)
 
-# bulk load (1 query per namespace, or 1 query for many namespaces)
+# bulk lookups, served from the process-wide mapping cache (one load per catalog version)
 async def load_dest_enum_map(
     db: AsyncSession,
     *,
     destination: str,
     namespace: str,
 ) -> dict[str, str]:
-    rows = (
-        await db.execute(
-            select(DestinationEnumMapping.source_key, DestinationEnumMapping.destination_value).where(
-                DestinationEnumMapping.destination == destination,
-                DestinationEnumMapping.namespace == namespace,
-            )
-        )
-    ).all()
-    return {sk: dv for (sk, dv) in rows if sk is not None and dv is not None}
+    return dict((await get_destination_mappings(db, destination)).enums.get(namespace, {}))
 
 
 async def load_dest_enum_maps(
@@ -47,24 +34,27 @@ async def load_dest_enum_maps(
     if not ns_list:
         return {}
 
-    rows = (
-        await db.execute(
-            select(
-                DestinationEnumMapping.namespace,
-                DestinationEnumMapping.source_key,
-                DestinationEnumMapping.destination_value,
-            ).where(
-                DestinationEnumMapping.destination == destination,
-                DestinationEnumMapping.namespace.in_(ns_list),
-            )
-        )
-    ).all()
+    mappings = await get_destination_mappings(db, destination)
+    return {ns: dict(mappings.enums.get(ns, {})) for ns in ns_list}
 
-    out: dict[str, dict[str, str]] = {ns: {} for ns in ns_list}
-    for ns, sk, dv in rows:
-        if ns and sk and dv is not None:
-            out.setdefault(ns, {})[sk] = dv
-    return out
+
+async def load_dest_area_index(
+    db: AsyncSession,
+    *,
+    destination: str,
+    country_code: str,
+) -> dict[tuple[str, str], str]:
+    """
+    Flattened (city_slug, area_slug) -> destination_area_id for one country.
+    """
+    return (await get_destination_mappings(db, destination)).area_index(country_code)
+
+
+async def load_geo_resolver(db: AsyncSession, *, destination: str) -> GeoResolver:
+    """
+    The destination's area ids keyed by normalized (country, city, area); see geo_resolver.
+    """
+    return (await get_destination_mappings(db, destination)).geo
 
 
 # ---- New: pure resolution helpers (no DB calls) ----
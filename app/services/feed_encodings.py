@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Iterable, Protocol
+
+from app.core.config import settings
+from app.services.gzip_util import gzip_compressobj
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+# Content-Encoding token -> object suffix
+ENCODING_EXTS: dict[str, str] = {"gzip": "gz", "br": "br", "zstd": "zst"}
+
+# Server preference when the client weighs several codings equally (smallest first)
+PREFERENCE: tuple[str, ...] = ("br", "zstd", "gzip")
+
+IDENTITY = "identity"
+
+# Content-Encoding token -> FeedSnapshot "<column>_storage_uri" / "<column>_size_bytes"
+SNAPSHOT_COLUMNS: dict[str, str] = {"gzip": "gzip", "br": "brotli", "zstd": "zstd"}
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def flush(self) -> bytes:
+        ...
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality, mode=brotli.MODE_TEXT)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.finish()
+
+
+def is_supported(encoding: str) -> bool:
+    if encoding == "br":
+        return brotli is not None
+    if encoding == "zstd":
+        return zstandard is not None
+    return encoding == "gzip"
+
+
+def configured_encodings() -> tuple[str, ...]:
+    """
+    Encodings from settings.feed_encodings this process can produce, in preference order.
+    """
+    wanted = {e.strip().lower() for e in (settings.feed_encodings or "").split(",") if e.strip()}
+    unknown = wanted - set(ENCODING_EXTS)
+    if unknown:
+        raise ValueError(f"Unknown feed encoding(s): {','.join(sorted(unknown))}")
+    return tuple(e for e in PREFERENCE if e in wanted and is_supported(e))
+
+
+def new_compressor(encoding: str) -> StreamCompressor:
+    """
+    Streaming compressor with deterministic output: identical input gives identical bytes,
+    so the content-addressed variants dedupe.
+    """
+    if encoding == "gzip":
+        return gzip_compressobj(compresslevel=settings.feed_gzip_level)
+    if encoding == "br" and brotli is not None:
+        return _BrotliCompressor(settings.feed_brotli_quality)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=settings.feed_zstd_level).compressobj()
+    raise ValueError(f"Unsupported feed encoding: {encoding}")
+
+
+def snapshot_variants(snap) -> dict[str, tuple[str, int | None]]:
+    """
+    {encoding: (storage_uri, size_bytes)} of the precompressed variants a FeedSnapshot has.
+    """
+    out: dict[str, tuple[str, int | None]] = {}
+    for encoding, column in SNAPSHOT_COLUMNS.items():
+        uri = getattr(snap, f"{column}_storage_uri", None)
+        if uri:
+            out[encoding] = (uri, getattr(snap, f"{column}_size_bytes", None))
+    return out
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    {coding: q} from an Accept-Encoding header; malformed entries are ignored.
+    """
+    out: dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        if coding == "x-gzip":
+            coding = "gzip"
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = -1.0
+        if 0.0 <= q <= 1.0:
+            out[coding] = max(q, out.get(coding, 0.0))
+    return out
+
+
+def negotiate_encoding(accept_encoding: str | None, available: Iterable[str]) -> str | None:
+    """
+    Pick the content coding to serve (RFC 9110 §12.5.3): highest q among `available`
+    variants plus identity, ties broken by PREFERENCE, identity last.
+
+    Returns IDENTITY for the plain object and None when nothing acceptable exists (406).
+    """
+    if accept_encoding is None:
+        return IDENTITY
+    qs = parse_accept_encoding(accept_encoding)
+    star = qs.get("*")
+
+    def q_of(coding: str) -> float:
+        if coding in qs:
+            return qs[coding]
+        if star is not None:
+            return star
+        # identity is acceptable unless explicitly refused, but loses to any listed coding
+        return 0.001 if coding == IDENTITY else 0.0
+
+    avail = set(available)
+    candidates = [e for e in PREFERENCE if e in avail] + [IDENTITY]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = q_of(coding)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
@@ -22,3 +22,10 @@ def hash_fingerprint(*, destination: str, config_hash: str, input_hash: str) ->
         "config_hash": config_hash,
         "input_hash": input_hash,
     }))
+
+def hash_feed_item(data: bytes) -> str:
+    # per-listing hash of a serialized ad (delta feeds); 64 bits is plenty per listing id
+    return sha256_hex(data)[:16]
+
+def encode_item_hashes(item_hashes: dict[str, str]) -> bytes:
+    return _stable_json_bytes(item_hashes)
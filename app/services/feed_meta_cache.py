@@ -0,0 +1,130 @@
+from __future__ import annotations
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+
+log = logging.getLogger(__name__)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _version_key(partner_id: str, destination: str) -> str:
+    return f"feedmeta:v:{partner_id}:{destination}"
+
+
+@dataclass(frozen=True)
+class FeedArtifactMeta:
+    """
+    A stored artifact of the current snapshot besides the feed itself: a "changes since
+    <base snapshot>" delta, or one part of a sharded feed.
+    """
+    content_hash: str
+    storage_uri: str
+    size_bytes: int | None = None
+    variants: dict[str, tuple[str, int | None]] = field(default_factory=dict)
+    listing_count: int | None = None
+
+
+@dataclass(frozen=True)
+class FeedMeta:
+    """
+    Everything the public feed endpoint needs to answer for one partner+destination.
+    Snapshot fields are None while no snapshot exists yet.
+    """
+    token_hash: str
+    format: str | None = None
+    content_hash: str | None = None
+    last_modified: str | None = None  # HTTP date
+    storage_uri: str | None = None
+    size_bytes: int | None = None
+    variants: dict[str, tuple[str, int | None]] = field(default_factory=dict)  # encoding -> (uri, size)
+    listing_count: int | None = None
+    snapshot_id: str | None = None
+    deltas: dict[str, FeedArtifactMeta] = field(default_factory=dict)  # base snapshot id -> delta
+    parts: tuple[FeedArtifactMeta, ...] = ()  # sharded feeds, by part number
+
+    def token_matches(self, token: str) -> bool:
+        return hmac.compare_digest(self.token_hash, token_hash(token))
+
+
+class FeedMetaCache:
+    """
+    In-process cache of FeedMeta, kept coherent across processes through a Redis version key
+    per partner+destination: writers bump it (invalidate) after committing a new snapshot or
+    a token/setting change; readers reuse a local entry only while its version still matches.
+    """
+
+    def __init__(self, redis_url: str, *, ttl_seconds: int, max_entries: int):
+        self.r = redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (partner_id, destination) -> (version, loaded_at, meta)
+        self._entries: OrderedDict[tuple[str, str], tuple[str | None, float, FeedMeta]] = OrderedDict()
+
+    async def get(self, partner_id: str, destination: str, load: Callable[[], Awaitable[FeedMeta]]) -> FeedMeta:
+        """
+        Cached FeedMeta, or `load()` when missing/stale. Exceptions from load() are not cached.
+        """
+        key = (partner_id, destination)
+        try:
+            # read the version before loading: a bump racing the load then just forces a reload
+            version = await self.r.get(_version_key(partner_id, destination))
+        except RedisError:
+            log.warning("feed_meta_cache: redis unavailable, bypassing cache", exc_info=True)
+            return await load()
+
+        now = time.monotonic()
+        hit = self._entries.get(key)
+        if hit is not None and hit[0] == version and now - hit[1] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            return hit[2]
+
+        meta = await load()
+        self._entries[key] = (version, now, meta)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return meta
+
+    async def invalidate(self, partner_id: str, destinations: Iterable[str]) -> None:
+        """
+        Call after the change is committed. A random version (not INCR) cannot collide with
+        a cached one if the key is ever evicted.
+        """
+        dests = list(destinations)
+        for d in dests:
+            self._entries.pop((partner_id, d), None)
+        try:
+            async with self.r.pipeline(transaction=False) as pipe:
+                for d in dests:
+                    pipe.set(_version_key(partner_id, d), uuid.uuid4().hex)
+                await pipe.execute()
+        except RedisError:
+            # other processes converge within ttl_seconds
+            log.warning("feed_meta_cache: invalidate failed partner=%s destinations=%s", partner_id, ",".join(dests), exc_info=True)
+
+
+@lru_cache(maxsize=1)
+def get_feed_meta_cache() -> FeedMetaCache:
+    """
+    Process-wide cache (one Redis pool).
+    """
+    return FeedMetaCache(
+        settings.redis_url,
+        ttl_seconds=settings.feed_meta_cache_ttl_seconds,
+        max_entries=settings.feed_meta_cache_max_entries,
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.destinations.feeds.base import FeedRetentionPolicy
+from app.destinations.feeds.registry import get_feed_plugin
+from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_latest import FeedSnapshotLatest
+from app.services.feed_meta_cache import get_feed_meta_cache
+from app.services.storage import ObjectStore
+
+
+log = logging.getLogger(__name__)
+
+_URI_COLUMNS = (
+    FeedSnapshot.storage_uri,
+    FeedSnapshot.gzip_storage_uri,
+    FeedSnapshot.brotli_storage_uri,
+    FeedSnapshot.zstd_storage_uri,
+    FeedSnapshot.item_hashes_uri,
+)
+
+
+@dataclass(frozen=True)
+class FeedRetentionResult:
+    snapshots_deleted: int
+    objects_deleted: int
+    objects_kept_recent: int
+
+
+def retention_policy_for(destination: str) -> FeedRetentionPolicy:
+    """
+    The destination plugin's `retention`, else the settings default. Never below keep_last=1.
+    """
+    try:
+        policy = getattr(get_feed_plugin(destination), "retention", None)
+    except KeyError:
+        policy = None
+    if policy is None:
+        policy = FeedRetentionPolicy(
+            keep_last=settings.feed_retention_keep_last,
+            daily_days=settings.feed_retention_daily_days,
+        )
+    return FeedRetentionPolicy(keep_last=max(1, policy.keep_last), daily_days=max(0, policy.daily_days))
+
+
+async def _expired_snapshot_ids(db: AsyncSession, *, destination: str, policy: FeedRetentionPolicy, now: datetime) -> list[str]:
+    feed = (FeedSnapshot.tenant_id, FeedSnapshot.partner_id)
+    newest_first = (FeedSnapshot.created_at.desc(), FeedSnapshot.id.desc())
+    day = func.date_trunc("day", func.timezone("UTC", FeedSnapshot.created_at))
+
+    ranked = (
+        select(
+            FeedSnapshot.id,
+            FeedSnapshot.created_at,
+            func.row_number().over(partition_by=feed, order_by=newest_first).label("rn"),
+            func.row_number().over(partition_by=(*feed, day), order_by=newest_first).label("day_rn"),
+        )
+        .where(FeedSnapshot.destination == destination)
+        .subquery()
+    )
+
+    daily_cutoff = now - timedelta(days=policy.daily_days)
+    return list((await db.execute(
+        select(ranked.c.id).where(
+            ranked.c.rn > policy.keep_last,
+            ~and_(ranked.c.day_rn == 1, ranked.c.created_at >= daily_cutoff),
+            # belt and braces: whatever the pointer says is current is never pruned
+            ranked.c.id.not_in(select(FeedSnapshotLatest.snapshot_id)),
+        )
+    )).scalars().all())
+
+
+async def _still_referenced(db: AsyncSession, *, destination: str, partner_ids: set[str], uris: set[str]) -> set[str]:
+    # objects are keyed per tenant/partner/destination, so only those partners' snapshots can share them
+    q = union(*(
+        select(col.label("uri")).where(
+            FeedSnapshot.partner_id.in_(partner_ids),
+            FeedSnapshot.destination == destination,
+            col.in_(uris),
+        )
+        for col in _URI_COLUMNS
+    ))
+    return set((await db.execute(q)).scalars().all())
+
+
+def _delete_objects(store: ObjectStore, uris: set[str], *, cutoff: float) -> tuple[int, int]:
+    """
+    Delete objects no snapshot references any more. A recently written/reused object may be
+    claimed by a build that has not committed yet: it is left for the storage GC.
+    """
+    deleted = kept_recent = 0
+    for uri in uris:
+        key = store.key_for_uri(uri)
+        if key is None:
+            continue
+        mtime = store.modified_at(key)
+        if mtime is None:
+            continue
+        if mtime > cutoff:
+            kept_recent += 1
+        elif store.delete_key(key):
+            deleted += 1
+    return deleted, kept_recent
+
+
+async def prune_feed_snapshots(
+    db: AsyncSession,
+    *,
+    store: ObjectStore,
+    batch_size: int | None = None,
+    grace_seconds: int | None = None,
+) -> FeedRetentionResult:
+    """
+    Apply each destination's retention policy: delete expired snapshots (their details and
+    deltas/parts rows cascade) `batch_size` rows per transaction, then the stored objects only
+    they referenced. Delta and part objects are left to the storage GC.
+    Commits as it goes.
+    """
+    batch_size = batch_size or settings.feed_retention_batch_size
+    grace = settings.feed_storage_gc_grace_seconds if grace_seconds is None else grace_seconds
+    now = datetime.now(timezone.utc)
+
+    destinations = (await db.execute(select(FeedSnapshotLatest.destination).distinct())).scalars().all()
+
+    snapshots_deleted = objects_deleted = kept_recent = 0
+    for destination in destinations:
+        policy = retention_policy_for(destination)
+        expired = await _expired_snapshot_ids(db, destination=destination, policy=policy, now=now)
+
+        for i in range(0, len(expired), batch_size):
+            batch = expired[i:i + batch_size]
+            freed = (await db.execute(
+                delete(FeedSnapshot).where(FeedSnapshot.id.in_(batch)).returning(FeedSnapshot.partner_id, *_URI_COLUMNS)
+            )).all()
+            await db.commit()
+            snapshots_deleted += len(freed)
+            partner_ids = {row[0] for row in freed}
+            # cached public feed metadata lists deltas against the pruned snapshots
+            for partner_id in partner_ids:
+                await get_feed_meta_cache().invalidate(partner_id, [destination])
+
+            uris = {u for row in freed for u in row[1:] if u}
+            if not uris:
+                continue
+            # content-addressed objects are shared by identical snapshots: only unreferenced ones go
+            orphaned = uris - await _still_referenced(db, destination=destination, partner_ids=partner_ids, uris=uris)
+            d, k = await asyncio.to_thread(_delete_objects, store, orphaned, cutoff=time.time() - grace)
+            objects_deleted += d
+            kept_recent += k
+
+        if expired:
+            log.info(
+                "feed_retention: destination=%s keep_last=%d daily_days=%d expired=%d",
+                destination, policy.keep_last, policy.daily_days, len(expired),
+            )
+
+    return FeedRetentionResult(
+        snapshots_deleted=snapshots_deleted,
+        objects_deleted=objects_deleted,
+        objects_kept_recent=kept_recent,
+    )
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_detail import FeedSnapshotDetail
+from app.models.feed_snapshot_latest import FeedSnapshotLatest
+
+
+# Writer meta keys holding per-listing lists; stored in feed_snapshot_details, not in meta
+DETAIL_META_KEYS = ("warnings", "skipped", "structure_errors")
+
+
+def split_snapshot_details(meta: dict[str, Any]) -> tuple[dict[str, Any], dict[str, list]]:
+    """
+    (meta without the detail lists, the detail lists).
+    """
+    meta = dict(meta)
+    details = {k: list(meta.pop(k) or []) for k in DETAIL_META_KEYS if k in meta}
+    return meta, details
+
+
+async def load_snapshot_details(db: AsyncSession, snapshot_id: str) -> dict[str, list]:
+    d = await db.get(FeedSnapshotDetail, snapshot_id)
+    return {
+        "warnings": list(d.warnings or []) if d else [],
+        "skipped": list(d.skipped or []) if d else [],
+        "structure_errors": list(d.structure_errors or []) if d else [],
+    }
+
+
+async def mark_latest_snapshots(db: AsyncSession, snapshot_ids: list[str]) -> None:
+    """
+    Point feed_snapshot_latest at the given (flushed) snapshots, in the caller's transaction.
+    A pointer never moves back to an older snapshot, so concurrent builds can't regress it.
+    """
+    if not snapshot_ids:
+        return
+
+    stmt = pg_insert(FeedSnapshotLatest).from_select(
+        ["tenant_id", "partner_id", "destination", "snapshot_id", "created_at"],
+        select(
+            FeedSnapshot.tenant_id,
+            FeedSnapshot.partner_id,
+            FeedSnapshot.destination,
+            FeedSnapshot.id,
+            FeedSnapshot.created_at,
+        ).where(FeedSnapshot.id.in_(snapshot_ids)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "partner_id", "destination"],
+        set_={
+            "snapshot_id": stmt.excluded.snapshot_id,
+            "created_at": stmt.excluded.created_at,
+            "updated_at": func.now(),
+        },
+        where=FeedSnapshotLatest.created_at <= stmt.excluded.created_at,
+    )
+    await db.execute(stmt)
+
+
+async def latest_feed_snapshots(
+    db: AsyncSession,
+    *,
+    tenant_id: str | None,
+    partner_id: str,
+    destinations: list[str],
+) -> dict[str, FeedSnapshot]:
+    """
+    Latest snapshot per destination via the pointer table (one indexed lookup each).
+    tenant_id=None is for the public feed endpoints, which only know the partner.
+    """
+    if not destinations:
+        return {}
+
+    q = (
+        select(FeedSnapshot)
+        .join(FeedSnapshotLatest, FeedSnapshotLatest.snapshot_id == FeedSnapshot.id)
+        .where(
+            FeedSnapshotLatest.partner_id == partner_id,
+            FeedSnapshotLatest.destination.in_(destinations),
+        )
+    )
+    if tenant_id is not None:
+        q = q.where(FeedSnapshotLatest.tenant_id == tenant_id)
+
+    return {s.destination: s for s in (await db.execute(q)).scalars().all()}
+
+
+async def latest_feed_snapshot(
+    db: AsyncSession,
+    *,
+    tenant_id: str | None,
+    partner_id: str,
+    destination: str,
+) -> FeedSnapshot | None:
+    found = await latest_feed_snapshots(db, tenant_id=tenant_id, partner_id=partner_id, destinations=[destination])
+    return found.get(destination)
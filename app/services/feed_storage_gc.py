@@ -0,0 +1,92 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_delta import FeedSnapshotDelta
+from app.models.feed_snapshot_part import FeedSnapshotPart
+from app.services.storage import ObjectStore
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FeedStorageGCResult:
+    scanned: int
+    referenced: int
+    deleted: int
+    kept_recent: int
+
+
+async def snapshot_ref_counts(db: AsyncSession, *, store: ObjectStore) -> Counter[str]:
+    """
+    How many retained snapshots point at each stored object key (feed + precompressed variants,
+    item hashes, their "changes since" deltas and the parts of sharded feeds).
+    """
+    refs: Counter[str] = Counter()
+    for q in (
+        select(
+            FeedSnapshot.storage_uri,
+            FeedSnapshot.gzip_storage_uri,
+            FeedSnapshot.brotli_storage_uri,
+            FeedSnapshot.zstd_storage_uri,
+            FeedSnapshot.item_hashes_uri,
+        ),
+        select(
+            FeedSnapshotDelta.storage_uri,
+            FeedSnapshotDelta.gzip_storage_uri,
+            FeedSnapshotDelta.brotli_storage_uri,
+            FeedSnapshotDelta.zstd_storage_uri,
+        ),
+        select(
+            FeedSnapshotPart.storage_uri,
+            FeedSnapshotPart.gzip_storage_uri,
+            FeedSnapshotPart.brotli_storage_uri,
+            FeedSnapshotPart.zstd_storage_uri,
+        ),
+    ):
+        async for uris in await db.stream(q):
+            for u in uris:
+                key = store.key_for_uri(u) if u else None
+                if key:
+                    refs[key] += 1
+    return refs
+
+
+async def gc_feed_storage(
+    db: AsyncSession,
+    *,
+    store: ObjectStore,
+    grace_seconds: int | None = None,
+) -> FeedStorageGCResult:
+    """
+    Delete content-addressed objects no retained FeedSnapshot references (ref count 0).
+    Objects younger than the grace period are kept: their snapshot may not be committed yet.
+    """
+    grace = settings.feed_storage_gc_grace_seconds if grace_seconds is None else grace_seconds
+    refs = await snapshot_ref_counts(db, store=store)
+    cutoff = time.time() - grace
+
+    scanned = deleted = kept_recent = 0
+    # listing may be a network call (S3): keep it off the event loop
+    objects = await asyncio.to_thread(lambda: list(store.iter_content_addressed()))
+    for key, mtime in objects:
+        scanned += 1
+        if refs.get(key, 0) > 0:
+            continue
+        if mtime > cutoff:
+            kept_recent += 1
+            continue
+        if store.delete_key(key):
+            deleted += 1
+
+    log.info("feed_storage_gc: scanned=%d referenced=%d deleted=%d kept_recent=%d", scanned, len(refs), deleted, kept_recent)
+    return FeedStorageGCResult(scanned=scanned, referenced=len(refs), deleted=deleted, kept_recent=kept_recent)
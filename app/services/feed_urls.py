@@ -8,3 +8,10 @@ def build_public_feed_url(*, public_base_url: str, partner_id: str, destination:
     ext = get_feed_plugin(dest).format
     base = public_base_url.rstrip("/")
     return f"{base}/v1/feeds/{partner_id}/{dest}.{ext}?token={token}"
+
+
+def build_public_feed_part_url(*, public_base_url: str, partner_id: str, destination: str, part_no: int, token: str) -> str:
+    dest = destination.lower().strip()
+    ext = get_feed_plugin(dest).format
+    base = public_base_url.rstrip("/")
+    return f"{base}/v1/feeds/{partner_id}/{dest}/parts/{part_no}.{ext}?token={token}"
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import escape
 
+from app.destinations.feeds.xml_check import XmlItemProfile
 
 
 @dataclass
@@ -21,36 +23,77 @@ class Evler101Ad:
     pictures: list[dict[str, Any]]      # [{picture_url, order_by, group_id?}, ...]
 
 
-def build_101evler_xml(*, ads: Iterable[Evler101Ad]) -> tuple[bytes, list[FeedBuildWarning], int]:
+XML_HEADER = b"<?xml version='1.0' encoding='utf-8'?>\n<ads>"
+XML_FOOTER = b"</ads>"
+
+# Tags 101evler rejects an <ad> without; checked on every build as the feed is written
+AD_PROFILE = XmlItemProfile(
+    item_tag="ad",
+    id_tag="ad_key",
+    required=(
+        "ad_key", "lastupdate", "type_id", "area_id", "reference_no",
+        "sale_or_rent", "price", "price_for", "currency",
+    ),
+)
+
+# Delta document: <changes><ads>added/changed ads, as in the full feed</ads>
+# <removed><listing_id>..</listing_id>...</removed></changes>
+DELTA_HEADER = b"<?xml version='1.0' encoding='utf-8'?>\n<changes><ads>"
+DELTA_FOOTER = b"</removed></changes>"
+
+
+def _ad_element(ad_obj: Evler101Ad) -> Element:
+    ad_el = Element("ad")
+
+    # Emit scalar tags
+    for tag, value in ad_obj.fields.items():
+        if value is None:
+            continue
+        SubElement(ad_el, tag).text = str(value)
+
+    # Pictures: must be under <ad_pictures><ad_picture> :contentReference[oaicite:17]{index=17}
+    pics_el = SubElement(ad_el, "ad_pictures")
+    for pic in ad_obj.pictures:
+        if not pic.get("picture_url"):
+            continue
+        p_el = SubElement(pics_el, "ad_picture")
+        SubElement(p_el, "picture_url").text = str(pic["picture_url"])
+        SubElement(p_el, "order_by").text = str(pic.get("order_by") or 1)
+        if pic.get("group_id") is not None:
+            SubElement(p_el, "group_id").text = str(pic["group_id"])  # optional in spec :contentReference[oaicite:18]{index=18}
+
+    return ad_el
+
+
+def ad_bytes(ad_obj: Evler101Ad) -> bytes:
+    return tostring(_ad_element(ad_obj), encoding="unicode").encode("utf-8")
+
+
+def iter_101evler_xml(*, ads: Iterable[Evler101Ad]) -> Iterator[bytes]:
     """
-    Build 101evler XML feed from pre-resolved plugin interface ad_projection
+    Serialize the 101evler feed one <ad> at a time, so the whole document never sits in memory.
     """
-    warnings: list[FeedBuildWarning] = []
-    root = Element("ads")
+    yield XML_HEADER
+    for ad_obj in ads:
+        yield ad_bytes(ad_obj)
+    yield XML_FOOTER
 
-    count = 0
 
-    for ad_obj in ads:
-        ad_el = SubElement(root, "ad")
-
-        # Emit scalar tags
-        for tag, value in ad_obj.fields.items():
-            if value is None:
-                continue
-            SubElement(ad_el, tag).text = str(value)
-
-        # Pictures: must be under <ad_pictures><ad_picture> :contentReference[oaicite:17]{index=17}
-        pics_el = SubElement(ad_el, "ad_pictures")
-        for pic in ad_obj.pictures:
-            if not pic.get("picture_url"):
-                continue
-            p_el = SubElement(pics_el, "ad_picture")
-            SubElement(p_el, "picture_url").text = str(pic["picture_url"])
-            SubElement(p_el, "order_by").text = str(pic.get("order_by") or 1)
-            if pic.get("group_id") is not None:
-                SubElement(p_el, "group_id").text = str(pic["group_id"])  # optional in spec :contentReference[oaicite:18]{index=18}
-
-        count += 1
-
-    xml_bytes = tostring(root, encoding="utf-8", xml_declaration=True)
-    return xml_bytes, warnings, count
+def iter_101evler_delta_xml(*, ads: Iterable[bytes], removed: Iterable[str]) -> Iterator[bytes]:
+    """
+    Serialize a delta: already serialized <ad> elements (added or changed), then removed ids.
+    """
+    yield DELTA_HEADER
+    yield from ads
+    yield b"</ads><removed>"
+    for listing_id in removed:
+        yield f"<listing_id>{escape(listing_id)}</listing_id>".encode("utf-8")
+    yield DELTA_FOOTER
+
+
+def build_101evler_xml(*, ads: Iterable[Evler101Ad]) -> tuple[bytes, list[FeedBuildWarning], int]:
+    """
+    Build 101evler XML feed from pre-resolved plugin interface ad_projection
+    """
+    ads = list(ads)
+    return b"".join(iter_101evler_xml(ads=ads)), [], len(ads)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.geo_area import GeoArea
+from app.models.geo_city import GeoCity
+from app.models.geo_country import GeoCountry
+from app.services.geo_resolver import geo_pair
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GeoCatalogSnapshot:
+    """
+    A country's geo catalog keyed by normalized slugs (geo_pair): city -> city id,
+    (city, area) -> (city id, area id).
+    """
+    country_id: str
+    country_code: str
+    cities: dict[str, str]
+    areas: dict[tuple[str, str], tuple[str, str]]
+
+    def has_city(self, city: str | None) -> bool:
+        return geo_pair(self.country_code, city, None)[0] in self.cities
+
+    def resolve(self, city: str | None, area: str | None) -> tuple[str, str] | None:
+        return self.areas.get(geo_pair(self.country_code, city, area))
+
+
+async def load_geo_catalog(db: AsyncSession, *, country_code: str) -> GeoCatalogSnapshot | None:
+    """
+    One query for every city and area of the country; None when the country does not exist.
+    """
+    cc = country_code.upper().strip()
+    rows = (await db.execute(
+        select(GeoCountry.id, GeoCity.slug, GeoCity.id, GeoArea.slug, GeoArea.id)
+        .select_from(GeoCountry)
+        .outerjoin(GeoCity, GeoCity.country_id == GeoCountry.id)
+        .outerjoin(GeoArea, GeoArea.city_id == GeoCity.id)
+        .where(GeoCountry.code == cc)
+    )).all()
+    if not rows:
+        return None
+
+    cities: dict[str, str] = {}
+    areas: dict[tuple[str, str], tuple[str, str]] = {}
+    for _, city_slug, city_id, area_slug, area_id in rows:
+        if city_id is None:
+            continue
+        city, area = geo_pair(cc, city_slug, area_slug)
+        if cities.setdefault(city, city_id) != city_id:
+            log.warning("geo catalog %s: cities %s and %s both normalize to %r; keeping %s", cc, cities[city], city_id, city, cities[city])
+            continue
+        if area_id is not None and areas.setdefault((city, area), (city_id, area_id)) != (city_id, area_id):
+            log.warning(
+                "geo catalog %s: areas %s and %s both normalize to %r; keeping %s",
+                cc, areas[(city, area)][1], area_id, f"{city}:{area}", areas[(city, area)][1],
+            )
+    return GeoCatalogSnapshot(country_id=rows[0][0], country_code=cc, cities=cities, areas=areas)
+
+
+def catalog_slugs(stored: Iterable[str], items: Iterable[tuple[str, str]], *, key: Callable[[str], str]) -> list[tuple[str, str]]:
+    """
+    (slug, name) items for a bulk import, each slug replaced by the stored slug it normalizes to
+    (`key`, see geo_pair), so "Lefkoşa Merkez" updates lefkosa_merkez instead of adding a second
+    row the resolver could not tell apart. New slugs are kept lowercased as given.
+    """
+    by_key = {key(s): s for s in stored}
+    return [(by_key.get(key(slug), slug.lower().strip()), name) for slug, name in items]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Mapping
+
+
+log = logging.getLogger(__name__)
+
+# Letters NFKD does not decompose into base + combining mark (dotless i, and the dotted capital
+# whose lower() would keep a combining dot)
+_FOLD = str.maketrans({"ı": "i", "İ": "i", "ø": "o", "Ø": "o", "đ": "d", "Đ": "d", "ł": "l", "Ł": "l"})
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Folded alias -> folded catalog slug, per country. Listings use local, English and historic
+# names interchangeably; the catalog has one slug per city.
+GEO_CITY_ALIASES: dict[str, dict[str, str]] = {
+    "NCY": {
+        "lefkosa": "nicosia",
+        "lefkosia": "nicosia",
+        "girne": "kyrenia",
+        "gazimagusa": "famagusta",
+        "magusa": "famagusta",
+        "morphou": "guzelyurt",
+        "omorfo": "guzelyurt",
+        "trikomo": "iskele",
+        "lefka": "lefke",
+    },
+}
+# (folded city, folded alias) -> folded catalog area slug, per country
+GEO_AREA_ALIASES: dict[str, dict[tuple[str, str], str]] = {}
+
+
+@lru_cache(maxsize=65536)
+def fold_slug(s: str | None) -> str:
+    """
+    Comparable slug: diacritics and case folded ("Gönyeli", "GONYELI" -> "gonyeli"), any run of
+    separators or punctuation collapsed to "-" ("Lefkoşa Merkez", "lefkosa_merkez" -> "lefkosa-merkez").
+    """
+    s = unicodedata.normalize("NFKD", (s or "").translate(_FOLD))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).casefold()
+    return _SEPARATORS.sub("-", s).strip("-")
+
+
+def geo_pair(country_code: str, city: str | None, area: str | None) -> tuple[str, str]:
+    """
+    Normalized (city, area) for a country: folded, with aliases replaced by the catalog's slugs.
+    """
+    cc = (country_code or "").upper().strip()
+    c = fold_slug(city)
+    c = GEO_CITY_ALIASES.get(cc, {}).get(c, c)
+    a = fold_slug(area)
+    a = GEO_AREA_ALIASES.get(cc, {}).get((c, a), a)
+    return c, a
+
+
+def geo_key(country_code: str, city: str | None, area: str | None) -> str:
+    return "%s:%s" % geo_pair(country_code, city, area)
+
+
+class GeoResolver:
+    """
+    Destination area ids by normalized (country, city, area), precomputed once from a
+    destination's area mappings (see DestinationMappings.geo): every lookup is one dict probe.
+    """
+
+    def __init__(self, areas: Mapping[tuple[str, str, str], str]):
+        self._index: dict[tuple[str, str, str], str] = {}
+        for (cc, city, area), dai in areas.items():
+            if dai:
+                cc = cc.upper()
+                key = (cc, *geo_pair(cc, city, area))
+                if self._index.setdefault(key, dai) != dai:
+                    log.warning("geo resolver: %s:%s:%s maps to both %s and %s; keeping %s", *key, self._index[key], dai, self._index[key])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def resolve(self, country_code: str, city: str | None, area: str | None) -> str | None:
+        cc = (country_code or "").upper().strip()
+        return self._index.get((cc, *geo_pair(cc, city, area)))
+
+    def resolve_key(self, country_code: str, key: str) -> str | None:
+        """
+        resolve() for a "city:area" key (as produced by geo_key()).
+        """
+        if ":" not in key:
+            return None
+        city, area = key.split(":", 1)
+        return self.resolve(country_code, city, area)
+
+    def resolve_many(
+        self,
+        country_code: str,
+        pairs: Iterable[tuple[str | None, str | None]],
+    ) -> dict[tuple[str | None, str | None], str | None]:
+        """
+        (city, area) as given -> destination area id (None when unmapped).
+        """
+        return {(city, area): self.resolve(country_code, city, area) for city, area in pairs}
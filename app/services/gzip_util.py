@@ -1,5 +1,6 @@
 from __future__ import annotations
 import gzip
+import zlib
 from io import BytesIO
 
 def gzip_bytes(data: bytes, *, compresslevel: int = 6) -> bytes:
@@ -7,3 +8,11 @@ def gzip_bytes(data: bytes, *, compresslevel: int = 6) -> bytes:
     with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=compresslevel) as f:
         f.write(data)
     return buf.getvalue()
+
+
+def gzip_compressobj(*, compresslevel: int = 6):
+    """
+    Streaming gzip compressor. The header carries no mtime/filename, so identical input
+    always yields identical bytes (content-addressed .gz objects dedupe too).
+    """
+    return zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
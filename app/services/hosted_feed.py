@@ -1,16 +1,39 @@
 from __future__ import annotations
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import zlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
-from sqlalchemy import select, desc
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_delta import FeedSnapshotDelta
+from app.models.feed_snapshot_part import FeedSnapshotPart
 from app.models.listing import Listing
-from app.services.storage import LocalObjectStore
+from app.services.storage import ObjectStore, StoredObject
 from app.models.partner_destination_setting import PartnerDestinationSetting
 
-from app.services.feed_hashes import hash_config, hash_listing_inputs, hash_fingerprint
+from app.services.feed_hashes import encode_item_hashes, hash_config, hash_listing_inputs, hash_fingerprint
+from app.destinations.feeds.base import FeedBuildContext, FeedBuildOutput, ListingRow
+from app.destinations.feeds.pipeline import fan_out, payload_paths_for, scan_partner_rows, stream_to_writers
 from app.destinations.feeds.registry import get_feed_plugin
-from app.services.gzip_util import gzip_bytes
+from app.destinations.feeds.sharding import FeedPart, ShardLimits, part_index_xml, shard_limits
+from app.services.feed_encodings import ENCODING_EXTS, SNAPSHOT_COLUMNS, configured_encodings, new_compressor
+from app.services.gzip_util import gzip_compressobj
+from app.models.feed_snapshot_detail import FeedSnapshotDetail
+from app.services.feed_snapshots import latest_feed_snapshots, mark_latest_snapshots, split_snapshot_details
+
+log = logging.getLogger(__name__)
 
 
 def _clean_config_for_fingerprint(cfg: dict) -> dict:
@@ -22,25 +45,351 @@ def _clean_config_for_fingerprint(cfg: dict) -> dict:
     return out
 
 
-async def build_partner_feed_snapshot(
+# Chunks are batched to this size before being handed to the compressors in parallel
+ENCODE_BLOCK_SIZE = 256 * 1024
+
+
+@dataclass(frozen=True)
+class StoredFeed:
+    format: str
+    listing_count: int
+    meta: dict[str, Any]
+    feed: StoredObject
+    variants: dict[str, StoredObject]  # Content-Encoding -> precompressed object
+    item_hashes: StoredObject | None = None  # delta-capable plugins only
+    deltas: dict[str, StoredFeed] = field(default_factory=dict)  # base snapshot id -> changes since it
+    parts: list[StoredFeed] = field(default_factory=list)  # sharded feeds; `feed` is then the part index
+
+    @property
+    def listings_format(self) -> str:
+        # a sharded feed's own object is the XML part index; the listings are in its parts
+        return self.parts[0].format if self.parts else self.format
+
+
+def store_feed_output(store: ObjectStore, *, prefix: str, out: FeedBuildOutput, parallel: bool = True) -> StoredFeed:
+    """
+    Stream a writer's output into the store in one pass: every block goes to the plain object
+    and, through one compressor per configured encoding, to each precompressed variant.
+    The compressors run concurrently on multi-core hosts (zlib/brotli/zstd release the GIL);
+    nothing is ever held whole in memory.
+    """
+    encodings = configured_encodings()
+    raw = store.open_sink(prefix=prefix, ext=out.format)
+    sinks = {e: store.open_sink(prefix=prefix, ext=f"{out.format}.{ENCODING_EXTS[e]}") for e in encodings}
+    compressors = {e: new_compressor(e) for e in encodings}
+    parallel = parallel and len(encodings) > 1 and (os.cpu_count() or 1) > 1
+    pool = ThreadPoolExecutor(max_workers=len(encodings)) if parallel else None
+
+    def encode(block: bytes, final: bool = False) -> None:
+        def run(e: str) -> bytes:
+            c = compressors[e]
+            data = c.compress(block) if block else b""
+            return data + c.flush() if final else data
+
+        raw.write(block)
+        if pool is None:
+            results = [run(e) for e in encodings]
+        else:
+            results = list(pool.map(run, encodings))
+        for e, data in zip(encodings, results):
+            sinks[e].write(data)
+
+    try:
+        buf = bytearray()
+        for chunk in out.chunks:
+            buf += chunk
+            if len(buf) >= ENCODE_BLOCK_SIZE:
+                encode(bytes(buf))
+                buf.clear()
+        encode(bytes(buf), final=True)
+        feed_obj = raw.commit()
+        variants = {e: sinks[e].commit() for e in encodings}
+    except BaseException:
+        raw.abort()
+        for sink in sinks.values():
+            sink.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    # meta is final once chunks are exhausted
+    return StoredFeed(format=out.format, listing_count=out.listing_count, meta=dict(out.meta or {}), feed=feed_obj, variants=variants)
+
+
+# Delta base: (snapshot id, item_hashes_uri) of an earlier snapshot of the same feed
+DeltaBase = tuple[str, str]
+
+# Stands for the snapshot being built (its id is only known after the insert)
+SELF_DELTA_BASE = ""
+
+
+def _load_item_hashes(store: ObjectStore, uri: str) -> dict[str, str] | None:
+    data = store.read_bytes(uri)
+    return json.loads(zlib.decompress(data, 31)) if data is not None else None
+
+
+def store_feed_with_deltas(store: ObjectStore, *, prefix: str, out: FeedBuildOutput, bases: list[DeltaBase]) -> StoredFeed:
+    """
+    store_feed_output, plus (for delta-capable outputs) the item hashes and one "changes since"
+    artifact per base snapshot, and an empty one against itself. Bases whose hashes are gone
+    (pruned) are skipped: those clients get the full feed.
+    """
+    stored = store_feed_output(store, prefix=prefix, out=out)
+    if out.item_hashes is None or out.delta is None:
+        return stored
+
+    c = gzip_compressobj()
+    hashes = store.open_sink(prefix=f"{prefix}/item-hashes", ext="json.gz")
+    hashes.write(c.compress(encode_item_hashes(out.item_hashes)) + c.flush())
+    hashes_obj = hashes.commit()
+
+    deltas = {SELF_DELTA_BASE: store_feed_output(store, prefix=f"{prefix}/changes-since", out=out.delta(out.item_hashes))}
+    for base_id, hashes_uri in bases:
+        base = _load_item_hashes(store, hashes_uri)
+        if base is not None:
+            deltas[base_id] = store_feed_output(store, prefix=f"{prefix}/changes-since", out=out.delta(base))
+
+    return replace(stored, item_hashes=hashes_obj, deltas=deltas)
+
+
+def store_feed_parts(store: ObjectStore, *, prefix: str, out: FeedBuildOutput, limits: ShardLimits) -> StoredFeed:
+    """
+    Sharded feed: every part is serialized, checked and stored (and precompressed) as its own
+    content-addressed object, on one thread per core, then a small XML index of the parts becomes
+    the snapshot's object. Unchanged parts land on the same keys as in the previous build.
+    """
+    parts = out.parts(limits)  # each part's chunks are produced as store_part() consumes them
+
+    def store_part(part: FeedPart) -> StoredFeed:
+        part_out = FeedBuildOutput(format=part.format, chunks=part.chunks, listing_count=part.listing_count, meta={})
+        return store_feed_output(store, prefix=f"{prefix}/parts", out=part_out, parallel=False)
+
+    workers = min(len(parts), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            stored = list(pool.map(store_part, parts))
+    else:
+        stored = [store_part(p) for p in parts]
+
+    index = part_index_xml(format=out.format, parts=((p.listing_count, p.feed.size_bytes, p.feed.sha256) for p in stored))
+    feed = store_feed_output(
+        store,
+        prefix=f"{prefix}/parts",
+        out=FeedBuildOutput(format="xml", chunks=[index], listing_count=out.listing_count, meta=out.meta),
+    )
+    return replace(feed, parts=stored)
+
+
+def _store_outputs(
+    store: ObjectStore,
+    contexts: list[FeedBuildContext],
+    outs: list[FeedBuildOutput],
+    prefix: str,
+    delta_bases: dict[str, list[DeltaBase]],
+) -> list[StoredFeed]:
+    stored = []
+    for ctx, out in zip(contexts, outs):
+        limits = shard_limits(ctx.config)
+        if limits is not None and out.parts is not None:
+            # parts replace the single document; no "changes since" artifacts are built for them
+            if out.delta is not None:
+                log.info("feed %s is sharded: skipping delta artifacts", ctx.destination)
+            stored.append(store_feed_parts(store, prefix=f"{prefix}/{ctx.destination}", out=out, limits=limits))
+        else:
+            stored.append(store_feed_with_deltas(store, prefix=f"{prefix}/{ctx.destination}", out=out, bases=delta_bases.get(ctx.destination, [])))
+    return stored
+
+
+def render_partner_feeds_job(
+    contexts: list[FeedBuildContext],
+    rows: Iterable[ListingRow],
+    store: ObjectStore,
+    prefix: str,
+    delta_bases: dict[str, list[DeltaBase]] | None = None,
+) -> list[StoredFeed]:
+    """
+    CPU-bound part of a partner build: one pass over `rows` feeding every destination writer,
+    then streamed serialization + compression into the store. Module-level so it can be shipped to
+    a ProcessPoolExecutor.
+    """
+    writers = [get_feed_plugin(ctx.destination).open(ctx) for ctx in contexts]
+    return _store_outputs(store, contexts, fan_out(writers, rows), prefix, delta_bases or {})
+
+
+# Row chunks (settings.listing_scan_chunk_size rows each) in flight between a partner's scan and
+# its worker process: a process-pool build holds about this many chunks, never the whole scan
+ROW_QUEUE_DEPTH = 4
+_ROWS_END = None  # sentinel: the scan is complete
+
+
+@lru_cache(maxsize=1)
+def _row_channels():
+    # picklable queue proxies for ProcessPoolExecutor jobs (started once, with spawn like the pool)
+    return multiprocessing.get_context("spawn").Manager()
+
+
+def _iter_queued_rows(rows_queue, timeout: float) -> Iterator[ListingRow]:
+    while True:
+        try:
+            chunk = rows_queue.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("no listing rows from the scan") from None
+        if chunk is _ROWS_END:
+            return
+        if isinstance(chunk, str):
+            raise RuntimeError(f"listing scan failed: {chunk}")
+        yield from chunk
+
+
+def render_partner_feeds_queued_job(
+    contexts: list[FeedBuildContext],
+    rows_queue,
+    store: ObjectStore,
+    prefix: str,
+    delta_bases: dict[str, list[DeltaBase]] | None = None,
+    timeout: float = 600,
+) -> list[StoredFeed]:
+    """
+    render_partner_feeds_job() over rows the parent streams through `rows_queue` in chunks.
+    """
+    return render_partner_feeds_job(contexts, _iter_queued_rows(rows_queue, timeout), store, prefix, delta_bases)
+
+
+async def _render_in_executor(
+    executor: Executor,
+    rows: AsyncIterator[ListingRow],
+    *,
+    contexts: list[FeedBuildContext],
+    store: ObjectStore,
+    prefix: str,
+    delta_bases: dict[str, list[DeltaBase]],
+) -> list[StoredFeed]:
+    """
+    Run the CPU phase in `executor` while the scan streams into it through a bounded queue.
+    """
+    rows_queue = await asyncio.to_thread(_row_channels().Queue, ROW_QUEUE_DEPTH)
+    job = executor.submit(
+        render_partner_feeds_queued_job, contexts, rows_queue, store, prefix, delta_bases,
+        settings.feed_build_timeout_seconds,
+    )
+
+    def put(item) -> None:
+        # blocks while the queue is full (the job may still be waiting for a process); gives up
+        # once the job has ended, e.g. failed early
+        while not job.done():
+            try:
+                rows_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    size = max(1, settings.listing_scan_chunk_size)
+    try:
+        chunk: list[ListingRow] = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                await asyncio.to_thread(put, chunk)
+                chunk = []
+                if job.done():
+                    break
+        if chunk:
+            await asyncio.to_thread(put, chunk)
+        await asyncio.to_thread(put, _ROWS_END)
+    except BaseException as e:
+        # unblock the worker; if even that fails it times out on its own
+        try:
+            rows_queue.put_nowait(repr(e) or "aborted")
+        except Exception:
+            pass
+        raise
+    return await asyncio.wrap_future(job)
+
+
+async def _delta_bases(db: AsyncSession, *, tenant_id: str, partner_id: str, destination: str) -> list[DeltaBase]:
+    """
+    The feed's most recent snapshots that recorded item hashes (newest first).
+    """
+    if settings.feed_delta_bases <= 0 or not getattr(get_feed_plugin(destination), "supports_delta", False):
+        return []
+    return [
+        (sid, uri)
+        for sid, uri in (await db.execute(
+            select(FeedSnapshot.id, FeedSnapshot.item_hashes_uri).where(
+                FeedSnapshot.tenant_id == tenant_id,
+                FeedSnapshot.partner_id == partner_id,
+                FeedSnapshot.destination == destination,
+                FeedSnapshot.item_hashes_uri.is_not(None),
+            ).order_by(desc(FeedSnapshot.created_at)).limit(settings.feed_delta_bases)
+        )).tuples().all()
+    ]
+
+
+def _part_row(*, snapshot_id: str, part_no: int, part: StoredFeed) -> FeedSnapshotPart:
+    row = FeedSnapshotPart(
+        snapshot_id=snapshot_id,
+        part_no=part_no,
+        format=part.format,
+        storage_uri=part.feed.uri,
+        size_bytes=part.feed.size_bytes,
+        content_hash=part.feed.sha256,
+        listing_count=part.listing_count,
+    )
+    for encoding, obj in part.variants.items():
+        setattr(row, f"{SNAPSHOT_COLUMNS[encoding]}_storage_uri", obj.uri)
+        setattr(row, f"{SNAPSHOT_COLUMNS[encoding]}_size_bytes", obj.size_bytes)
+    return row
+
+
+def _delta_row(*, snapshot_id: str, base_snapshot_id: str, delta: StoredFeed) -> FeedSnapshotDelta:
+    row = FeedSnapshotDelta(
+        snapshot_id=snapshot_id,
+        base_snapshot_id=base_snapshot_id,
+        format=delta.format,
+        storage_uri=delta.feed.uri,
+        size_bytes=delta.feed.size_bytes,
+        content_hash=delta.feed.sha256,
+        added_count=int(delta.meta.get("added", 0)),
+        changed_count=int(delta.meta.get("changed", 0)),
+        removed_count=int(delta.meta.get("removed", 0)),
+    )
+    for encoding, obj in delta.variants.items():
+        setattr(row, f"{SNAPSHOT_COLUMNS[encoding]}_storage_uri", obj.uri)
+        setattr(row, f"{SNAPSHOT_COLUMNS[encoding]}_size_bytes", obj.size_bytes)
+    return row
+
+
+async def build_partner_feed_snapshots(
     db: AsyncSession,
     *,
     tenant_id: str,
     partner_id: str,
-    destination: str,
-    store: LocalObjectStore,
-) -> FeedSnapshot:
-    dest = destination.lower().strip()
+    destinations: list[str],
+    store: ObjectStore,
+    executor: Executor | None = None,
+) -> dict[str, FeedSnapshot]:
+    """
+    Build (or reuse) the latest snapshot of every given hosted feed destination for one partner.
 
-    setting = (await db.execute(select(PartnerDestinationSetting).where(
-        PartnerDestinationSetting.tenant_id == tenant_id,
-        PartnerDestinationSetting.partner_id == partner_id,
-        PartnerDestinationSetting.destination == dest,
-    ))).scalar_one()
+    Listings are scanned once per partner and fanned out to each stale destination's writer,
+    instead of one full scan + parse per destination. The CPU phase runs inline (straight off
+    the cursor), or in `executor` when given, fed in bounded chunks as the cursor advances.
+    """
+    dests = list(dict.fromkeys(d.lower().strip() for d in destinations))
 
-    cfg_for_fp = _clean_config_for_fingerprint(setting.config or {})
+    settings_by_dest = {
+        s.destination: s
+        for s in (await db.execute(select(PartnerDestinationSetting).where(
+            PartnerDestinationSetting.tenant_id == tenant_id,
+            PartnerDestinationSetting.partner_id == partner_id,
+            PartnerDestinationSetting.destination.in_(dests),
+        ))).scalars().all()
+    }
+    missing = [d for d in dests if d not in settings_by_dest]
+    if missing:
+        raise ValueError(f"No destination setting for partner={partner_id} destination={','.join(missing)}")
 
-    # Cheap fingerprint inputs: listing ids + listing content hashes
+    # Cheap fingerprint inputs: listing ids + listing content hashes (shared by all destinations)
     rows = (
         await db.execute(
             select(Listing.id, Listing.content_hash).where(
@@ -53,67 +402,136 @@ async def build_partner_feed_snapshot(
     ).all()
 
     listing_summaries = [{"id": str(rid), "hash": (ch or "")} for (rid, ch) in rows]
-    config_hash = hash_config(cfg_for_fp)
     input_hash = hash_listing_inputs(listing_summaries)
-    fingerprint = hash_fingerprint(destination=dest, config_hash=config_hash, input_hash=input_hash)
 
-    # Load latest snapshot for this partner+destination
-    latest = (
-        await db.execute(
-            select(FeedSnapshot).where(
-                FeedSnapshot.tenant_id == tenant_id,
-                FeedSnapshot.partner_id == partner_id,
-                FeedSnapshot.destination == dest,
-            ).order_by(desc(FeedSnapshot.created_at)).limit(1)
+    latest_by_dest = await latest_feed_snapshots(db, tenant_id=tenant_id, partner_id=partner_id, destinations=dests)
+
+    result: dict[str, FeedSnapshot] = {}
+    stale: list[tuple[str, str, str]] = []  # (destination, config_hash, fingerprint)
+    for dest in dests:
+        cfg_for_fp = _clean_config_for_fingerprint(settings_by_dest[dest].config or {})
+        config_hash = hash_config(cfg_for_fp)
+        fingerprint = hash_fingerprint(destination=dest, config_hash=config_hash, input_hash=input_hash)
+
+        latest = latest_by_dest.get(dest)
+        latest_fp = latest.meta.get("fingerprint") if latest and isinstance(latest.meta, dict) else None
+        if latest and latest_fp == fingerprint:
+            # no-op: nothing changed (by our fingerprint definition)
+            result[dest] = latest
+        else:
+            stale.append((dest, config_hash, fingerprint))
+
+    if not stale:
+        return result
+
+    # DB phase: per-destination lookups, then one listing scan for all of them
+    contexts = [
+        await get_feed_plugin(dest).prepare(
+            db=db,
+            tenant_id=tenant_id,
+            partner_id=partner_id,
+            config=settings_by_dest[dest].config or {},
         )
-    ).scalar_one_or_none()
+        for (dest, _, _) in stale
+    ]
 
-    latest_fp = None
-    if latest and isinstance(latest.meta, dict):
-        latest_fp = latest.meta.get("fingerprint")
+    # Content-addressed: older snapshots keep their own immutable objects; GC prunes the rest
+    prefix = f"{tenant_id}/{partner_id}"
+    paths = payload_paths_for(contexts)
+    delta_bases = {
+        dest: await _delta_bases(db, tenant_id=tenant_id, partner_id=partner_id, destination=dest)
+        for (dest, _, _) in stale
+        if shard_limits(settings_by_dest[dest].config or {}) is None
+    }
+    if executor is None:
+        writers = [get_feed_plugin(ctx.destination).open(ctx) for ctx in contexts]
+        outs = await stream_to_writers(db, tenant_id=tenant_id, partner_id=partner_id, writers=writers, payload_paths=paths)
+        rendered = await asyncio.to_thread(_store_outputs, store, contexts, outs, prefix, delta_bases)
+    else:
+        rendered = await _render_in_executor(
+            executor,
+            scan_partner_rows(db, tenant_id=tenant_id, partner_id=partner_id, payload_paths=paths),
+            contexts=contexts,
+            store=store,
+            prefix=prefix,
+            delta_bases=delta_bases,
+        )
 
-    if latest and latest_fp == fingerprint:
-        # no-op: nothing changed (by our fingerprint definition)
-        return latest
+    built_at = datetime.now(timezone.utc).isoformat()
+    details: dict[str, dict[str, list]] = {}
+    for (dest, config_hash, fingerprint), out in zip(stale, rendered):
+        meta, details[dest] = split_snapshot_details(out.meta)
+        meta["fingerprint"] = fingerprint
+        meta["config_hash"] = config_hash
+        meta["input_hash"] = input_hash
+        meta["built_at"] = built_at
+        meta["listing_count"] = out.listing_count
+        meta["gzip_available"] = "gzip" in out.variants
+        meta["encodings"] = sorted(out.variants)
+        if out.deltas:
+            meta["delta_bases"] = [b for b in out.deltas if b != SELF_DELTA_BASE]
+        if out.parts:
+            meta["part_count"] = len(out.parts)
 
-    # Build a new feed via destination plugin
-    plugin = get_feed_plugin(dest)
-    out = await plugin.build(
-        db=db,
-        tenant_id=tenant_id,
-        partner_id=partner_id,
-        config=setting.config or {},
-    )
+        snap = FeedSnapshot(
+            tenant_id=tenant_id,
+            partner_id=partner_id,
+            destination=dest,
+            storage_uri=out.feed.uri,
+            size_bytes=out.feed.size_bytes,
+            format=out.listings_format,
+            content_hash=out.feed.sha256,
+            listing_count=out.listing_count,
+            meta=meta,
+            item_hashes_uri=out.item_hashes.uri if out.item_hashes else None,
+            created_by="system",
+            updated_by="system",
+        )
+        for encoding, obj in out.variants.items():
+            setattr(snap, f"{SNAPSHOT_COLUMNS[encoding]}_storage_uri", obj.uri)
+            setattr(snap, f"{SNAPSHOT_COLUMNS[encoding]}_size_bytes", obj.size_bytes)
+        db.add(snap)
+        result[dest] = snap
+
+    await db.flush()
+    for dest, d in details.items():
+        if d:
+            db.add(FeedSnapshotDetail(
+                snapshot_id=result[dest].id,
+                warnings=d.get("warnings", []),
+                skipped=d.get("skipped", []),
+                structure_errors=d.get("structure_errors", []),
+            ))
+    for (dest, _, _), out in zip(stale, rendered):
+        snap_id = result[dest].id
+        for base_id, delta in out.deltas.items():
+            db.add(_delta_row(snapshot_id=snap_id, base_snapshot_id=base_id or snap_id, delta=delta))
+        for part_no, part in enumerate(out.parts):
+            db.add(_part_row(snapshot_id=snap_id, part_no=part_no, part=part))
+    # same transaction: the pointer is visible exactly when the snapshot is
+    await mark_latest_snapshots(db, [result[dest].id for (dest, _, _) in stale])
+    return result
 
-    key = f"{tenant_id}/{partner_id}/{dest}/feed.{out.format}"
-    uri = store.put_bytes(key=key, data=out.bytes)
-
-    gz_key = f"{tenant_id}/{partner_id}/{dest}/feed.{out.format}.gz"
-    gz_data = gzip_bytes(out.bytes)
-    gz_uri = store.put_bytes(key=gz_key, data=gz_data)
-
-    meta = dict(out.meta or {})
-    meta["fingerprint"] = fingerprint
-    meta["config_hash"] = config_hash
-    meta["input_hash"] = input_hash
-    meta["built_at"] = datetime.now(timezone.utc).isoformat()
-    meta["listing_count"] = out.listing_count
-    meta["gzip_available"] = True
-    
-    snap = FeedSnapshot(
+
+async def build_partner_feed_snapshot(
+    db: AsyncSession,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    destination: str,
+    store: ObjectStore,
+    executor: Executor | None = None,
+) -> FeedSnapshot:
+    """
+    Build (or reuse) the latest feed snapshot for partner+destination.
+    """
+    dest = destination.lower().strip()
+    snaps = await build_partner_feed_snapshots(
+        db,
         tenant_id=tenant_id,
         partner_id=partner_id,
-        destination=dest,
-        storage_uri=uri,
-        gzip_storage_uri=gz_uri,
-        gzip_size_bytes=len(gz_data),
-        format=out.format,
-        content_hash=out.content_hash,
-        listing_count=out.listing_count,
-        meta=meta,
-        created_by="system",
-        updated_by="system",
+        destinations=[dest],
+        store=store,
+        executor=executor,
     )
-    db.add(snap)
-    await db.flush()
-    return snap
+    return snaps[dest]
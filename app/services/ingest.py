@@ -13,6 +13,7 @@ from app.core.ids import gen_id
 from app.models.source_listing_mapping import SourceListingMapping
 from app.models.listing import Listing
 from app.models.ingest_run import IngestRun
+from app.services.partner_mapping_keys import apply_mapping_key_changes, listing_mapping_keys
 
 
 class IngestError(Exception):
@@ -174,6 +175,7 @@ async def ingest_listing(
         ))).scalar_one_or_none()
 
         material_change = False
+        old_keys = listing_mapping_keys(listing) if listing else set()
 
         if not listing:
             listing = Listing(
@@ -199,6 +201,12 @@ async def ingest_listing(
                 listing.status = normalized_payload.get("status", listing.status)
                 listing.updated_by = "ingest"
 
+        if material_change:
+            await apply_mapping_key_changes(
+                db, tenant_id=tenant_id, partner_id=partner_id,
+                old=old_keys, new=listing_mapping_keys(listing),
+            )
+
         # upsert mapping
         if not mapping:
             mapping = SourceListingMapping(
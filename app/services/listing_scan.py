@@ -0,0 +1,123 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import and_, case, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.listing import Listing
+
+# Always projected so trusted loading (schema/version gate) and error reporting keep working
+_BASE_PATHS = ("schema", "schema_version", "canonical_id")
+
+
+class ScannedListing:
+    """
+    One row of a partner scan: the columns consumers need plus the (possibly projected) payload.
+    Satisfies StoredCanonical, so load_stored_listing() accepts it directly.
+    """
+    __slots__ = ("id", "agent_id", "updated_at", "schema", "schema_version", "content_hash", "payload")
+
+    def __init__(
+        self,
+        id: str,
+        agent_id: str,
+        updated_at: datetime | None,
+        schema: str,
+        schema_version: str,
+        content_hash: str | None,
+        payload: dict[str, Any],
+    ):
+        self.id = id
+        self.agent_id = agent_id
+        self.updated_at = updated_at
+        self.schema = schema
+        self.schema_version = schema_version
+        self.content_hash = content_hash
+        self.payload = payload
+
+
+def _set_path(out: dict[str, Any], path: tuple[str, ...], value: Any) -> None:
+    for key in path[:-1]:
+        out = out.setdefault(key, {})
+    out[path[-1]] = value
+
+
+async def iter_partner_listings(
+    db: AsyncSession,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    payload_paths: Sequence[str] | None = None,
+    chunk_size: int | None = None,
+    limit: int | None = None,
+    active_only: bool = False,
+) -> AsyncIterator[ScannedListing]:
+    """
+    Stream a partner's canonical listings through a server-side cursor, `chunk_size` rows at a time,
+    so memory stays flat however large the partner is.
+
+    payload_paths: only fetch these JSONB paths (e.g. "address", "list_price", "property.bedrooms")
+    and rebuild a partial payload from them; None fetches the whole payload. Projected payloads
+    only contain what was asked for, so consumers must list every field they read. A partial
+    payload cannot be validated, so rows that would not load trusted (see is_trusted) come with
+    their whole payload, and nothing is projected when trusted loading is off.
+    active_only: skip soft-deleted listings.
+    """
+    paths: list[tuple[str, ...]] | None = None
+    if payload_paths is not None and settings.canonical_trusted_load:
+        wanted = dict.fromkeys((*_BASE_PATHS, *payload_paths))
+        paths = [tuple(p.split(".")) for p in wanted]
+
+    if paths is None:
+        payload_cols = [Listing.payload]
+    else:
+        # payload #> '{a,b}': only the requested subtrees leave the server
+        payload_cols = [Listing.payload[p].label(f"p{i}") for i, p in enumerate(paths)]
+        # SQL mirror of is_trusted(): the whole payload only for rows load_canonical() validates
+        trusted = and_(
+            Listing.content_hash.like("sha256:%"),
+            Listing.payload["schema"].astext == Listing.schema,
+            Listing.payload["schema_version"].astext == Listing.schema_version,
+        )
+        payload_cols.append(case((trusted, null()), else_=Listing.payload).label("untrusted_payload"))
+
+    stmt = (
+        select(
+            Listing.id,
+            Listing.agent_id,
+            Listing.updated_at,
+            Listing.schema,
+            Listing.schema_version,
+            Listing.content_hash,
+            *payload_cols,
+        )
+        .where(
+            Listing.tenant_id == tenant_id,
+            Listing.partner_id == partner_id,
+            Listing.schema == "canonical.listing",
+            Listing.schema_version == "1.0",
+        )
+        .order_by(Listing.id.asc())
+        .execution_options(yield_per=chunk_size or settings.listing_scan_chunk_size)
+    )
+    if active_only:
+        stmt = stmt.where(Listing.is_active.is_(True))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    result = await db.stream(stmt)
+    async for row in result:
+        lid, agent_id, updated_at, schema, schema_version, content_hash, *values = row
+        if paths is None:
+            payload = values[0]
+        elif values[-1] is not None:
+            payload = values[-1]
+        else:
+            payload = {}
+            for p, v in zip(paths, values):
+                # missing keys come back as SQL NULL; leave them out like exclude_none dumps do
+                if v is not None:
+                    _set_path(payload, p, v)
+        yield ScannedListing(lid, agent_id, updated_at, schema, schema_version, content_hash, payload)
@@ -10,6 +10,7 @@ from app.models.listing import Listing
 from app.models.outbox import OutboxEvent
 from app.services.auth import Actor
 from app.services.canonical_validate import validate_and_normalize_canonical
+from app.services.partner_mapping_keys import apply_mapping_key_changes, listing_mapping_keys
 
 
 def normalize_listing_payload_or_raise(
@@ -73,8 +74,10 @@ async def upsert_listing_record(
 
     created = False
     changed = True
+    old_keys = set()
 
     if listing:
+        old_keys = listing_mapping_keys(listing)
         # Determine if this is a material change. If not, avoid rewriting payload and avoid outbox noise.
         same_content = listing.content_hash == content_hash
         same_envelope = (
@@ -114,6 +117,10 @@ async def upsert_listing_record(
 
      # Emit outbox only if it was created or materially changed.
     if created or changed:
+        await apply_mapping_key_changes(
+            db, tenant_id=actor.tenant_id, partner_id=partner_id,
+            old=old_keys, new=listing_mapping_keys(listing),
+        )
         db.add(
             OutboxEvent(
                 aggregate_type="listing",
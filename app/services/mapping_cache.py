@@ -0,0 +1,150 @@
+from __future__ import annotations
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Awaitable, Callable, Iterable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.models.geo_area import GeoArea
+from app.models.geo_city import GeoCity
+from app.models.geo_country import GeoCountry
+from app.services.geo_resolver import GeoResolver
+
+
+log = logging.getLogger(__name__)
+
+# Bumped by geo catalog changes (country/city/area slugs), which affect every destination
+_GLOBAL_VERSION_KEY = "mapcache:v"
+
+
+def _version_key(destination: str) -> str:
+    return f"mapcache:v:{destination}"
+
+
+@dataclass(frozen=True)
+class DestinationMappings:
+    """
+    Everything a destination maps to: enum dicts per namespace and a flattened area index.
+    """
+    destination: str
+    enums: dict[str, dict[str, str]] = field(default_factory=dict)  # namespace -> source_key -> value
+    areas: dict[tuple[str, str, str], str] = field(default_factory=dict)  # (country, city_slug, area_slug) -> area id
+
+    def enum(self, namespace: str, source_key: str) -> str | None:
+        return self.enums.get(namespace, {}).get(source_key)
+
+    def area_index(self, country_code: str) -> dict[tuple[str, str], str]:
+        """
+        (city_slug, area_slug) -> destination_area_id for one country.
+        """
+        cc = country_code.upper().strip()
+        return {(city, area): dai for (c, city, area), dai in self.areas.items() if c == cc}
+
+    @cached_property
+    def geo(self) -> GeoResolver:
+        """
+        Folded/aliased area index, built once per cached load.
+        """
+        return GeoResolver(self.areas)
+
+
+async def load_destination_mappings(db: AsyncSession, destination: str) -> DestinationMappings:
+    """
+    Two queries: every enum mapping of the destination, and its area mappings joined to the geo catalog.
+    """
+    enums: dict[str, dict[str, str]] = {}
+    for ns, sk, dv in (await db.execute(
+        select(
+            DestinationEnumMapping.namespace,
+            DestinationEnumMapping.source_key,
+            DestinationEnumMapping.destination_value,
+        ).where(DestinationEnumMapping.destination == destination)
+    )).all():
+        if ns and sk and dv is not None:
+            enums.setdefault(ns, {})[sk] = dv
+
+    rows = (await db.execute(
+        select(GeoCountry.code, GeoCity.slug, GeoArea.slug, DestinationGeoMapping.destination_area_id)
+        .join(GeoArea, GeoArea.id == DestinationGeoMapping.geo_area_id)
+        .join(GeoCity, GeoCity.id == GeoArea.city_id)
+        .join(GeoCountry, GeoCountry.id == GeoCity.country_id)
+        .where(
+            DestinationGeoMapping.destination == destination,
+            DestinationGeoMapping.destination_area_id.is_not(None),
+        )
+    )).all()
+    areas = {(cc, city, area): dai for (cc, city, area, dai) in rows}
+
+    return DestinationMappings(destination=destination, enums=enums, areas=areas)
+
+
+class MappingCache:
+    """
+    Process-wide DestinationMappings per destination. Mappings only change through catalog
+    activation and admin imports, which bump a Redis version key after committing; every
+    process reloads lazily on its next read once it sees a new version.
+    """
+
+    def __init__(self, redis_url: str, *, ttl_seconds: int):
+        self.r = redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        # destination -> (version, loaded_at, mappings)
+        self._entries: dict[str, tuple[tuple[str | None, ...], float, DestinationMappings]] = {}
+
+    async def get(self, destination: str, load: Callable[[], Awaitable[DestinationMappings]]) -> DestinationMappings:
+        try:
+            version = tuple(await self.r.mget(_GLOBAL_VERSION_KEY, _version_key(destination)))
+        except RedisError:
+            log.warning("mapping_cache: redis unavailable, bypassing cache", exc_info=True)
+            return await load()
+
+        now = time.monotonic()
+        hit = self._entries.get(destination)
+        if hit is not None and hit[0] == version and now - hit[1] < self.ttl_seconds:
+            return hit[2]
+
+        mappings = await load()
+        self._entries[destination] = (version, now, mappings)
+        return mappings
+
+    async def invalidate(self, destinations: Iterable[str] | None = None) -> None:
+        """
+        Call after the change is committed; destinations=None for geo catalog changes (all of them).
+        """
+        dests = None if destinations is None else [d.lower().strip() for d in destinations]
+        if dests is None:
+            self._entries.clear()
+        else:
+            for d in dests:
+                self._entries.pop(d, None)
+        keys = [_GLOBAL_VERSION_KEY] if dests is None else [_version_key(d) for d in dests]
+        try:
+            async with self.r.pipeline(transaction=False) as pipe:
+                for k in keys:
+                    pipe.set(k, uuid.uuid4().hex)
+                await pipe.execute()
+        except RedisError:
+            # other processes converge within ttl_seconds
+            log.warning("mapping_cache: invalidate failed keys=%s", ",".join(keys), exc_info=True)
+
+
+@lru_cache(maxsize=1)
+def get_mapping_cache() -> MappingCache:
+    """
+    Process-wide cache (one Redis pool).
+    """
+    return MappingCache(settings.redis_url, ttl_seconds=settings.mapping_cache_ttl_seconds)
+
+
+async def get_destination_mappings(db: AsyncSession, destination: str) -> DestinationMappings:
+    dest = destination.lower().strip()
+    return await get_mapping_cache().get(dest, lambda: load_destination_mappings(db, dest))
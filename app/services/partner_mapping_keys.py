@@ -0,0 +1,174 @@
+from __future__ import annotations
+import logging
+from collections import Counter
+from typing import Any, Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.canonical.trusted import load_stored_listing
+from app.destinations.mapping_base import MappingKeySet
+from app.destinations.mapping_registry import iter_mapping_plugins
+from app.models.partner_mapping_key import PartnerMappingKey
+from app.models.partner_mapping_key_build import PartnerMappingKeyBuild
+from app.services.listing_scan import iter_partner_listings
+from worker.celery_app import celery
+
+
+log = logging.getLogger(__name__)
+
+GEO_NAMESPACE = "geo"
+
+# (destination, namespace, key)
+MappingKey = tuple[str, str, str]
+
+
+def listing_mapping_keys(listing: Any) -> set[MappingKey]:
+    """
+    Every mapping key a stored listing needs, across all mapping plugins. Inactive and
+    non-canonical listings need none (readiness only covers what can be exported).
+    """
+    if getattr(listing, "is_active", True) is False:
+        return set()
+    if listing.schema != "canonical.listing" or listing.schema_version != "1.0":
+        return set()
+
+    can = load_stored_listing(listing)
+    out: set[MappingKey] = set()
+    for plugin in iter_mapping_plugins():
+        ks = plugin.required_mapping_keys(can)
+        for ns, keys in ks.enum_keys.items():
+            out.update((plugin.destination, ns, k) for k in keys)
+        out.update((plugin.destination, GEO_NAMESPACE, k) for k in ks.geo_keys)
+    return out
+
+
+def _lock_key(partner_id: str):
+    return func.hashtext(f"partner_mapping_keys:{partner_id}")
+
+
+async def _upsert_counts(db: AsyncSession, *, tenant_id: str, partner_id: str, counts: dict[MappingKey, int]) -> None:
+    # sorted: concurrent writers touch shared rows in the same order (no deadlocks)
+    rows = [
+        {"tenant_id": tenant_id, "partner_id": partner_id, "destination": d, "namespace": ns, "key": k, "ref_count": n}
+        for (d, ns, k), n in sorted(counts.items())
+    ]
+    stmt = pg_insert(PartnerMappingKey).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "partner_id", "destination", "namespace", "key"],
+        set_={"ref_count": PartnerMappingKey.ref_count + stmt.excluded.ref_count, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+
+
+async def apply_mapping_key_changes(
+    db: AsyncSession,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    old: set[MappingKey],
+    new: set[MappingKey],
+) -> None:
+    """
+    Move one listing's contribution from `old` to `new` keys, in the caller's transaction.
+    """
+    counts = {k: 1 for k in new - old} | {k: -1 for k in old - new}
+    if not counts:
+        return
+
+    # shared: listing writes run concurrently, only a rebuild excludes them
+    await db.execute(select(func.pg_advisory_xact_lock_shared(_lock_key(partner_id))))
+    await _upsert_counts(db, tenant_id=tenant_id, partner_id=partner_id, counts=counts)
+    if any(n < 0 for n in counts.values()):
+        await db.execute(delete(PartnerMappingKey).where(
+            PartnerMappingKey.tenant_id == tenant_id,
+            PartnerMappingKey.partner_id == partner_id,
+            PartnerMappingKey.ref_count <= 0,
+        ))
+
+
+async def rebuild_partner_mapping_keys(db: AsyncSession, *, tenant_id: str, partner_id: str, batch_size: int = 1000) -> int:
+    """
+    Recount a partner's keys from one scan of its active listings, in the caller's transaction.
+    Holds the partner's lock exclusively, so in-flight listing writes are either already
+    visible to the scan or apply their change on top of the rebuilt counts.
+    Returns the number of distinct keys.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(_lock_key(partner_id))))
+    await db.execute(delete(PartnerMappingKey).where(
+        PartnerMappingKey.tenant_id == tenant_id,
+        PartnerMappingKey.partner_id == partner_id,
+    ))
+
+    paths: dict[str, None] = {}
+    for plugin in iter_mapping_plugins():
+        if plugin.payload_paths is None:
+            paths = None
+            break
+        paths.update(dict.fromkeys(plugin.payload_paths))
+
+    counts: Counter[MappingKey] = Counter()
+    async for r in iter_partner_listings(
+        db, tenant_id=tenant_id, partner_id=partner_id,
+        payload_paths=None if paths is None else list(paths), active_only=True,
+    ):
+        counts.update(listing_mapping_keys(r))
+
+    items = list(counts.items())
+    for i in range(0, len(items), batch_size):
+        await _upsert_counts(db, tenant_id=tenant_id, partner_id=partner_id, counts=dict(items[i:i + batch_size]))
+
+    stmt = pg_insert(PartnerMappingKeyBuild).values(tenant_id=tenant_id, partner_id=partner_id)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "partner_id"], set_={"built_at": func.now()},
+    ))
+    return len(counts)
+
+
+async def mapping_keys_built(db: AsyncSession, *, tenant_id: str, partner_id: str) -> bool:
+    built = (await db.execute(select(PartnerMappingKeyBuild.partner_id).where(
+        PartnerMappingKeyBuild.tenant_id == tenant_id,
+        PartnerMappingKeyBuild.partner_id == partner_id,
+    ))).scalar_one_or_none()
+    return built is not None
+
+
+def request_mapping_key_build(*, tenant_id: str, partner_id: str) -> None:
+    """
+    Queue the first build of a partner's keys on the worker (a rebuild locks out the
+    partner's listing writes, so it never runs on a read request). Best effort: the next
+    read asks again.
+    """
+    try:
+        celery.send_task("worker.tasks.rebuild_partner_mapping_keys", args=[tenant_id, partner_id])
+    except Exception:
+        log.warning("partner_mapping_keys: could not queue the build for %s/%s", tenant_id, partner_id, exc_info=True)
+
+
+async def load_partner_mapping_keys(db: AsyncSession, *, tenant_id: str, partner_id: str, destination: str) -> MappingKeySet | None:
+    """
+    The partner's keys for one destination; None while they were never built (see
+    request_mapping_key_build). Read-only.
+    """
+    if not await mapping_keys_built(db, tenant_id=tenant_id, partner_id=partner_id):
+        return None
+
+    rows = (await db.execute(select(PartnerMappingKey.namespace, PartnerMappingKey.key).where(
+        PartnerMappingKey.tenant_id == tenant_id,
+        PartnerMappingKey.partner_id == partner_id,
+        PartnerMappingKey.destination == destination,
+        PartnerMappingKey.ref_count > 0,
+    ))).all()
+    return mapping_key_set(rows)
+
+
+def mapping_key_set(rows: Iterable[tuple[str, str]]) -> MappingKeySet:
+    enum: dict[str, set[str]] = {}
+    geo: set[str] = set()
+    for ns, key in rows:
+        if ns == GEO_NAMESPACE:
+            geo.add(key)
+        else:
+            enum.setdefault(ns, set()).add(key)
+    return MappingKeySet(enum_keys=enum, geo_keys=geo)
@@ -1,8 +1,13 @@
 from __future__ import annotations
-from sqlalchemy import select
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.canonical.v1.listing import ListingCanonicalV1
+from app.canonical.trusted import load_stored_listing
+from app.core.crypto import decrypt_json
+from app.models.agent_credential import AgentCredential
 from app.models.delivery import Delivery
 from app.models.listing import Listing
 from app.models.agent_external_identity import AgentExternalIdentity
@@ -12,6 +17,153 @@ from app.projections.registry import get_projector
 from app.projections.base import ProjectionContext
 
 
+# (tenant_id, partner_id, agent_id, destination): one active credential / identity per key
+AgentKey = tuple[str, str, str, str]
+# (tenant_id, destination, listing_id): uq_listing_dest_mapping
+MappingKey = tuple[str, str, str]
+
+
+def _agent_key(d: Delivery) -> AgentKey:
+    return (d.tenant_id, d.partner_id, d.agent_id, d.destination)
+
+
+def _mapping_key(d: Delivery) -> MappingKey:
+    return (d.tenant_id, d.destination, d.listing_id)
+
+
+@dataclass
+class PublishBatch:
+    """
+    Everything publishing a set of deliveries reads, loaded up front (see prepare_publish_batch).
+    Decrypted credentials are cached per (agent, destination) for the batch.
+    """
+    deliveries: dict[str, Delivery] = field(default_factory=dict)
+    listings: dict[str, Listing] = field(default_factory=dict)
+    mappings: dict[MappingKey, ListingExternalMapping] = field(default_factory=dict)
+    credentials: dict[AgentKey, AgentCredential] = field(default_factory=dict)
+    identities: dict[AgentKey, AgentExternalIdentity] = field(default_factory=dict)
+    _secrets: dict[AgentKey, dict] = field(default_factory=dict, repr=False)
+
+    def listing(self, d: Delivery) -> Listing | None:
+        return self.listings.get(d.listing_id)
+
+    def mapping(self, d: Delivery) -> ListingExternalMapping | None:
+        return self.mappings.get(_mapping_key(d))
+
+    def add_mapping(self, mapping: ListingExternalMapping) -> None:
+        self.mappings[(mapping.tenant_id, mapping.destination, mapping.listing_id)] = mapping
+
+    def credential(self, d: Delivery) -> AgentCredential | None:
+        return self.credentials.get(_agent_key(d))
+
+    def identity(self, d: Delivery) -> AgentExternalIdentity | None:
+        return self.identities.get(_agent_key(d))
+
+    def secrets(self, d: Delivery) -> dict | None:
+        key = _agent_key(d)
+        if key not in self._secrets:
+            cred = self.credentials.get(key)
+            if cred is None:
+                return None
+            self._secrets[key] = decrypt_json(cred.secret_ciphertext)
+        return self._secrets[key]
+
+
+async def prepare_publish_batch(db: AsyncSession, delivery_ids: Iterable[str]) -> PublishBatch:
+    """
+    Load deliveries with their listings, external mappings, active credentials and active
+    external identities: one query per table, whatever the number of deliveries.
+    """
+    batch = PublishBatch()
+    ids = list(dict.fromkeys(delivery_ids))
+    if not ids:
+        return batch
+
+    rows = (await db.execute(select(Delivery).where(Delivery.id.in_(ids)))).scalars().all()
+    batch.deliveries = {d.id: d for d in rows}
+    if not rows:
+        return batch
+
+    listing_ids = {d.listing_id for d in rows}
+    mapping_keys = {_mapping_key(d) for d in rows}
+    agent_keys = {_agent_key(d) for d in rows}
+
+    listings = (await db.execute(select(Listing).where(Listing.id.in_(listing_ids)))).scalars().all()
+    batch.listings = {listing.id: listing for listing in listings}
+
+    m = ListingExternalMapping
+    for mapping in (await db.execute(
+        select(m).where(tuple_(m.tenant_id, m.destination, m.listing_id).in_(mapping_keys))
+    )).scalars():
+        batch.add_mapping(mapping)
+
+    c = AgentCredential
+    for cred in (await db.execute(
+        select(c).where(
+            tuple_(c.tenant_id, c.partner_id, c.agent_id, c.destination).in_(agent_keys),
+            c.is_active.is_(True),
+        )
+    )).scalars():
+        batch.credentials[(cred.tenant_id, cred.partner_id, cred.agent_id, cred.destination)] = cred
+
+    i = AgentExternalIdentity
+    for ident in (await db.execute(
+        select(i).where(
+            tuple_(i.tenant_id, i.partner_id, i.agent_id, i.destination).in_(agent_keys),
+            i.is_active.is_(True),
+        )
+    )).scalars():
+        batch.identities[(ident.tenant_id, ident.partner_id, ident.agent_id, ident.destination)] = ident
+
+    return batch
+
+
+def project_listing(
+    listing: Listing,
+    *,
+    tenant_id: str,
+    partner_id: str,
+    agent_id: str,
+    destination: str,
+    mapping: ListingExternalMapping | None,
+    ext_agent: AgentExternalIdentity | None,
+) -> tuple[dict, str | None]:
+    """
+    Project an already loaded listing for a destination; no queries.
+    """
+    canonical = load_stored_listing(listing)
+
+    projector = get_projector(destination)
+
+    projected = projector.project_listing(
+        canonical=canonical,
+        ctx=ProjectionContext(
+            tenant_id=tenant_id,
+            partner_id=partner_id,
+            agent_id=agent_id,
+            destination=destination,
+            external_agent_id=ext_agent.external_agent_id if ext_agent else None,
+            external_listing_id=mapping.external_listing_id if mapping else None,
+        )
+    )
+
+    return projected, (mapping.external_listing_id if mapping else None)
+
+
+def project_delivery(batch: PublishBatch, d: Delivery) -> tuple[dict, str | None]:
+    """
+    build_projected_payload() from a prepared batch.
+    """
+    return project_listing(
+        batch.listings[d.listing_id],
+        tenant_id=d.tenant_id,
+        partner_id=d.partner_id,
+        agent_id=d.agent_id,
+        destination=d.destination,
+        mapping=batch.mapping(d),
+        ext_agent=batch.identity(d),
+    )
+
 
 async def _project_listing(
     db: AsyncSession,
@@ -24,8 +176,6 @@ async def _project_listing(
 ) -> tuple[dict, str | None]:
     listing = (await db.execute(select(Listing).where(Listing.id == listing_id))).scalar_one()
 
-    canonical = ListingCanonicalV1.model_validate(listing.payload)
-
     mapping = (await db.execute(
         select(ListingExternalMapping).where(
             ListingExternalMapping.tenant_id == tenant_id,
@@ -44,22 +194,16 @@ async def _project_listing(
         )
     )).scalar_one_or_none()
 
-    projector = get_projector(destination)
-
-    projected = projector.project_listing(
-        canonical=canonical,
-        ctx=ProjectionContext(
-            tenant_id=tenant_id,
-            partner_id=partner_id,
-            agent_id=agent_id,
-            destination=destination,
-            external_agent_id=ext_agent.external_agent_id if ext_agent else None,
-            external_listing_id=mapping.external_listing_id if mapping else None,
-        )
+    return project_listing(
+        listing,
+        tenant_id=tenant_id,
+        partner_id=partner_id,
+        agent_id=agent_id,
+        destination=destination,
+        mapping=mapping,
+        ext_agent=ext_agent,
     )
 
-    return projected, (mapping.external_listing_id if mapping else None)
-
 
 async def build_projected_payload(
     db: AsyncSession,
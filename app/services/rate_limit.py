@@ -1,29 +1,150 @@
 from __future__ import annotations
+import math
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 
 import redis.asyncio as redis
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+# GCRA token bucket, evaluated atomically on the Redis server in one round trip.
+# The bucket is a single "theoretical arrival time" (TAT, µs) per key; its TTL is set in
+# the same script, so a key can never be left without expiry.
+#   KEYS[1] bucket key
+#   ARGV[1] emission interval (µs per token), ARGV[2] burst (bucket size), ARGV[3] tokens wanted
+# Returns {granted, remaining, retry_after_us, reset_after_us}; grants up to ARGV[3] tokens.
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2]) * interval
+local wanted = tonumber(ARGV[3])
+
+local tat = now
+local stored = redis.call('GET', KEYS[1])
+if stored then
+  tat = math.max(tonumber(stored), now)
+end
+
+local available = math.floor((now + capacity - tat) / interval)
+if available < 1 then
+  return {0, 0, tat + interval - capacity - now, tat - now}
+end
+
+local granted = math.min(wanted, available)
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], string.format('%.0f', tat), 'PX', string.format('%.0f', math.ceil((tat - now) / 1000)))
+return {granted, available - granted, 0, tat - now}
+"""
+
 
 @dataclass(frozen=True)
 class RateLimitResult:
     allowed: bool
     remaining: int
+    reset_seconds: int  # until the bucket is full again
+    retry_after_seconds: int = 0  # when denied: until the next request is allowed
+
+
+@dataclass
+class _Lease:
+    tokens: int
+    remaining: int
     reset_seconds: int
+    expires_at: float
+
 
 class TokenRateLimiter:
-    def __init__(self, redis_url: str):
+    """
+    `limit` requests per `window_seconds`, smoothed (GCRA): a full bucket allows a burst of
+    `limit`, then one request every window/limit; no 2x burst at window edges.
+
+    local_fraction > 0 enables a per-process pre-check: each Redis call asks for up to
+    ceil(limit * local_fraction) tokens and the spare ones are spent locally, without Redis,
+    for at most local_ttl_seconds. Unspent leases are simply lost, so this can only make
+    limiting stricter, never looser.
+    """
+
+    def __init__(self, redis_url: str, *, local_fraction: float = 0.0, local_ttl_seconds: float = 1.0):
         self.r = redis.from_url(redis_url, decode_responses=True)
+        self._script = self.r.register_script(_GCRA_LUA)
+        self.local_fraction = local_fraction
+        self.local_ttl_seconds = local_ttl_seconds
+        self._leases: dict[str, _Lease] = {}
+
+    def _take_local(self, key: str, now: float) -> RateLimitResult | None:
+        lease = self._leases.get(key)
+        if lease is None or lease.tokens <= 0 or lease.expires_at <= now:
+            return None
+        lease.tokens -= 1
+        return RateLimitResult(allowed=True, remaining=lease.remaining + lease.tokens, reset_seconds=lease.reset_seconds)
+
+    def _prune_leases(self, now: float) -> None:
+        if len(self._leases) > 10_000:
+            self._leases = {k: v for k, v in self._leases.items() if v.expires_at > now and v.tokens > 0}
 
     async def allow(self, *, key: str, limit: int, window_seconds: int) -> RateLimitResult:
-        now = int(time.time())
-        window = now // window_seconds
-        rkey = f"rl:{key}:{window}"
-
-        # INCR with expiry
-        val = await self.r.incr(rkey)
-        if val == 1:
-            await self.r.expire(rkey, window_seconds)
-
-        remaining = max(0, limit - val)
-        reset = window_seconds - (now % window_seconds)
-        return RateLimitResult(allowed=val <= limit, remaining=remaining, reset_seconds=reset)
+        now = time.monotonic()
+        local = self._take_local(key, now)
+        if local is not None:
+            return local
+
+        batch = max(1, math.ceil(limit * self.local_fraction)) if self.local_fraction > 0 else 1
+        interval_us = max(1, (window_seconds * 1_000_000) // max(1, limit))
+        granted, remaining, retry_us, reset_us = await self._script(
+            keys=[f"rl:gcra:{key}"],
+            args=[interval_us, limit, batch],
+        )
+
+        reset = math.ceil(int(reset_us) / 1_000_000)
+        if int(granted) < 1:
+            return RateLimitResult(
+                allowed=False,
+                remaining=0,
+                reset_seconds=reset,
+                retry_after_seconds=max(1, math.ceil(int(retry_us) / 1_000_000)),
+            )
+
+        if int(granted) > 1:
+            self._prune_leases(now)
+            self._leases[key] = _Lease(
+                tokens=int(granted) - 1,
+                remaining=int(remaining),
+                reset_seconds=reset,
+                expires_at=now + self.local_ttl_seconds,
+            )
+        return RateLimitResult(allowed=True, remaining=int(remaining) + int(granted) - 1, reset_seconds=reset)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> TokenRateLimiter:
+    """
+    Process-wide limiter (one Redis pool), shared by the public feed and ingest endpoints.
+    """
+    return TokenRateLimiter(
+        settings.redis_url,
+        local_fraction=settings.rate_limit_local_fraction,
+        local_ttl_seconds=settings.rate_limit_local_ttl_seconds,
+    )
+
+
+async def enforce_rate_limit(*, key: str, limit: int, window_seconds: int = 60) -> dict[str, str]:
+    """
+    Raise 429 (with Retry-After) when `key` is over its limit, else return X-RateLimit-* headers.
+    """
+    rl = await get_rate_limiter().allow(key=key, limit=limit, window_seconds=window_seconds)
+    if not rl.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(rl.retry_after_seconds)},
+        )
+
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(rl.remaining),
+        "X-RateLimit-Reset": str(rl.reset_seconds),
+    }
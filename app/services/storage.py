@@ -1,19 +1,283 @@
 from __future__ import annotations
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import AsyncIterator, Iterator, Protocol
 from urllib.parse import urlparse
 
+import anyio
+
+from app.core.config import settings
+
+
+# Content-addressed objects live under "<prefix>/sha256/<hex>.<ext>"
+CAS_DIR = "sha256"
+
+# Read size for streamed responses
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    uri: str
+    size_bytes: int
+    sha256: str
+
+
+class ObjectSink(Protocol):
+    """
+    Streaming writer for one content-addressed object. The key is only known on commit().
+    """
+    def write(self, data: bytes) -> None:
+        ...
+
+    def commit(self) -> StoredObject:
+        ...
+
+    def abort(self) -> None:
+        ...
+
+
+class ObjectStore(Protocol):
+    """
+    Where feed snapshots live. Implementations must be picklable (sinks are opened in
+    build worker processes too).
+    """
+    def open_sink(self, *, prefix: str, ext: str) -> ObjectSink:
+        ...
+
+    def put_bytes(self, *, key: str, data: bytes) -> str:
+        ...
+
+    def put_content_addressed(self, *, prefix: str, data: bytes, ext: str, digest: str | None = None) -> str:
+        ...
+
+    def local_path(self, uri: str) -> Path | None:
+        """
+        Filesystem path when the object is directly servable from this node, else None.
+        """
+        ...
+
+    async def size(self, uri: str) -> int | None:
+        ...
+
+    def read_bytes(self, uri: str) -> bytes | None:
+        """
+        Whole (small) object, blocking; None if absent. Feeds themselves go through iter_bytes.
+        """
+        ...
+
+    def iter_bytes(self, uri: str, *, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        """
+        Stream bytes [start, end] (inclusive, HTTP Range semantics) without loading the object.
+        """
+        ...
+
+    def presigned_url(
+        self,
+        uri: str,
+        *,
+        expires_seconds: int,
+        response_headers: dict[str, str] | None = None,
+    ) -> str | None:
+        """
+        Time-limited direct download URL, or None when the backend cannot hand one out.
+        """
+        ...
+
+    def iter_content_addressed(self) -> Iterator[tuple[str, float]]:
+        """
+        (key, mtime) of every content-addressed object and leftover upload temp object.
+        """
+        ...
+
+    def key_for_uri(self, uri: str) -> str | None:
+        ...
+
+    def modified_at(self, key: str) -> float | None:
+        """
+        mtime of one object (bumped when a content-addressed object is reused), None if absent.
+        """
+        ...
+
+    def delete_key(self, key: str) -> bool:
+        ...
+
+
+def _cas_key(prefix: str, digest: str, ext: str) -> str:
+    return f"{prefix.strip('/')}/{CAS_DIR}/{digest}.{ext}"
+
+
+class _LocalSink:
+    def __init__(self, store: LocalObjectStore, *, prefix: str, ext: str):
+        self.store = store
+        self.prefix = prefix
+        self.ext = ext
+        self.hash = hashlib.sha256()
+        self.size = 0
+        tmp_dir = store.base / prefix.strip("/") / CAS_DIR
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp = tmp_dir / f".upload.{uuid.uuid4().hex}.tmp"
+        self.f = open(self.tmp, "wb")
+
+    def write(self, data: bytes) -> None:
+        if data:
+            self.f.write(data)
+            self.hash.update(data)
+            self.size += len(data)
+
+    def commit(self) -> StoredObject:
+        digest = self.hash.hexdigest()
+        path = self.store.base / _cas_key(self.prefix, digest, self.ext)
+        try:
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.f.close()
+            if path.exists():
+                # identical content already stored: keep it, drop ours
+                os.utime(path)
+                self.tmp.unlink(missing_ok=True)
+            else:
+                os.replace(self.tmp, path)
+                self.store._fsync_dir(path.parent)
+        except BaseException:
+            self.abort()
+            raise
+        return StoredObject(uri=self.store._uri(path), size_bytes=self.size, sha256=digest)
+
+    def abort(self) -> None:
+        if not self.f.closed:
+            self.f.close()
+        self.tmp.unlink(missing_ok=True)
+
 
 class LocalObjectStore:
     def __init__(self, base_dir: str):
-        self.base = Path(base_dir)
+        # absolute: "file://" URIs of a relative base would parse its first segment as a host
+        self.base = Path(base_dir).resolve()
         self.base.mkdir(parents=True, exist_ok=True)
 
+    def _uri(self, path: Path) -> str:
+        return f"file://{path.as_posix()}"
+
+    def _fsync_dir(self, directory: Path) -> None:
+        # persist a rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """
+        temp file in the same directory + fsync + rename: readers see the old file or the new one,
+        never a partial write.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._fsync_dir(path.parent)
+
+    def open_sink(self, *, prefix: str, ext: str) -> ObjectSink:
+        return _LocalSink(self, prefix=prefix, ext=ext)
+
     def put_bytes(self, *, key: str, data: bytes) -> str:
         path = self.base / key
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_bytes(data)
-        return f"file://{path.as_posix()}"
-    
+        self._write_atomic(path, data)
+        return self._uri(path)
+
+    def put_content_addressed(self, *, prefix: str, data: bytes, ext: str, digest: str | None = None) -> str:
+        """
+        Store `data` under "<prefix>/sha256/<sha256>.<ext>" and return its URI.
+        Identical content dedupes: an existing object is reused, not rewritten.
+        """
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self.base / _cas_key(prefix, digest, ext)
+        try:
+            if path.stat().st_size == len(data):
+                # refresh mtime so GC's grace period also covers a re-referenced object
+                os.utime(path)
+                return self._uri(path)
+        except FileNotFoundError:
+            pass
+        self._write_atomic(path, data)
+        return self._uri(path)
+
+    def local_path(self, uri: str) -> Path | None:
+        return self.resolve_path(uri)
+
+    async def size(self, uri: str) -> int | None:
+        try:
+            return self.resolve_path(uri).stat().st_size
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def read_bytes(self, uri: str) -> bytes | None:
+        try:
+            return self.resolve_path(uri).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def iter_bytes(self, uri: str, *, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        remaining = None if end is None else end - start + 1
+        async with await anyio.open_file(self.resolve_path(uri), "rb") as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                n = READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining)
+                chunk = await f.read(n)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def presigned_url(
+        self,
+        uri: str,
+        *,
+        expires_seconds: int,
+        response_headers: dict[str, str] | None = None,
+    ) -> str | None:
+        return None
+
+    def iter_content_addressed(self) -> Iterator[tuple[str, float]]:
+        for p in self.base.rglob(f"{CAS_DIR}/*"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if p.is_file():
+                yield p.relative_to(self.base).as_posix(), st.st_mtime
+
+    def key_for_uri(self, uri: str) -> str | None:
+        try:
+            return self.resolve_path(uri).relative_to(self.base).as_posix()
+        except ValueError:
+            return None
+
+    def modified_at(self, key: str) -> float | None:
+        try:
+            return (self.base / key).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def delete_key(self, key: str) -> bool:
+        try:
+            (self.base / key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
     def resolve_path(self, uri: str) -> Path:
         """
         Resolve a storage URI to a local filesystem path.
@@ -35,3 +299,16 @@ class LocalObjectStore:
             return self.base / p
 
         raise ValueError(f"Unsupported storage scheme: {parsed.scheme}")
+
+
+def get_object_store() -> ObjectStore:
+    """
+    Object store configured by settings.feed_storage_backend ("local" | "s3").
+    """
+    backend = (settings.feed_storage_backend or "local").lower().strip()
+    if backend == "local":
+        return LocalObjectStore(settings.feed_storage_dir)
+    if backend == "s3":
+        from app.services.storage_s3 import S3ObjectStore
+        return S3ObjectStore.from_settings()
+    raise ValueError(f"Unknown feed_storage_backend: {backend}")
@@ -0,0 +1,397 @@
+from __future__ import annotations
+import hashlib
+import hmac
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import quote, urlparse
+
+import httpx
+
+from app.core.config import settings
+from app.services.storage import CAS_DIR, READ_CHUNK_SIZE, StoredObject, _cas_key
+
+
+_S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+_UNSIGNED = "UNSIGNED-PAYLOAD"
+
+# In-flight multipart uploads are assembled here, then copied to their content address
+TMP_DIR = "tmp"
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class S3Error(RuntimeError):
+    def __init__(self, op: str, status_code: int, body: str):
+        super().__init__(f"s3 {op} failed: HTTP {status_code}: {body[:300]}")
+        self.status_code = status_code
+
+
+def _q(s: str, safe: str = "-_.~") -> str:
+    return quote(s, safe=safe)
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+class _S3Sink:
+    """
+    Multipart upload fed chunk by chunk; at most one part is buffered in memory.
+    Small objects (a single part) skip multipart and are PUT straight to their content address.
+    """
+
+    def __init__(self, store: S3ObjectStore, *, prefix: str, ext: str):
+        self.store = store
+        self.prefix = prefix
+        self.ext = ext
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.buf = bytearray()
+        self.tmp_key = store._key(f"{prefix.strip('/')}/{TMP_DIR}/{uuid.uuid4().hex}.{ext}")
+        self.upload_id: str | None = None
+        self.parts: list[tuple[int, str]] = []
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.hash.update(data)
+        self.size += len(data)
+        self.buf += data
+        part_size = self.store.part_size
+        while len(self.buf) >= part_size:
+            self._upload_part(bytes(self.buf[:part_size]))
+            del self.buf[:part_size]
+
+    def _upload_part(self, data: bytes) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.store._create_multipart(self.tmp_key)
+        number = len(self.parts) + 1
+        self.parts.append((number, self.store._upload_part(self.tmp_key, self.upload_id, number, data)))
+
+    def commit(self) -> StoredObject:
+        digest = self.hash.hexdigest()
+        final_key = self.store._key(_cas_key(self.prefix, digest, self.ext))
+        try:
+            exists = self.store._head(final_key) is not None
+            if self.upload_id is None:
+                if not exists:
+                    self.store._put(final_key, bytes(self.buf))
+            else:
+                if self.buf:
+                    self._upload_part(bytes(self.buf))
+                self.store._complete_multipart(self.tmp_key, self.upload_id, self.parts)
+                self.upload_id = None
+                if not exists:
+                    self.store._copy(self.tmp_key, final_key)
+                self.store._delete(self.tmp_key)
+            if exists:
+                # identical content already stored: refresh its age for GC
+                self.store._touch(final_key)
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self.buf = bytearray()
+        return StoredObject(uri=self.store._uri(final_key), size_bytes=self.size, sha256=digest)
+
+    def abort(self) -> None:
+        if self.upload_id is not None:
+            try:
+                self.store._abort_multipart(self.tmp_key, self.upload_id)
+            finally:
+                self.upload_id = None
+        self.buf = bytearray()
+
+
+class S3ObjectStore:
+    """
+    S3-compatible object store (AWS S3, MinIO, ...) using path-style requests signed with SigV4.
+    Writes are synchronous (they run in feed build workers); reads are async (API tier).
+    """
+
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        bucket: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+        key_prefix: str = "",
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.host = urlparse(self.endpoint_url).netloc
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.key_prefix = key_prefix.strip("/")
+        self.part_size = max(MIN_PART_SIZE, part_size)
+        self._client: httpx.Client | None = None
+        self._aclient: httpx.AsyncClient | None = None
+
+    @classmethod
+    def from_settings(cls) -> S3ObjectStore:
+        return cls(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.s3_bucket,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key.get_secret_value(),
+            key_prefix=settings.s3_key_prefix,
+            part_size=settings.s3_part_size_bytes,
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        # HTTP clients are per process; recreated lazily after unpickling
+        state = dict(self.__dict__)
+        state["_client"] = None
+        state["_aclient"] = None
+        return state
+
+    # --- keys / URIs ---
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}/{key}" if self.key_prefix else key
+
+    def _uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def key_for_uri(self, uri: str) -> str | None:
+        parsed = urlparse(uri)
+        if parsed.scheme != "s3" or parsed.netloc != self.bucket:
+            return None
+        return parsed.path.lstrip("/")
+
+    def _path(self, key: str) -> str:
+        return f"/{_q(self.bucket)}/{_q(key, safe='/-_.~')}"
+
+    # --- SigV4 ---
+
+    def _signing_key(self, datestamp: str) -> bytes:
+        k = _hmac(("AWS4" + self.secret_access_key).encode("utf-8"), datestamp)
+        k = _hmac(k, self.region)
+        k = _hmac(k, "s3")
+        return _hmac(k, "aws4_request")
+
+    def _canonical_query(self, query: dict[str, str]) -> str:
+        return "&".join(f"{_q(k)}={_q(v)}" for k, v in sorted(query.items()))
+
+    def _signature(self, method: str, path: str, query: str, headers: dict[str, str], payload_hash: str, now: datetime) -> tuple[str, str]:
+        signed = sorted(headers)
+        canonical_headers = "".join(f"{h}:{headers[h].strip()}\n" for h in signed)
+        signed_headers = ";".join(signed)
+        canonical_request = "\n".join([method, path, query, canonical_headers, signed_headers, payload_hash])
+        scope = f"{now:%Y%m%d}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            f"{now:%Y%m%dT%H%M%SZ}",
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        sig = hmac.new(self._signing_key(f"{now:%Y%m%d}"), string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        return sig, signed_headers
+
+    def _signed(
+        self,
+        method: str,
+        key: str | None,
+        *,
+        query: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        payload_hash: str = _EMPTY_SHA256,
+    ) -> tuple[str, dict[str, str]]:
+        now = datetime.now(timezone.utc)
+        path = self._path(key) if key is not None else f"/{_q(self.bucket)}"
+        qs = self._canonical_query(query or {})
+        hdrs = {k.lower(): v for k, v in (headers or {}).items()}
+        hdrs["host"] = self.host
+        hdrs["x-amz-date"] = f"{now:%Y%m%dT%H%M%SZ}"
+        hdrs["x-amz-content-sha256"] = payload_hash
+        sig, signed_headers = self._signature(method, path, qs, hdrs, payload_hash, now)
+        hdrs["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{now:%Y%m%d}/{self.region}/s3/aws4_request, "
+            f"SignedHeaders={signed_headers}, Signature={sig}"
+        )
+        del hdrs["host"]  # httpx sets it
+        url = f"{self.endpoint_url}{path}" + (f"?{qs}" if qs else "")
+        return url, hdrs
+
+    def presigned_url(
+        self,
+        uri: str,
+        *,
+        expires_seconds: int,
+        response_headers: dict[str, str] | None = None,
+    ) -> str | None:
+        """
+        Time-limited GET URL. `response_headers` become response-* overrides
+        (e.g. {"content-type": ..., "content-encoding": "gzip"}), signed with the URL.
+        """
+        key = self.key_for_uri(uri)
+        if key is None:
+            return None
+        now = datetime.now(timezone.utc)
+        path = self._path(key)
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{now:%Y%m%d}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": f"{now:%Y%m%dT%H%M%SZ}",
+            "X-Amz-Expires": str(expires_seconds),
+            "X-Amz-SignedHeaders": "host",
+        }
+        for name, value in (response_headers or {}).items():
+            query[f"response-{name.lower()}"] = value
+        qs = self._canonical_query(query)
+        sig, _ = self._signature("GET", path, qs, {"host": self.host}, _UNSIGNED, now)
+        return f"{self.endpoint_url}{path}?{qs}&X-Amz-Signature={sig}"
+
+    # --- sync operations (writers, GC) ---
+
+    def _http(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=60.0)
+        return self._client
+
+    def _request(self, op: str, method: str, key: str | None, *, ok: tuple[int, ...] = (200,), body: bytes = b"", **kw) -> httpx.Response:
+        payload_hash = hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256
+        url, headers = self._signed(method, key, payload_hash=payload_hash, **kw)
+        r = self._http().request(method, url, headers=headers, content=body or None)
+        if r.status_code not in ok:
+            raise S3Error(op, r.status_code, r.text)
+        return r
+
+    def _put(self, key: str, data: bytes) -> None:
+        self._request("put", "PUT", key, body=data)
+
+    def _head(self, key: str) -> int | None:
+        r = self._request("head", "HEAD", key, ok=(200, 404))
+        return int(r.headers.get("content-length", 0)) if r.status_code == 200 else None
+
+    def _copy(self, src_key: str, dst_key: str, *, replace_metadata: bool = False) -> None:
+        headers = {"x-amz-copy-source": self._path(src_key)}
+        if replace_metadata:
+            headers["x-amz-metadata-directive"] = "REPLACE"
+        self._request("copy", "PUT", dst_key, headers=headers)
+
+    def _touch(self, key: str) -> None:
+        # copy-onto-itself is the S3 way to bump LastModified
+        self._copy(key, key, replace_metadata=True)
+
+    def _delete(self, key: str) -> None:
+        self._request("delete", "DELETE", key, ok=(200, 204, 404))
+
+    def _create_multipart(self, key: str) -> str:
+        r = self._request("create_multipart", "POST", key, query={"uploads": ""})
+        upload_id = ET.fromstring(r.content).findtext(f"{_S3_NS}UploadId")
+        if not upload_id:
+            raise S3Error("create_multipart", r.status_code, r.text)
+        return upload_id
+
+    def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        r = self._request("upload_part", "PUT", key, query={"partNumber": str(number), "uploadId": upload_id}, body=data)
+        return r.headers["etag"]
+
+    def _complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        body = "<CompleteMultipartUpload>" + "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in parts
+        ) + "</CompleteMultipartUpload>"
+        r = self._request("complete_multipart", "POST", key, query={"uploadId": upload_id}, body=body.encode("utf-8"))
+        # S3 may report a failed completion with HTTP 200 and an <Error> body
+        if b"<Error>" in r.content:
+            raise S3Error("complete_multipart", r.status_code, r.text)
+
+    def _abort_multipart(self, key: str, upload_id: str) -> None:
+        self._request("abort_multipart", "DELETE", key, query={"uploadId": upload_id}, ok=(200, 204, 404))
+
+    def open_sink(self, *, prefix: str, ext: str) -> _S3Sink:
+        return _S3Sink(self, prefix=prefix, ext=ext)
+
+    def put_bytes(self, *, key: str, data: bytes) -> str:
+        k = self._key(key)
+        self._put(k, data)
+        return self._uri(k)
+
+    def put_content_addressed(self, *, prefix: str, data: bytes, ext: str, digest: str | None = None) -> str:
+        sink = self.open_sink(prefix=prefix, ext=ext)
+        sink.write(data)
+        return sink.commit().uri
+
+    def iter_content_addressed(self) -> Iterator[tuple[str, float]]:
+        token: str | None = None
+        while True:
+            query = {"list-type": "2"}
+            if self.key_prefix:
+                query["prefix"] = f"{self.key_prefix}/"
+            if token:
+                query["continuation-token"] = token
+            root = ET.fromstring(self._request("list", "GET", None, query=query).content)
+            for item in root.iter(f"{_S3_NS}Contents"):
+                key = item.findtext(f"{_S3_NS}Key") or ""
+                if f"/{CAS_DIR}/" not in key and f"/{TMP_DIR}/" not in key:
+                    continue
+                modified = item.findtext(f"{_S3_NS}LastModified") or ""
+                yield key, datetime.fromisoformat(modified.replace("Z", "+00:00")).timestamp()
+            if (root.findtext(f"{_S3_NS}IsTruncated") or "").lower() != "true":
+                return
+            token = root.findtext(f"{_S3_NS}NextContinuationToken")
+
+    def read_bytes(self, uri: str) -> bytes | None:
+        key = self.key_for_uri(uri)
+        if key is None:
+            raise ValueError(f"Not an object of this store: {uri}")
+        r = self._request("get", "GET", key, ok=(200, 404))
+        return r.content if r.status_code == 200 else None
+
+    def modified_at(self, key: str) -> float | None:
+        r = self._request("head", "HEAD", key, ok=(200, 404))
+        if r.status_code != 200:
+            return None
+        return parsedate_to_datetime(r.headers["last-modified"]).timestamp()
+
+    def delete_key(self, key: str) -> bool:
+        self._delete(key)
+        return True
+
+    # --- async operations (public feed tier) ---
+
+    def _ahttp(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(timeout=60.0)
+        return self._aclient
+
+    def local_path(self, uri: str) -> Path | None:
+        return None
+
+    async def size(self, uri: str) -> int | None:
+        key = self.key_for_uri(uri)
+        if key is None:
+            return None
+        url, headers = self._signed("HEAD", key)
+        r = await self._ahttp().head(url, headers=headers)
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise S3Error("head", r.status_code, r.text)
+        return int(r.headers.get("content-length", 0))
+
+    async def iter_bytes(self, uri: str, *, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        key = self.key_for_uri(uri)
+        if key is None:
+            raise ValueError(f"Not an object of this store: {uri}")
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        url, signed = self._signed("GET", key, headers=headers, payload_hash=_UNSIGNED)
+        async with self._ahttp().stream("GET", url, headers=signed) as r:
+            if r.status_code not in (200, 206):
+                await r.aread()
+                raise S3Error("get", r.status_code, r.text)
+            async for chunk in r.aiter_bytes(READ_CHUNK_SIZE):
+                yield chunk
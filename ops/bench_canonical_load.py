@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Any
+
+from app.canonical.trusted import load_canonical, view_class
+from app.canonical.v1.listing import ListingCanonicalV1
+from app.services.canonical_validate import validate_and_normalize_canonical
+
+
+SCHEMA = "canonical.listing"
+VERSION = "1.0"
+
+
+def _payload(i: int) -> dict[str, Any]:
+    return {
+        "schema": SCHEMA,
+        "schema_version": VERSION,
+        "canonical_id": f"lst_{i:08d}",
+        "source_listing_id": f"src-{i}",
+        "status": "active" if i % 5 else "sold",
+        "purpose": "sale",
+        "title": f"3+1 apartment #{i}",
+        "description": "Sea view, close to amenities. " * 8,
+        "address": {"line1": f"{i} Main St", "area": "Gonyeli", "city": "Nicosia", "country": "CY", "lat": 35.2, "lng": 33.3},
+        "property": {"category": "apartment", "bedrooms": 3, "bathrooms": 2, "area_m2": 120, "year_built": 2015},
+        "list_price": {"currency": "EUR", "amount": 150_000_00 + i},
+        "pricing_rules": [
+            {"kind": "timed_offer", "price": {"currency": "EUR", "amount": 140_000_00},
+             "starts_at": "2026-01-01T00:00:00Z", "ends_at": "2026-02-01T00:00:00Z"},
+        ],
+        "media": [
+            {"id": f"m{j}", "type": "image", "url": f"https://cdn.example.com/{i}/{j}.jpg", "order": j}
+            for j in range(8)
+        ],
+        "attributes": {"pool": True, "parking": 1},
+    }
+
+
+def _stored_rows(n: int) -> list[tuple[dict[str, Any], str]]:
+    # What the write path persists: normalized payload + prefixed content hash
+    rows = []
+    for i in range(n):
+        res = validate_and_normalize_canonical(schema=SCHEMA, schema_version=VERSION, payload=_payload(i))
+        assert res.ok and res.normalized is not None
+        rows.append((res.normalized, "sha256:" + str(res.content_hash)))
+    return rows
+
+
+def _read_like_a_feed(can: Any) -> tuple:
+    # What hosted feed writers / mapping checks typically touch per listing
+    images = sorted((m for m in can.media if m.type == "image"), key=lambda m: (m.order, m.id))
+    return (
+        can.canonical_id,
+        can.source_listing_id,
+        can.status,
+        can.title,
+        can.description,
+        can.property.category if can.property else None,
+        can.property.bedrooms if can.property else None,
+        can.list_price.amount if can.list_price else None,
+        can.list_price.currency if can.list_price else None,
+        can.address.city if can.address else None,
+        can.address.area if can.address else None,
+        [str(m.url) for m in images],
+    )
+
+
+def _timed(label: str, fn, rows) -> float:
+    t0 = time.perf_counter()
+    for payload, ch in rows:
+        fn(payload, ch)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<24} {elapsed:8.3f}s  {elapsed / len(rows) * 1e6:8.1f} us/listing")
+    return elapsed
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Benchmark validated vs trusted loading of stored canonical listings.")
+    p.add_argument("--n", type=int, default=100_000, help="listings in the simulated partner scan")
+    p.add_argument("--check", type=int, default=1000, help="listings to compare field-by-field (0 = skip)")
+    args = p.parse_args()
+
+    print(f"preparing {args.n} stored listings ...", file=sys.stderr)
+    rows = _stored_rows(args.n)
+
+    # Equivalence: a trusted view must read and dump like a validated model
+    View = view_class(ListingCanonicalV1)
+    for payload, _ in rows[: args.check]:
+        model, view = ListingCanonicalV1.model_validate(payload), View(payload)
+        if (
+            _read_like_a_feed(model) != _read_like_a_feed(view)
+            or model.model_dump(mode="json", exclude_none=True) != view.model_dump(mode="json", exclude_none=True)
+        ):
+            print(f"MISMATCH for {payload['canonical_id']}", file=sys.stderr)
+            return 1
+
+    def trusted(payload, ch):
+        return load_canonical(schema=SCHEMA, schema_version=VERSION, payload=payload, content_hash=ch)
+
+    validated = _timed("model_validate", lambda payload, _ch: ListingCanonicalV1.model_validate(payload), rows)
+    loaded = _timed("trusted", trusted, rows)
+    validated_read = _timed(
+        "model_validate + read",
+        lambda payload, _ch: _read_like_a_feed(ListingCanonicalV1.model_validate(payload)),
+        rows,
+    )
+    trusted_read = _timed("trusted + read", lambda payload, ch: _read_like_a_feed(trusted(payload, ch)), rows)
+
+    print(f"speedup (load)           {validated / loaded:8.2f}x")
+    print(f"speedup (load + read)    {validated_read / trusted_read:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
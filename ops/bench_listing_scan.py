@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.ids import gen_id
+from app.models.agent import Agent
+from app.models.listing import Listing
+from app.models.partner import Partner
+from app.models.tenant import Tenant
+from app.services.canonical_validate import validate_and_normalize_canonical
+from app.services.listing_scan import iter_partner_listings
+
+
+MODES = ("all", "stream", "project")
+PROJECTED_PATHS = ("status", "address", "list_price")
+SEED_BATCH = 2000
+
+
+def _payload(i: int) -> dict:
+    return {
+        "canonical_id": f"bench_{i:08d}",
+        "source_listing_id": f"bench-{i}",
+        "status": "active",
+        "title": f"Bench listing {i}",
+        "description": "Lorem ipsum dolor sit amet. " * 40,
+        "address": {"city": "Nicosia", "area": "Gonyeli"},
+        "property": {"category": "apartment", "bedrooms": 3},
+        "list_price": {"currency": "EUR", "amount": 100_000_00 + i},
+        "media": [{"id": f"m{j}", "url": f"https://cdn.example.com/{i}/{j}.jpg", "order": j} for j in range(10)],
+    }
+
+
+def _rss_peak_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _session() -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    engine = create_async_engine(settings.database_url)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def _seed(n: int) -> tuple[str, str]:
+    engine, Session = _session()
+    tenant_id, partner_id, agent_id = gen_id("tnt"), gen_id("prt"), gen_id("agt")
+    async with Session() as db:
+        db.add(Tenant(id=tenant_id, name="bench", created_by="bench", updated_by="bench"))
+        await db.flush()
+        db.add(Partner(id=partner_id, tenant_id=tenant_id, name="bench", created_by="bench", updated_by="bench"))
+        await db.flush()
+        db.add(Agent(id=agent_id, tenant_id=tenant_id, partner_id=partner_id, email="bench@example.com",
+                     display_name="bench", rules={}, created_by="bench", updated_by="bench"))
+        await db.flush()
+
+        for start in range(0, n, SEED_BATCH):
+            values = []
+            for i in range(start, min(n, start + SEED_BATCH)):
+                res = validate_and_normalize_canonical(schema="canonical.listing", schema_version="1.0", payload=_payload(i))
+                values.append({
+                    "id": gen_id("lst"),
+                    "tenant_id": tenant_id,
+                    "partner_id": partner_id,
+                    "agent_id": agent_id,
+                    "source_listing_id": f"bench-{i}",
+                    "schema": "canonical.listing",
+                    "schema_version": "1.0",
+                    "payload": res.normalized,
+                    "content_hash": "sha256:" + str(res.content_hash),
+                    "created_by": "bench",
+                    "updated_by": "bench",
+                })
+            await db.execute(insert(Listing), values)
+        await db.commit()
+    await engine.dispose()
+    return tenant_id, partner_id
+
+
+async def _cleanup(tenant_id: str, partner_id: str) -> None:
+    engine, Session = _session()
+    async with Session() as db:
+        await db.execute(delete(Listing).where(Listing.partner_id == partner_id))
+        await db.execute(delete(Agent).where(Agent.partner_id == partner_id))
+        await db.execute(delete(Partner).where(Partner.id == partner_id))
+        await db.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        await db.commit()
+    await engine.dispose()
+
+
+async def _scan(mode: str, tenant_id: str, partner_id: str, limit: int, chunk_size: int) -> dict:
+    engine, Session = _session()
+    baseline = _rss_peak_mb()
+    t0 = time.perf_counter()
+    count = 0
+    async with Session() as db:
+        if mode == "all":
+            # What the endpoints used to do
+            rows = (await db.execute(select(Listing).where(
+                Listing.tenant_id == tenant_id,
+                Listing.partner_id == partner_id,
+            ).order_by(Listing.id).limit(limit))).scalars().all()
+            for r in rows:
+                count += bool(r.payload.get("status"))
+        else:
+            paths = PROJECTED_PATHS if mode == "project" else None
+            async for r in iter_partner_listings(
+                db, tenant_id=tenant_id, partner_id=partner_id,
+                payload_paths=paths, chunk_size=chunk_size, limit=limit,
+            ):
+                count += bool(r.payload.get("status"))
+    await engine.dispose()
+    return {
+        "mode": mode,
+        "listings": count,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "rss_peak_mb": round(_rss_peak_mb(), 1),
+        "rss_growth_mb": round(_rss_peak_mb() - baseline, 1),
+    }
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Peak RSS of partner listing scans: .all() vs streaming vs projected.")
+    p.add_argument("--sizes", default="10000,50000,100000", help="comma-separated listing counts")
+    p.add_argument("--chunk-size", type=int, default=settings.listing_scan_chunk_size)
+    p.add_argument("--keep", action="store_true", help="keep the seeded bench partner")
+    # internal: one measurement per fresh process so peak RSS is not shared between runs
+    p.add_argument("--run", choices=MODES)
+    p.add_argument("--tenant")
+    p.add_argument("--partner")
+    p.add_argument("--limit", type=int)
+    args = p.parse_args()
+
+    if args.run:
+        print(json.dumps(asyncio.run(_scan(args.run, args.tenant, args.partner, args.limit, args.chunk_size))))
+        return 0
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    print(f"seeding {sizes[-1]} listings ...", file=sys.stderr)
+    tenant_id, partner_id = asyncio.run(_seed(sizes[-1]))
+    try:
+        print(f"{'listings':>9} {'mode':>8} {'seconds':>8} {'peak MB':>8} {'growth MB':>10}")
+        for n in sizes:
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, "-m", "ops.bench_listing_scan", "--run", mode,
+                     "--tenant", tenant_id, "--partner", partner_id, "--limit", str(n),
+                     "--chunk-size", str(args.chunk_size)],
+                    check=True, capture_output=True, text=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{r['listings']:>9} {mode:>8} {r['seconds']:>8} {r['rss_peak_mb']:>8} {r['rss_growth_mb']:>10}")
+    finally:
+        if not args.keep:
+            asyncio.run(_cleanup(tenant_id, partner_id))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
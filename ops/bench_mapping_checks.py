@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.ids import gen_id
+from app.destinations.evler101.mapping_plugin import Evler101MappingPlugin
+from app.destinations.mapping_base import MappingCheckResult, MappingKeySet
+from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.models.geo_area import GeoArea
+from app.models.geo_city import GeoCity
+from app.models.geo_country import GeoCountry
+
+
+NAMESPACES = ("property_type", "currency", "rooms")
+AREAS_PER_CITY = 25
+
+
+class _BenchPlugin(Evler101MappingPlugin):
+    def __init__(self, destination: str):
+        self.destination = destination
+
+
+async def _check_mappings_n_plus_1(db: AsyncSession, *, dest: str, keys: MappingKeySet) -> MappingCheckResult:
+    # The previous implementation: one query per enum key, up to four per geo key. Geo keys are
+    # compared verbatim with the stored slugs, whereas check_mappings() goes through the folding,
+    # aliasing GeoResolver: both agree only on already-normalized slugs, which is what _seed()
+    # writes (tests/test_mapping_checks.py covers the intended divergence).
+    missing_enum: dict[str, set[str]] = {ns: set() for ns in keys.enum_keys.keys()}
+    missing_geo: set[str] = set()
+    warnings: list[dict] = []
+
+    for ns, skeys in keys.enum_keys.items():
+        for k in skeys:
+            if k.startswith("<"):
+                missing_enum[ns].add(k)
+                continue
+            found = (await db.execute(select(DestinationEnumMapping.destination_value).where(
+                DestinationEnumMapping.destination == dest,
+                DestinationEnumMapping.namespace == ns,
+                DestinationEnumMapping.source_key == k,
+            ))).scalar_one_or_none()
+            if not found:
+                missing_enum[ns].add(k)
+
+    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == "NCY"))).scalar_one_or_none()
+    if not country:
+        missing_geo |= set(keys.geo_keys)
+        warnings.append({"code": "MISSING_COUNTRY_CATALOG", "message": "GeoCountry NCY not found"})
+    else:
+        for key in keys.geo_keys:
+            if ":" not in key:
+                missing_geo.add(key)
+                continue
+            city_slug, area_slug = key.split(":", 1)
+            city = (await db.execute(select(GeoCity).where(
+                GeoCity.country_id == country.id, GeoCity.slug == city_slug,
+            ))).scalar_one_or_none()
+            if not city:
+                missing_geo.add(key)
+                continue
+            area = (await db.execute(select(GeoArea).where(
+                GeoArea.city_id == city.id, GeoArea.slug == area_slug,
+            ))).scalar_one_or_none()
+            if not area:
+                missing_geo.add(key)
+                continue
+            dm = (await db.execute(select(DestinationGeoMapping).where(
+                DestinationGeoMapping.destination == dest,
+                DestinationGeoMapping.geo_area_id == area.id,
+            ))).scalar_one_or_none()
+            if not dm or not dm.destination_area_id:
+                missing_geo.add(key)
+
+    missing = MappingKeySet(enum_keys=missing_enum, geo_keys=missing_geo)
+    ok = all(len(v) == 0 for v in missing_enum.values()) and len(missing_geo) == 0
+    return MappingCheckResult(ok=ok, missing=missing, warnings=warnings)
+
+
+async def _seed(db: AsyncSession, *, dest: str, tag: str, enum_keys: int, geo_keys: int) -> tuple[str | None, MappingKeySet]:
+    """
+    Catalog rows for `dest` (about 80% of the keys mapped) plus the key set to check. Slugs are
+    already in geo_key() form, so both implementations must report the same missing keys.
+    Returns the id of the NCY country when it had to be created.
+    """
+    created_country = None
+    country = (await db.execute(select(GeoCountry).where(GeoCountry.code == "NCY"))).scalar_one_or_none()
+    if country is None:
+        country = GeoCountry(code="NCY", name="North Cyprus")
+        db.add(country)
+        await db.flush()
+        created_country = country.id
+
+    enum: dict[str, set[str]] = {}
+    enum_rows = []
+    for ns in NAMESPACES:
+        enum[ns] = {f"{tag}-{ns}-{i}" for i in range(enum_keys)} | {"<missing>"}
+        enum_rows += [
+            {"id": gen_id("dem"), "destination": dest, "namespace": ns, "source_key": f"{tag}-{ns}-{i}",
+             "destination_value": str(i), "created_by": "bench", "updated_by": "bench"}
+            for i in range(enum_keys) if i % 5
+        ]
+    await db.execute(insert(DestinationEnumMapping), enum_rows)
+
+    cities, areas, mappings, geo = [], [], [], set()
+    for i in range(geo_keys):
+        if i % AREAS_PER_CITY == 0:
+            city_id = gen_id("gcy")
+            city_slug = f"{tag}-city-{i // AREAS_PER_CITY}"
+            cities.append({"id": city_id, "country_id": country.id, "name": city_slug, "slug": city_slug})
+        area_id = gen_id("gar")
+        area_slug = f"{tag}-area-{i}"
+        areas.append({"id": area_id, "city_id": city_id, "name": area_slug, "slug": area_slug})
+        if i % 5:
+            mappings.append({"id": gen_id("dgm"), "destination": dest, "geo_country_id": country.id, "geo_city_id": city_id,
+                             "geo_area_id": area_id, "destination_area_id": str(i), "created_by": "bench", "updated_by": "bench"})
+        geo.add(f"{city_slug}:{area_slug}")
+    geo |= {f"{tag}-nowhere:{tag}-area-0", "no-colon"}
+    await db.execute(insert(GeoCity), cities)
+    await db.execute(insert(GeoArea), areas)
+    await db.execute(insert(DestinationGeoMapping), mappings)
+    await db.commit()
+    return created_country, MappingKeySet(enum_keys=enum, geo_keys=geo)
+
+
+async def _cleanup(db: AsyncSession, *, dest: str, tag: str, created_country: str | None) -> None:
+    await db.execute(delete(DestinationEnumMapping).where(DestinationEnumMapping.destination == dest))
+    await db.execute(delete(DestinationGeoMapping).where(DestinationGeoMapping.destination == dest))
+    city_ids = select(GeoCity.id).where(GeoCity.slug.like(f"{tag}-%"))
+    await db.execute(delete(GeoArea).where(GeoArea.city_id.in_(city_ids)))
+    await db.execute(delete(GeoCity).where(GeoCity.slug.like(f"{tag}-%")))
+    if created_country:
+        await db.execute(delete(GeoCountry).where(GeoCountry.id == created_country))
+    await db.commit()
+
+
+async def _run(enum_keys: int, geo_keys: int, repeat: int) -> int:
+    engine = create_async_engine(settings.database_url)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    tag = f"bench{gen_id('x')[-8:].lower()}"
+    dest = f"bench_{tag}"
+    plugin = _BenchPlugin(dest)
+
+    async with Session() as db:
+        print(f"seeding {enum_keys} enum keys x {len(NAMESPACES)} namespaces, {geo_keys} areas ...", file=sys.stderr)
+        created_country, keys = await _seed(db, dest=dest, tag=tag, enum_keys=enum_keys, geo_keys=geo_keys)
+        try:
+            results = {}
+            print(f"{'impl':<12} {'best s':>8} {'queries':>8}")
+            for label in ("n_plus_1", "set_based"):
+                best = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    if label == "n_plus_1":
+                        res = await _check_mappings_n_plus_1(db, dest=dest, keys=keys)
+                    else:
+                        res = await plugin.check_mappings(db=db, tenant_id="bench", partner_id="bench", keys=keys)
+                    best = min(best, time.perf_counter() - t0)
+                results[label] = res
+                queries = (
+                    sum(len(v) for v in keys.enum_keys.values()) + 1 + 3 * len(keys.geo_keys)
+                    if label == "n_plus_1" else len(NAMESPACES) + 2
+                )
+                print(f"{label:<12} {best:>8.3f} {'~' + str(queries):>8}")
+            if results["n_plus_1"] != results["set_based"]:
+                print("MISMATCH between implementations", file=sys.stderr)
+                return 1
+        finally:
+            await _cleanup(db, dest=dest, tag=tag, created_country=created_country)
+    await engine.dispose()
+    return 0
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Evler101MappingPlugin.check_mappings: set-based vs the previous N+1 queries.")
+    p.add_argument("--enum-keys", type=int, default=50, help="distinct keys per enum namespace")
+    p.add_argument("--geo-keys", type=int, default=500, help="distinct city:area keys")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+    return asyncio.run(_run(args.enum_keys, args.geo_keys, args.repeat))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,72 +1,248 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import gzip
+import hashlib
 import json
 import os
 import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
-import urllib.request
-import urllib.error
+
+import httpx
 
 
 DEFAULT_BASE_URL = os.getenv("HUB_BASE_URL", "http://localhost:8000")
 DEFAULT_ADMIN_KEY = os.getenv("INTERNAL_ADMIN_KEY", "")
 
-DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_TIMEOUT_SECONDS = 120
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_RETRIES = 3
 
 
-def http_post(url: str, payload: dict[str, Any], admin_key: str) -> dict[str, Any]:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url=url,
-        data=data,
-        method="POST",
-        headers={
-            "Content-Type": "application/json",
-            "X-Internal-Admin-Key": admin_key,
-        },
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=DEFAULT_TIMEOUT_SECONDS) as resp:
-            raw = resp.read().decode("utf-8")
-            return json.loads(raw) if raw else {}
-    except urllib.error.HTTPError as e:
-        body = ""
-        try:
-            body = e.read().decode("utf-8")
-        except Exception:
-            body = ""
-        print(f"HTTP {e.code} {e.reason} for {url}", file=sys.stderr)
-        if body:
-            print(body, file=sys.stderr)
-        return {"error": {"status": e.code, "reason": e.reason, "body": body}}
-    except urllib.error.URLError as e:
-        print(f"Network error for {url}: {e}", file=sys.stderr)
-        return {"error": {"reason": str(e)}}
-    
-
-def _infer_kind_from_filename(path: str) -> str:
-    base = os.path.basename(path)
-    return "geo" if base.startswith("areas_") else "enum"
-
-
-def _infer_namespace_from_filename(path: str) -> str | None:
-    base = os.path.basename(path)
+class CatalogImportError(Exception):
+    pass
+
+
+@dataclass
+class CatalogFile:
+    path: Path
+    kind: str  # enum | geo
+    namespace: str | None
+    body: dict[str, Any]
+    sha256: str
+    chunks: list[list[Any]] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return f"enum/{self.namespace}" if self.kind == "enum" else f"geo/{self.body.get('country_code')}"
+
+
+class Checkpoint:
+    """
+    Completed chunks per file, rewritten atomically after each one. A file whose content or
+    chunking changed starts over; the file is removed once every catalog went through.
+    """
+
+    def __init__(self, path: Path, fresh: bool):
+        self.path = path
+        self.files: dict[str, dict[str, Any]] = {}
+        if path.exists() and not fresh:
+            self.files = json.loads(path.read_text(encoding="utf-8")).get("files", {})
+
+    def done(self, cf: CatalogFile, chunk_size: int) -> dict[str, Any]:
+        key = str(cf.path)
+        entry = self.files.get(key)
+        if not entry or entry.get("sha256") != cf.sha256 or entry.get("chunk_size") != chunk_size:
+            entry = self.files[key] = {"sha256": cf.sha256, "chunk_size": chunk_size, "chunks": {}}
+        return entry["chunks"]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"files": self.files}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _infer_kind_from_filename(path: Path) -> str:
+    return "geo" if path.name.startswith("areas_") else "enum"
+
+
+def _infer_namespace_from_filename(path: Path) -> str | None:
+    base = path.name
     if base.startswith("enums_") and base.endswith(".json"):
         return base[len("enums_") : -len(".json")]
     return None
 
 
+def collect_files(paths: list[str]) -> list[Path]:
+    """
+    Catalog files from the given files and directories (*.json directly inside), in name order.
+    """
+    out: list[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            out += sorted(f for f in p.glob("*.json") if f.is_file())
+        else:
+            out.append(p)
+    return out
+
+
+def load_catalog(path: Path, *, kind: str | None, namespace: str | None, chunk_size: int) -> CatalogFile:
+    raw = path.read_bytes()
+    try:
+        body = json.loads(raw)
+    except ValueError as e:
+        raise CatalogImportError(f"{path}: invalid JSON: {e}") from e
+    # basic payload validation
+    if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+        raise CatalogImportError(f"{path}: expected a JSON object with an 'items' list")
+
+    kind = kind or _infer_kind_from_filename(path)
+    ns = (namespace or _infer_namespace_from_filename(path)) if kind == "enum" else None
+    if kind == "enum" and not ns:
+        raise CatalogImportError(f"{path}: enum import requires --namespace or filename enums_<namespace>.json")
+
+    items = body["items"]
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)] or [[]]
+    return CatalogFile(path=path, kind=kind, namespace=ns, body=body, sha256=hashlib.sha256(raw).hexdigest(), chunks=chunks)
+
+
+def endpoint(base_url: str, destination: str, cf: CatalogFile, mode: str) -> str:
+    if cf.kind == "enum":
+        return f"{base_url}/v1/admin/destinations/{destination}/catalogs/enums/{cf.namespace}:{mode}"
+    return f"{base_url}/v1/admin/destinations/{destination}/catalogs/areas:{mode}"
+
+
+async def post_chunk(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: dict[str, Any],
+    *,
+    compress: bool,
+    retries: int,
+) -> tuple[dict[str, Any], int]:
+    """
+    POST one chunk; network errors, 429 and 5xx are retried with backoff (imports are upserts,
+    so a repeated chunk is harmless). Returns the response and the bytes sent.
+    """
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if compress:
+        data = gzip.compress(data, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+
+    for attempt in range(retries + 1):
+        try:
+            resp = await client.post(url, content=data, headers=headers)
+        except httpx.TransportError as e:
+            error = f"network error: {e!r}"
+        else:
+            if resp.status_code < 400:
+                return (resp.json() if resp.content else {}), len(data)
+            error = f"HTTP {resp.status_code}: {resp.text[:2000]}"
+            if resp.status_code != 429 and resp.status_code < 500:
+                break
+        if attempt < retries:
+            await asyncio.sleep(2**attempt)
+    raise CatalogImportError(f"{url}: {error}")
+
+
+async def import_file(
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    checkpoint: Checkpoint,
+    cf: CatalogFile,
+    args: argparse.Namespace,
+) -> bool:
+    """
+    Send a file's chunks in order (a later item wins over an earlier one with the same key),
+    skipping chunks the checkpoint has; prints one timing line per file.
+    """
+    url = endpoint(args.base_url, args.destination, cf, args.mode)
+    done = checkpoint.done(cf, args.chunk_size)
+    meta = {k: v for k, v in cf.body.items() if k != "items"}
+    summary: Counter[str] = Counter()
+    runs: list[str] = []
+    sent = items = skipped = 0
+
+    async with sem:
+        t0 = time.perf_counter()
+        try:
+            for i, chunk in enumerate(cf.chunks):
+                if str(i) in done:
+                    skipped += 1
+                    continue
+                resp, n = await post_chunk(
+                    client, url, {**meta, "items": chunk}, compress=not args.no_gzip, retries=args.retries,
+                )
+                done[str(i)] = resp.get("run_id")
+                checkpoint.save()
+                runs.append(resp.get("run_id"))
+                summary.update({k: v for k, v in (resp.get("summary") or {}).items() if isinstance(v, int)})
+                sent += n
+                items += len(chunk)
+        except CatalogImportError as e:
+            print(f"FAILED {cf.path.name}: {e}", file=sys.stderr)
+            return False
+        elapsed = time.perf_counter() - t0
+
+    resumed = f", {skipped} resumed" if skipped else ""
+    print(
+        f"{cf.path.name:<28} {cf.label:<20} {items:>7} items {len(cf.chunks) - skipped:>3}/{len(cf.chunks)} chunks{resumed}"
+        f" {sent / 1024:>9.1f} KiB {elapsed:>7.2f}s {items / elapsed if elapsed else 0:>9.0f} items/s"
+        f"  {json.dumps(dict(summary))} runs={','.join(r for r in runs if r)}"
+    )
+    return True
+
+
+async def run(args: argparse.Namespace, files: list[CatalogFile]) -> int:
+    checkpoint = Checkpoint(Path(args.checkpoint), fresh=args.fresh)
+    sem = asyncio.Semaphore(args.concurrency)
+    headers = {"X-Internal-Admin-Key": args.admin_key}
+
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(headers=headers, timeout=args.timeout) as client:
+        results = await asyncio.gather(*(import_file(client, sem, checkpoint, cf, args) for cf in files))
+    elapsed = time.perf_counter() - t0
+
+    total = sum(len(c) for cf in files for c in cf.chunks)
+    failed = results.count(False)
+    print(f"{len(files)} files, {total} items in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} items/s), {failed} failed")
+    if failed:
+        if checkpoint.path.exists():
+            print(f"checkpoint kept at {checkpoint.path}; rerun the same command to resume", file=sys.stderr)
+        return 1
+    checkpoint.clear()
+    return 0
+
+
 def main() -> int:
-    p = argparse.ArgumentParser(description="Import destination catalogs (preview/apply).")
+    p = argparse.ArgumentParser(description="Import destination catalogs (preview/apply), several files concurrently.")
+    p.add_argument("paths", nargs="*", help="catalog files and/or directories of *.json catalogs")
+    p.add_argument("--file", action="append", default=[], help="catalog file (same as a positional path)")
     p.add_argument("--destination", required=True, help="e.g. 101evler")
-    p.add_argument("--file", required=True, help="path to json file")
     p.add_argument("--base-url", default=DEFAULT_BASE_URL)
     p.add_argument("--admin-key", default=DEFAULT_ADMIN_KEY)
     p.add_argument("--mode", choices=["preview", "apply"], default="preview")
     p.add_argument("--kind", choices=["enum", "geo"], help="optional override; inferred by file name if omitted")
-    p.add_argument("--namespace", help="required for enum (e.g. currency, rooms, property_type, title_type)")
+    p.add_argument("--namespace", help="enum namespace for a single file not named enums_<namespace>.json")
     p.add_argument("--yes", action="store_true", help="required for apply mode (safety)")
+    p.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="files uploaded at once")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="items per request")
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help="seconds per request")
+    p.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries per request on network errors, 429 and 5xx")
+    p.add_argument("--no-gzip", action="store_true", help="send uncompressed request bodies")
+    p.add_argument("--checkpoint", help="resume file (default: .import_catalog.<destination>.<mode>.json)")
+    p.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
     args = p.parse_args()
 
     if not args.admin_key:
@@ -77,41 +253,29 @@ def main() -> int:
         print("Refusing to apply without --yes (safety).", file=sys.stderr)
         return 2
 
-    try:
-        with open(args.file, "r", encoding="utf-8") as f:
-            body = json.load(f)
-    except Exception as e:
-        print(f"Failed to read JSON file: {e}", file=sys.stderr)
+    paths = collect_files(args.paths + args.file)
+    if not paths:
+        print("No catalog files given.", file=sys.stderr)
+        return 2
+    if args.namespace and len(paths) > 1:
+        print("--namespace only applies to a single file.", file=sys.stderr)
+        return 2
+    if args.concurrency < 1 or args.chunk_size < 1:
+        print("--concurrency and --chunk-size must be positive.", file=sys.stderr)
         return 2
 
-    # basic payload validation
-    if not isinstance(body, dict) or "items" not in body or not isinstance(body["items"], list):
-        print("Invalid payload: expected JSON object with an 'items' list.", file=sys.stderr)
+    args.destination = args.destination.lower().strip()
+    args.base_url = args.base_url.rstrip("/")
+    args.checkpoint = args.checkpoint or f".import_catalog.{args.destination}.{args.mode}.json"
+
+    try:
+        files = [load_catalog(f, kind=args.kind, namespace=args.namespace, chunk_size=args.chunk_size) for f in paths]
+    except (OSError, CatalogImportError) as e:
+        print(f"Failed to read catalog: {e}", file=sys.stderr)
         return 2
 
-    dest = args.destination.lower().strip()
-    base_url = args.base_url.rstrip("/")
-    kind = args.kind or _infer_kind_from_filename(args.file)
-
-    if kind == "enum":
-        ns = args.namespace or _infer_namespace_from_filename(args.file)
-        if not ns:
-            print("Enum import requires --namespace or filename enums_<namespace>.json", file=sys.stderr)
-            return 2
-
-        endpoint = f"{args.base_url}/v1/admin/destinations/{dest}/catalogs/enums/{ns}:{args.mode}"
-        resp = http_post(endpoint, body, args.admin_key)
-        print(json.dumps(resp, indent=2, ensure_ascii=False))
-        return 0 if "error" not in resp else 1
-
-    if kind == "geo":
-        endpoint = f"{args.base_url}/v1/admin/destinations/{dest}/catalogs/areas:{args.mode}"
-        resp = http_post(endpoint, body, args.admin_key)
-        print(json.dumps(resp, indent=2, ensure_ascii=False))
-        return 0 if "error" not in resp else 1
-
-    print(f"Unknown kind: {kind}", file=sys.stderr)
-    return 2
+    return asyncio.run(run(args, files))
+
 
 if __name__ == "__main__":
     raise SystemExit(main())
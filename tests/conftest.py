@@ -22,6 +22,9 @@ from app.models.idempotency import IdempotencyKey  # noqa: F401
 
 from app.main import app
 from app.core.db import get_db
+from app.destinations.evler101.feed_plugin import Evler101FeedWriter
+from app.destinations.feeds.base import FeedBuildContext
+from app.services.feeds.evler101_xml import Evler101Ad
 
 
 load_dotenv()
@@ -89,3 +92,15 @@ async def client(db_session: AsyncSession):
         yield ac
 
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def evler101_writer():
+    """
+    Factory of 101evler writers holding one ad per (listing_id, price), without a DB.
+    """
+    def make(prices: dict[str, int]) -> Evler101FeedWriter:
+        w = Evler101FeedWriter(FeedBuildContext(destination="101evler", config={}, listing_inclusion_policy="active_only"))
+        w.ads = [Evler101Ad(listing_id=lid, fields={"price": p}, pictures=[]) for lid, p in prices.items()]
+        return w
+    return make
@@ -0,0 +1,64 @@
+import pytest
+from pydantic import ValidationError
+
+from app.canonical.trusted import CanonicalView, is_trusted, load_canonical
+from app.canonical.v1.listing import ListingCanonicalV1
+from app.services.canonical_validate import validate_and_normalize_canonical
+
+
+def _stored() -> tuple[dict, str]:
+    res = validate_and_normalize_canonical(
+        schema="canonical.listing",
+        schema_version="1.0",
+        payload={
+            "canonical_id": "lst_1",
+            "title": "Flat",
+            "status": "active",
+            "address": {"city": "Nicosia", "area": "Gonyeli"},
+            "list_price": {"currency": "eur", "amount": 100},
+            "pricing_rules": [{
+                "kind": "timed_offer",
+                "price": {"currency": "EUR", "amount": 90},
+                "starts_at": "2026-01-01T00:00:00Z",
+                "ends_at": "2026-02-01T00:00:00Z",
+            }],
+            "media": [
+                {"id": "m2", "url": "https://x.test/b.jpg", "order": 2},
+                {"id": "m1", "url": "https://x.test/a.jpg", "order": 1},
+            ],
+        },
+    )
+    assert res.ok
+    return res.normalized, "sha256:" + res.content_hash
+
+
+def test_trusted_load_matches_validated():
+    payload, ch = _stored()
+    can = load_canonical(schema="canonical.listing", schema_version="1.0", payload=payload, content_hash=ch)
+
+    assert isinstance(can, CanonicalView)
+    assert can.list_price.currency == "EUR"
+    assert can.address.line1 is None
+    assert can.property.category == "other"
+    assert can.attributes == {}
+    assert [m.id for m in can.media] == ["m1", "m2"]
+    assert str(can.media[0].url) == "https://x.test/a.jpg"
+    assert can.pricing_rules[0].starts_at.year == 2026
+    assert getattr(can.property, "property_type", None) is None
+    assert can.model_dump(mode="json", exclude_none=True) == (
+        ListingCanonicalV1.model_validate(payload).model_dump(mode="json", exclude_none=True)
+    )
+
+
+def test_untrusted_payload_is_validated():
+    payload, ch = _stored()
+    assert not is_trusted(schema="canonical.listing", schema_version="1.0", payload=payload, content_hash=None)
+    assert not is_trusted(schema="canonical.listing", schema_version="2.0", payload=payload, content_hash=ch)
+
+    bad = dict(payload, title="")
+    assert isinstance(
+        load_canonical(schema="canonical.listing", schema_version="1.0", payload=payload, content_hash=None),
+        ListingCanonicalV1,
+    )
+    with pytest.raises(ValidationError):
+        load_canonical(schema="canonical.listing", schema_version="1.0", payload=bad, content_hash=None)
@@ -0,0 +1,133 @@
+import re
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Insert
+
+from app.services import catalog_bulk
+
+
+class _Driver:
+    def __init__(self):
+        self.copies = []
+
+    async def copy_records_to_table(self, name, *, records, columns):
+        self.copies.append((name, columns, records))
+
+
+class _Raw:
+    def __init__(self, driver):
+        self.driver_connection = driver
+
+
+class _Connection:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def get_raw_connection(self):
+        return _Raw(self.driver)
+
+
+class _Result:
+    rowcount = 3
+
+
+class _Session:
+    """
+    Records every statement (compiled for PostgreSQL) and the records COPYed through the driver.
+    """
+
+    def __init__(self):
+        self.driver = _Driver()
+        self.sql = []
+
+    async def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())) if isinstance(stmt, Insert) else str(stmt))
+        return _Result()
+
+    async def connection(self):
+        return _Connection(self.driver)
+
+
+def _normalized(sql: str) -> str:
+    return re.sub(r"_catalog_stage_[0-9a-f]{12}", "_stage", " ".join(sql.split()))
+
+
+@pytest.mark.asyncio
+async def test_enum_upsert_stages_the_last_value_per_key():
+    db = _Session()
+    written = await catalog_bulk.bulk_upsert_enum_mappings(
+        db, destination="101evler", actor_id="internal",
+        items=[("currency", "EUR", "600"), ("currency", "GBP", "602"), ("currency", "EUR", "601")],
+    )
+
+    assert written == 3
+    ((name, columns, records),) = db.driver.copies
+    assert name.startswith("_catalog_stage_")
+    assert columns == ["id", "namespace", "source_key", "destination_value"]
+    assert [r[1:] for r in records] == [("currency", "EUR", "601"), ("currency", "GBP", "602")]
+    assert all(r[0].startswith("dem_") for r in records)
+
+    create, upsert, drop = map(_normalized, db.sql)
+    assert create == (
+        "CREATE TEMP TABLE _stage (id text NOT NULL, namespace text NOT NULL, source_key text NOT NULL,"
+        " destination_value text NOT NULL) ON COMMIT DROP"
+    )
+    assert upsert == (
+        "INSERT INTO destination_enum_mappings (id, destination, namespace, source_key, destination_value, created_by, updated_by)"
+        " SELECT _stage.id, %(param_1)s AS anon_1, _stage.namespace, _stage.source_key, _stage.destination_value,"
+        " %(param_2)s AS anon_2, %(param_3)s AS anon_3 FROM _stage"
+        " ON CONFLICT ON CONSTRAINT uq_dest_enum_map DO UPDATE SET"
+        " destination_value = excluded.destination_value, updated_at = now(), updated_by = %(param_4)s"
+    )
+    assert drop == "DROP TABLE _stage"
+
+
+@pytest.mark.asyncio
+async def test_geo_mapping_upsert_keys_on_the_area():
+    db = _Session()
+    await catalog_bulk.bulk_upsert_geo_mappings(
+        db, destination="101evler", country_id="gct_1", actor_id="internal",
+        items=[("gcy_1", "gar_1", "17"), ("gcy_1", "gar_2", "18"), ("gcy_1", "gar_1", "19")],
+    )
+
+    ((_, columns, records),) = db.driver.copies
+    assert columns == ["id", "geo_city_id", "geo_area_id", "destination_area_id"]
+    assert [r[1:] for r in records] == [("gcy_1", "gar_1", "19"), ("gcy_1", "gar_2", "18")]
+    upsert = _normalized(db.sql[1])
+    assert "INSERT INTO destination_geo_mappings (id, destination, geo_country_id, geo_city_id, geo_area_id," in upsert
+    assert "ON CONFLICT ON CONSTRAINT uq_dest_geo_area DO UPDATE SET destination_area_id = excluded.destination_area_id" in upsert
+    assert _normalized(db.sql[2]) == "DROP TABLE _stage"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("upsert", "kwargs", "table", "constraint"), [
+    (catalog_bulk.bulk_upsert_geo_cities, {"country_id": "gct_1"}, "geo_cities (id, country_id, slug, name)", "uq_geo_city_slug"),
+    (catalog_bulk.bulk_upsert_geo_areas, {"city_id": "gcy_1"}, "geo_areas (id, city_id, slug, name)", "uq_geo_area_slug"),
+])
+async def test_geo_catalog_upserts_update_names(upsert, kwargs, table, constraint):
+    db = _Session()
+    await upsert(db, items=[("alsancak", "Alsancak"), ("lapta", "Lapta"), ("alsancak", "Alsancak (Yeni)")], **kwargs)
+
+    ((_, columns, records),) = db.driver.copies
+    assert columns == ["id", "slug", "name"]
+    assert [r[1:] for r in records] == [("alsancak", "Alsancak (Yeni)"), ("lapta", "Lapta")]
+    upsert_sql = _normalized(db.sql[1])
+    assert upsert_sql.startswith(f"INSERT INTO {table} SELECT _stage.id,")
+    assert upsert_sql.endswith(f"FROM _stage ON CONFLICT ON CONSTRAINT {constraint} DO UPDATE SET name = excluded.name")
+
+
+@pytest.mark.asyncio
+async def test_empty_items_touch_nothing():
+    db = _Session()
+    assert await catalog_bulk.bulk_upsert_enum_mappings(db, destination="101evler", items=[], actor_id="internal") == 0
+    assert await catalog_bulk.bulk_upsert_geo_areas(db, city_id="gcy_1", items=[]) == 0
+    assert db.sql == [] and db.driver.copies == []
+
+
+@pytest.mark.asyncio
+async def test_staging_needs_a_driver_connection():
+    db = _Session()
+    db.driver = None
+    with pytest.raises(RuntimeError):
+        await catalog_bulk.stage_records(db, ("id",), [("x",)])
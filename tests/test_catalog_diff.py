@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import String, column, table
+from sqlalchemy.sql.dml import Insert
+
+from app.services import catalog_diff
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    """
+    Answers the classification SELECT with `changed` rows and records every statement.
+    """
+
+    def __init__(self, changed):
+        self.changed = changed
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result([] if isinstance(stmt, Insert) else self.changed)
+
+
+@pytest.fixture(autouse=True)
+def _no_staging(monkeypatch):
+    async def stage(db, columns, records):
+        return table("_stage", *(column(c, String) for c in columns))
+
+    async def drop(db, stage):
+        return None
+
+    monkeypatch.setattr(catalog_diff, "stage_records", stage)
+    monkeypatch.setattr(catalog_diff, "drop_stage", drop)
+
+
+ITEMS = [("currency", "EUR", "601"), ("currency", "GBP", "602"), ("currency", "USD", "603")]
+
+
+@pytest.mark.asyncio
+async def test_diff_classifies_without_writing():
+    db = _Session([("currency", "EUR", "601", None), ("currency", "GBP", "602", "600")])
+    diff = await catalog_diff.diff_catalog_items(db, destination="101evler", enum_items=ITEMS)
+
+    assert (diff.enum_insert, diff.enum_update, diff.enum_unchanged) == (1, 1, 1)
+    assert diff.changes == [
+        {"kind": "enum", "key": "currency:EUR", "old": None, "new": "601"},
+        {"kind": "enum", "key": "currency:GBP", "old": "600", "new": "602"},
+    ]
+    assert not any(isinstance(s, Insert) for s in db.statements)
+
+
+@pytest.mark.asyncio
+async def test_apply_writes_only_the_delta_in_one_statement():
+    db = _Session([("currency", "GBP", "602", "600")])
+    diff = await catalog_diff.diff_catalog_items(db, destination="101evler", enum_items=ITEMS, apply_as="internal")
+
+    inserts = [s for s in db.statements if isinstance(s, Insert)]
+    assert len(inserts) == 1
+    assert "IS DISTINCT FROM" in str(inserts[0])
+    assert diff.changed == 1
+
+
+@pytest.mark.asyncio
+async def test_nothing_changed_issues_no_write():
+    db = _Session([])
+    diff = await catalog_diff.diff_catalog_items(db, destination="101evler", enum_items=ITEMS, apply_as="internal")
+
+    assert diff.changed == 0 and diff.enum_unchanged == 3
+    assert not any(isinstance(s, Insert) for s in db.statements)
+
+
+def test_summary_caps_the_recorded_changes(monkeypatch):
+    monkeypatch.setattr(catalog_diff, "DIFF_SAMPLE_LIMIT", 2)
+    diff = catalog_diff.CatalogDiff(geo_insert=3)
+    for i in range(3):
+        diff._record("geo", f"city:area-{i}", None, str(i))
+
+    summary = diff.summary()
+    assert len(summary["changes"]) == 2
+    assert summary["changes_truncated"] is True
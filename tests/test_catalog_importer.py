@@ -0,0 +1,72 @@
+import pytest
+
+from app.services import catalog_importer
+from app.services.geo_catalog import GeoCatalogSnapshot, catalog_slugs, load_geo_catalog
+from app.services.geo_resolver import geo_pair
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+@pytest.mark.asyncio
+async def test_preview_items_are_inserted_in_multi_row_batches(monkeypatch):
+    monkeypatch.setattr(catalog_importer, "ITEM_INSERT_BATCH", 2)
+    db = _RecordingSession()
+    rows = [catalog_importer._item("run_1", f"k{i}", "v", None, "insert", {}) for i in range(5)]
+
+    await catalog_importer._insert_items(db, rows)
+
+    assert len(db.statements) == 3
+    # seven columns bound per row
+    assert [len(s.compile().params) // 7 for s in db.statements] == [2, 2, 1]
+    assert len({r["id"] for r in rows}) == 5
+
+
+def test_geo_catalog_snapshot_resolves_normalized_pairs():
+    catalog = GeoCatalogSnapshot(
+        country_id="gct_1",
+        country_code="NCY",
+        cities={"kyrenia": "gcy_1", "nicosia": "gcy_2"},
+        areas={("kyrenia", "alsancak"): ("gcy_1", "gar_1"), ("nicosia", "lefkosa-merkez"): ("gcy_2", "gar_2")},
+    )
+    assert catalog.resolve("Girne", "Alsancak") == ("gcy_1", "gar_1")
+    assert catalog.resolve("nicosia", "Lefkoşa Merkez") == ("gcy_2", "gar_2")
+    assert catalog.resolve("nicosia", "alsancak") is None
+    assert catalog.has_city("Lefkoşa") and not catalog.has_city("iskele")
+
+
+class _RowsSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, stmt):
+        return type("R", (), {"all": lambda _: list(self.rows)})()
+
+
+@pytest.mark.asyncio
+async def test_geo_catalog_keeps_the_first_of_colliding_slugs(caplog):
+    db = _RowsSession([
+        ("gct_1", "nicosia", "gcy_2", "lefkosa_merkez", "gar_2"),
+        ("gct_1", "nicosia", "gcy_2", "lefkosa-merkez", "gar_3"),
+        ("gct_1", "kyrenia", "gcy_1", None, None),
+    ])
+    catalog = await load_geo_catalog(db, country_code="ncy")
+
+    assert catalog.resolve("Lefkoşa", "Lefkoşa Merkez") == ("gcy_2", "gar_2")
+    assert catalog.has_city("Girne")
+    assert "areas gar_2 and gar_3 both normalize to 'nicosia:lefkosa-merkez'" in caplog.text
+
+
+def test_catalog_slugs_reuse_the_stored_spelling():
+    stored = ["lefkosa_merkez", "gonyeli"]
+    items = catalog_slugs(
+        stored,
+        [("Lefkoşa Merkez", "Lefkoşa Merkez"), ("GÖNYELİ", "Gönyeli"), ("Hamitköy ", "Hamitköy")],
+        key=lambda slug: geo_pair("NCY", "nicosia", slug)[1],
+    )
+    assert items == [("lefkosa_merkez", "Lefkoşa Merkez"), ("gonyeli", "Gönyeli"), ("hamitköy", "Hamitköy")]
@@ -0,0 +1,37 @@
+import json
+import xml.etree.ElementTree as ET
+import zlib
+
+from app.services.hosted_feed import SELF_DELTA_BASE, store_feed_with_deltas
+from app.services.storage import LocalObjectStore
+
+
+def _read(store, obj):
+    return store.resolve_path(obj.uri).read_bytes()
+
+
+def test_delta_against_base_and_self(tmp_path, evler101_writer):
+    store = LocalObjectStore(str(tmp_path))
+    prefix = "t/p/101evler"
+
+    first = store_feed_with_deltas(store, prefix=prefix, out=evler101_writer({"a": 1, "b": 2, "c": 3}).finish(), bases=[])
+    assert list(first.deltas) == [SELF_DELTA_BASE]
+    hashes = json.loads(zlib.decompress(_read(store, first.item_hashes), 31))
+    assert sorted(hashes) == ["a", "b", "c"]
+
+    second = store_feed_with_deltas(
+        store, prefix=prefix, out=evler101_writer({"a": 1, "b": 20, "d": 4}).finish(),
+        bases=[("fds_first", first.item_hashes.uri), ("fds_pruned", "t/p/101evler/item-hashes/sha256/gone.json.gz")],
+    )
+    assert sorted(second.deltas) == sorted([SELF_DELTA_BASE, "fds_first"])  # pruned base -> full feed
+
+    delta = second.deltas["fds_first"]
+    assert delta.meta == {"added": 1, "changed": 1, "removed": 1}
+    doc = ET.fromstring(_read(store, delta.feed))
+    assert [ad.findtext("price") for ad in doc.find("ads")] == ["20", "4"]
+    assert [e.text for e in doc.find("removed")] == ["c"]
+
+    empty = ET.fromstring(_read(store, second.deltas[SELF_DELTA_BASE].feed))
+    assert len(empty.find("ads")) == 0 and len(empty.find("removed")) == 0
+    # the full feed is unaffected
+    assert len(ET.fromstring(_read(store, second.feed)).findall("ad")) == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from app.destinations.feeds.base import FeedBuildOutput
+from app.services.feed_encodings import IDENTITY, negotiate_encoding, parse_accept_encoding
+from app.services.hosted_feed import store_feed_output
+from app.services.storage import LocalObjectStore
+
+
+ALL = ("gzip", "br", "zstd")
+
+
+def test_parse_accept_encoding_qvalues():
+    assert parse_accept_encoding("gzip;q=0.5, br , x-gzip;q=0.8, zstd;q=oops, *;q=0") == {
+        "gzip": 0.8, "br": 1.0, "*": 0.0,
+    }
+
+
+def test_negotiate_prefers_highest_q_then_server_order():
+    assert negotiate_encoding(None, ALL) == IDENTITY
+    assert negotiate_encoding("", ALL) == IDENTITY
+    assert negotiate_encoding("gzip, deflate, br, zstd", ALL) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", ALL) == "gzip"
+    assert negotiate_encoding("zstd, gzip;q=0.9", ("gzip",)) == "gzip"
+    # a substring match is not acceptance
+    assert negotiate_encoding("gzip;q=0", ALL) == IDENTITY
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+    assert negotiate_encoding("br;q=0.2, identity;q=0.5", ALL) == IDENTITY
+
+
+def test_negotiate_refused_identity():
+    assert negotiate_encoding("identity;q=0, gzip", ("br",)) is None
+    assert negotiate_encoding("*;q=0", ()) is None
+    assert negotiate_encoding("*;q=0, identity", ()) == IDENTITY
+
+
+def test_store_feed_output_writes_every_variant(tmp_path):
+    brotli = pytest.importorskip("brotli")
+    zstandard = pytest.importorskip("zstandard")
+
+    store = LocalObjectStore(str(tmp_path))
+    body = [b"<ads>"] + [b"<ad><id>%d</id></ad>" % i for i in range(50_000)] + [b"</ads>"]
+    out = store_feed_output(
+        store, prefix="t/p/101evler",
+        out=FeedBuildOutput(format="xml", chunks=iter(body), listing_count=50_000, meta={}),
+    )
+    plain = b"".join(body)
+    assert store.resolve_path(out.feed.uri).read_bytes() == plain
+    assert set(out.variants) == set(ALL)
+    assert brotli.decompress(store.resolve_path(out.variants["br"].uri).read_bytes()) == plain
+    zs = zstandard.ZstdDecompressor().decompressobj().decompress(store.resolve_path(out.variants["zstd"].uri).read_bytes())
+    assert zs == plain
+    assert store.resolve_path(out.variants["zstd"].uri).name.endswith(".xml.zst")
+    assert all(v.size_bytes < out.feed.size_bytes for v in out.variants.values())
@@ -0,0 +1,59 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.destinations.feeds.base import FeedBuildContext
+from app.services import hosted_feed
+from app.services.storage import LocalObjectStore
+
+
+def _rows(n: int):
+    return [(f"l{i:04d}", "agent", None, {"canonical_id": f"l{i:04d}", "status": "active", "title": f"T{i}"}, f"h{i}") for i in range(n)]
+
+
+async def _scan(rows, fail_at: int | None = None):
+    for i, row in enumerate(rows):
+        if i == fail_at:
+            raise RuntimeError("cursor lost")
+        yield row
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield pool
+
+
+CTX = FeedBuildContext(destination="partner_csv", config={}, listing_inclusion_policy="include_with_status")
+
+
+@pytest.mark.asyncio
+async def test_executor_build_matches_inline(tmp_path, executor, monkeypatch):
+    monkeypatch.setattr(settings, "listing_scan_chunk_size", 7)  # many chunks through the queue
+    store = LocalObjectStore(str(tmp_path))
+    rows = _rows(100)
+
+    (inline,) = hosted_feed.render_partner_feeds_job([CTX], rows, store, "t/p")
+    (queued,) = await hosted_feed._render_in_executor(
+        executor, _scan(rows), contexts=[CTX], store=store, prefix="t/p", delta_bases={},
+    )
+    assert queued.feed.sha256 == inline.feed.sha256
+    assert queued.listing_count == 100
+
+
+@pytest.mark.asyncio
+async def test_scan_failure_reaches_the_worker(tmp_path, executor, monkeypatch):
+    monkeypatch.setattr(settings, "listing_scan_chunk_size", 5)
+    store = LocalObjectStore(str(tmp_path))
+
+    with pytest.raises(RuntimeError, match="cursor lost"):
+        await hosted_feed._render_in_executor(
+            executor, _scan(_rows(50), fail_at=23), contexts=[CTX], store=store, prefix="t/p", delta_bases={},
+        )
+    # the worker was released (not left waiting for rows): the pool still takes jobs
+    (out,) = await hosted_feed._render_in_executor(
+        executor, _scan(_rows(3)), contexts=[CTX], store=store, prefix="t/p", delta_bases={},
+    )
+    assert out.listing_count == 3
@@ -0,0 +1,56 @@
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.services.feed_meta_cache import FeedMeta, FeedMetaCache, token_hash
+
+
+@pytest.mark.asyncio
+async def test_feed_meta_cache_is_coherent_across_instances():
+    # two API processes sharing one Redis
+    a = FeedMetaCache(settings.redis_url, ttl_seconds=300, max_entries=10)
+    b = FeedMetaCache(settings.redis_url, ttl_seconds=300, max_entries=10)
+    partner = f"prt_{uuid.uuid4().hex}"
+    loads = []
+
+    def loader(version: str):
+        async def load():
+            loads.append(version)
+            return FeedMeta(token_hash=token_hash("secret-token"), content_hash=version)
+        return load
+
+    assert (await a.get(partner, "101evler", loader("v1"))).content_hash == "v1"
+    assert (await a.get(partner, "101evler", loader("v2"))).content_hash == "v1"  # hit
+    assert (await b.get(partner, "101evler", loader("v1"))).content_hash == "v1"
+    assert loads == ["v1", "v1"]
+
+    # a new snapshot committed elsewhere: both drop their entry
+    await FeedMetaCache(settings.redis_url, ttl_seconds=300, max_entries=10).invalidate(partner, ["101evler"])
+    assert (await a.get(partner, "101evler", loader("v2"))).content_hash == "v2"
+    assert (await b.get(partner, "101evler", loader("v2"))).content_hash == "v2"
+    assert loads == ["v1", "v1", "v2", "v2"]
+
+    meta = await a.get(partner, "101evler", loader("v3"))
+    assert meta.token_matches("secret-token")
+    assert not meta.token_matches("other-token")
+    await a.r.delete(f"feedmeta:v:{partner}:101evler")
+
+
+@pytest.mark.asyncio
+async def test_feed_meta_cache_does_not_cache_failures_and_evicts():
+    cache = FeedMetaCache(settings.redis_url, ttl_seconds=300, max_entries=2)
+    partner = f"prt_{uuid.uuid4().hex}"
+
+    async def fail():
+        raise LookupError("not enabled")
+
+    with pytest.raises(LookupError):
+        await cache.get(partner, "101evler", fail)
+
+    async def ok():
+        return FeedMeta(token_hash="x")
+
+    for dest in ("a", "b", "c"):
+        await cache.get(partner, dest, ok)
+    assert [k[1] for k in cache._entries] == ["b", "c"]
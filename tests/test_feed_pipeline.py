@@ -0,0 +1,51 @@
+import csv
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from app.destinations.evler101.feed_plugin import Evler101FeedWriter
+from app.destinations.feeds import pipeline
+from app.destinations.feeds.base import FeedBuildContext
+from app.destinations.feeds.pipeline import fan_out, stream_to_writers
+from app.destinations.partner_csv.feed_plugin import PartnerCSVFeedWriter
+
+LISTINGS = [("l1", "active"), ("l2", "sold"), ("l3", "active")]
+
+
+def _payload(lid: str, status: str) -> dict:
+    return {"canonical_id": lid, "status": status, "title": f"T {lid}"}
+
+
+def _writers():
+    return [
+        PartnerCSVFeedWriter(FeedBuildContext(
+            destination="partner_csv", config={"columns": ["listing_id", "status"]}, listing_inclusion_policy="include_with_status",
+        )),
+        Evler101FeedWriter(FeedBuildContext(destination="101evler", config={}, listing_inclusion_policy="active_only")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_one_scan_feeds_every_writer(monkeypatch):
+    scans = []
+
+    async def iter_partner_listings(db, *, tenant_id, partner_id, payload_paths):
+        scans.append((tenant_id, partner_id, payload_paths))
+        for lid, status in LISTINGS:
+            yield SimpleNamespace(id=lid, agent_id="agent", updated_at=None, payload=_payload(lid, status), content_hash=f"h_{lid}")
+
+    monkeypatch.setattr(pipeline, "iter_partner_listings", iter_partner_listings)
+    csv_out, evler_out = await stream_to_writers(None, tenant_id="t", partner_id="p", writers=_writers(), payload_paths=["status"])
+
+    assert scans == [("t", "p", ["status"])]
+    rows = list(csv.reader(io.StringIO(b"".join(csv_out.chunks).decode("utf-8"))))
+    assert rows == [["listing_id", "status"], ["l1", "active"], ["l2", "sold"], ["l3", "active"]]
+    # the same three listings, under the other writer's own policy and mappings
+    assert evler_out.listing_count == 0
+    assert evler_out.meta["skipped_by_reason"] == {"policy_excluded": 1, "missing_mapping": 2}
+
+    # the inline stream matches the materialized fan-out the worker processes run
+    rows_in = [(lid, "agent", None, _payload(lid, status), f"h_{lid}") for lid, status in LISTINGS]
+    for streamed, fanned in zip([csv_out, evler_out], fan_out(_writers(), rows_in)):
+        assert streamed.listing_count == fanned.listing_count and streamed.meta == fanned.meta
@@ -0,0 +1,24 @@
+from app.core.config import settings
+from app.destinations.feeds.base import FeedRetentionPolicy
+from app.destinations.feeds.registry import get_feed_plugin
+from app.services.feed_retention import retention_policy_for
+from app.services.feed_snapshots import split_snapshot_details
+
+
+def test_retention_policy_defaults_and_plugin_override(monkeypatch):
+    monkeypatch.setattr(settings, "feed_retention_keep_last", 0)
+    monkeypatch.setattr(settings, "feed_retention_daily_days", 7)
+    # the latest snapshot is never pruned, whatever the configuration says
+    assert retention_policy_for("no-such-destination") == FeedRetentionPolicy(keep_last=1, daily_days=7)
+
+    plugin = get_feed_plugin("101evler")
+    monkeypatch.setattr(plugin, "retention", FeedRetentionPolicy(keep_last=3, daily_days=0), raising=False)
+    assert retention_policy_for("101evler") == FeedRetentionPolicy(keep_last=3, daily_days=0)
+
+
+def test_split_snapshot_details_moves_lists_out_of_meta():
+    meta = {"warnings_count": 1, "warnings": [{"code": "X"}], "skipped": []}
+    slim, details = split_snapshot_details(meta)
+    assert slim == {"warnings_count": 1}
+    assert details == {"warnings": [{"code": "X"}], "skipped": []}
+    assert "warnings" in meta  # caller's dict untouched
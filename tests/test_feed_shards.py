@@ -0,0 +1,80 @@
+import xml.etree.ElementTree as ET
+
+from app.destinations.evler101 import feed_plugin
+from app.destinations.feeds.sharding import ShardLimits, shard_limits, split_items
+from app.services.feeds import evler101_xml
+from app.services.hosted_feed import store_feed_parts
+from app.services.storage import LocalObjectStore
+
+
+def test_split_items_boundaries_are_content_defined():
+    limits = ShardLimits(max_listings=40)
+    items = {f"l{i:04d}": f"<ad>{i}</ad>".encode() for i in range(1000)}
+    before = split_items(items.items(), limits=limits)
+    assert sum(len(p) for p in before) == 1000
+    assert all(5 <= len(p) <= 40 for p in before[:-1])
+
+    items["l0500"] = b"<ad>changed</ad>"
+    after = split_items(items.items(), limits=limits)
+    assert len(after) == len(before)
+    assert sum(a != b for a, b in zip(before, after)) == 1
+
+    del items["l0100"]
+    assert sum(b not in after for b in split_items(items.items(), limits=limits)) <= 2
+
+
+def test_shard_limits_from_config():
+    assert shard_limits({}) is None
+    assert shard_limits({"shard_max_listings": 500, "shard_max_bytes": 1000}) == ShardLimits(500, 1000)
+
+
+def test_store_feed_parts_reuses_unchanged_parts(tmp_path, evler101_writer):
+    store = LocalObjectStore(str(tmp_path))
+    limits = ShardLimits(max_listings=20)
+    prices = {f"l{i:03d}": i for i in range(200)}
+
+    first = store_feed_parts(store, prefix="t/p/101evler", out=evler101_writer(prices).finish(), limits=limits)
+    assert len(first.parts) > 1
+    assert sum(p.listing_count for p in first.parts) == 200
+    for part in first.parts:
+        ET.fromstring(store.resolve_path(part.feed.uri).read_bytes())
+        assert "gzip" in part.variants
+    index = ET.fromstring(store.resolve_path(first.feed.uri).read_bytes())
+    assert [p.get("sha256") for p in index] == [p.feed.sha256 for p in first.parts]
+
+    prices["l150"] = 9999
+    second = store_feed_parts(store, prefix="t/p/101evler", out=evler101_writer(prices).finish(), limits=limits)
+    changed = [a.feed.uri != b.feed.uri for a, b in zip(first.parts, second.parts)]
+    assert len(second.parts) == len(first.parts) and sum(changed) == 1
+    assert second.feed.uri != first.feed.uri
+
+
+def test_parts_serialize_when_stored(tmp_path, monkeypatch, evler101_writer):
+    store = LocalObjectStore(str(tmp_path))
+    serialized = []
+    monkeypatch.setattr(feed_plugin, "ad_bytes", lambda ad: serialized.append(ad.listing_id) or evler101_xml.ad_bytes(ad))
+    out = evler101_writer({f"l{i:03d}": i for i in range(100)}).finish()
+
+    parts = out.parts(ShardLimits(max_listings=20))
+    assert serialized == [] and sum(p.listing_count for p in parts) == 100
+
+    stored = store_feed_parts(store, prefix="t/p/101evler", out=out, limits=ShardLimits(max_listings=20))
+    assert sorted(serialized) == [f"l{i:03d}" for i in range(100)]
+    # the snapshot's object is the XML index; the listings' format is the parts'
+    assert stored.format == "xml" and stored.listings_format == "xml"
+    # every part was checked once, adding up to the single document's check
+    single = evler101_writer({f"l{i:03d}": i for i in range(100)}).finish()
+    b"".join(single.chunks)
+    assert out.meta["parse_ok"] is True
+    assert out.meta["structure_errors_count"] == single.meta["structure_errors_count"] > 0
+
+
+def test_byte_limits_split_serialized_parts(tmp_path, evler101_writer):
+    store = LocalObjectStore(str(tmp_path))
+    limits = ShardLimits(max_listings=1000, max_bytes=2000)
+    out = evler101_writer({f"l{i:03d}": i for i in range(100)}).finish()
+
+    stored = store_feed_parts(store, prefix="t/p/101evler", out=out, limits=limits)
+    assert len(stored.parts) > 1 and sum(p.listing_count for p in stored.parts) == 100
+    for part in stored.parts:
+        ET.fromstring(store.resolve_path(part.feed.uri).read_bytes())
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.endpoints.feed_health_admin import feeds_health_admin
+from app.destinations.feeds.base import FeedRetentionPolicy
+from app.models.feed_snapshot import FeedSnapshot
+from app.models.feed_snapshot_latest import FeedSnapshotLatest
+from app.services.feed_retention import _expired_snapshot_ids
+from app.services.feed_snapshots import latest_feed_snapshot, latest_feed_snapshots, mark_latest_snapshots
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def add_snapshot(db_session, seed_partner_admin):
+    async def add(destination: str, *, minutes_ago: int, **meta) -> FeedSnapshot:
+        s = FeedSnapshot(
+            tenant_id=seed_partner_admin["tenant_id"],
+            partner_id=seed_partner_admin["partner_id"],
+            destination=destination,
+            storage_uri=f"file:///feeds/{destination}/{minutes_ago}.xml",
+            format="xml",
+            content_hash=f"sha256:{destination}{minutes_ago}",
+            listing_count=1,
+            meta=meta,
+            created_at=NOW - timedelta(minutes=minutes_ago),
+            created_by="test",
+            updated_by="test",
+        )
+        db_session.add(s)
+        await db_session.flush()
+        return s
+    return add
+
+
+async def _pointer(db_session, destination: str) -> str | None:
+    return (await db_session.execute(
+        select(FeedSnapshotLatest.snapshot_id).where(FeedSnapshotLatest.destination == destination)
+    )).scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_pointer_follows_newer_snapshots_only(db_session, seed_partner_admin, add_snapshot):
+    older = await add_snapshot("101evler", minutes_ago=60)
+    newer = await add_snapshot("101evler", minutes_ago=5)
+    csv = await add_snapshot("partner_csv", minutes_ago=30)
+
+    await mark_latest_snapshots(db_session, [older.id, csv.id])
+    assert await _pointer(db_session, "101evler") == older.id
+    assert await _pointer(db_session, "partner_csv") == csv.id
+
+    await mark_latest_snapshots(db_session, [newer.id])
+    assert await _pointer(db_session, "101evler") == newer.id
+
+    # a slower concurrent build finishing late must not move the pointer back
+    await mark_latest_snapshots(db_session, [older.id])
+    assert await _pointer(db_session, "101evler") == newer.id
+    created_at = (await db_session.execute(
+        select(FeedSnapshotLatest.created_at).where(FeedSnapshotLatest.destination == "101evler")
+    )).scalar_one()
+    assert created_at == newer.created_at
+
+    tenant_id, partner_id = seed_partner_admin["tenant_id"], seed_partner_admin["partner_id"]
+    found = await latest_feed_snapshots(db_session, tenant_id=None, partner_id=partner_id, destinations=["101evler", "partner_csv", "none"])
+    assert {d: s.id for d, s in found.items()} == {"101evler": newer.id, "partner_csv": csv.id}
+    assert (await latest_feed_snapshot(db_session, tenant_id=tenant_id, partner_id=partner_id, destination="partner_csv")).id == csv.id
+    assert await latest_feed_snapshot(db_session, tenant_id="other", partner_id=partner_id, destination="partner_csv") is None
+
+
+@pytest.mark.asyncio
+async def test_retention_never_prunes_the_pointed_snapshot(db_session, add_snapshot):
+    policy = FeedRetentionPolicy(keep_last=1, daily_days=0)
+    older = await add_snapshot("101evler", minutes_ago=60)
+    newer = await add_snapshot("101evler", minutes_ago=5)
+
+    # the newer build has not marked itself yet: the pointed, older snapshot survives keep_last=1
+    await mark_latest_snapshots(db_session, [older.id])
+    assert await _expired_snapshot_ids(db_session, destination="101evler", policy=policy, now=NOW) == []
+
+    await mark_latest_snapshots(db_session, [newer.id])
+    assert await _expired_snapshot_ids(db_session, destination="101evler", policy=policy, now=NOW) == [older.id]
+
+    # deleting a pointed snapshot takes its pointer with it (ON DELETE CASCADE)
+    await db_session.delete(newer)
+    await db_session.flush()
+    assert await _pointer(db_session, "101evler") is None
+
+
+@pytest.mark.asyncio
+async def test_admin_feed_health_reads_the_pointers(db_session, add_snapshot):
+    stale = await add_snapshot("101evler", minutes_ago=120, warnings_count=1)
+    noisy = await add_snapshot("partner_csv", minutes_ago=5, warnings_count=9, skipped_count=2)
+    broken = await add_snapshot("other", minutes_ago=10, warnings_count=9, skipped_count=7, parse_ok=False, parse_ms=12)
+    await add_snapshot("partner_csv", minutes_ago=200, warnings_count=50, parse_ok=False)  # superseded
+    await mark_latest_snapshots(db_session, [stale.id, noisy.id, broken.id])
+
+    body = await feeds_health_admin(stale_minutes=30, limit=500, db=db_session)
+
+    assert body["latest_count"] == 3
+    assert [(r["destination"], r["age_minutes"]) for r in body["stale"]] == [("101evler", 120)]
+    # warnings first, then skips; superseded snapshots are not feeds
+    assert [r["destination"] for r in body["top_warning_feeds"]] == ["other", "partner_csv", "101evler"]
+    assert [r["destination"] for r in body["parse_failures"]] == ["other"]
+    assert body["parse_failures"][0]["parse_ms"] == 12 and "generator" not in body["parse_failures"][0]
+
+    limited = await feeds_health_admin(stale_minutes=1, limit=2, db=db_session)
+    assert [r["destination"] for r in limited["stale"]] == ["101evler", "other"]
@@ -0,0 +1,34 @@
+from app.destinations.evler101.feed_plugin import Evler101FeedWriter
+from app.destinations.feeds.base import FeedBuildContext
+from app.destinations.feeds.xml_check import StreamingXmlCheck, XmlItemProfile
+from app.services.feeds.evler101_xml import Evler101Ad
+
+
+def test_reports_items_missing_required_tags():
+    check = StreamingXmlCheck(XmlItemProfile(item_tag="ad", id_tag="ad_key", required=("ad_key", "price")))
+    chunks = [b"<ads>", b"<ad><ad_key>a</ad_key><price>1</price></ad>", b"<ad><ad_key>b</ad_key><pri", b"ce> </price></ad>", b"<ad/></ads>"]
+    assert b"".join(check.checked(chunks)) == b"".join(chunks)
+    assert check.well_formed
+    assert check.error_count == 3
+    assert check.errors[0] == {"listing_id": "b", "code": "XML_MISSING_TAG", "message": "<ad> without <price>"}
+    assert [e["listing_id"] for e in check.errors[1:]] == ["#3", "#3"]
+    assert len(check._stack) == 0
+
+
+def test_not_well_formed_stops_checking():
+    check = StreamingXmlCheck()
+    for chunk in (b"<ads><ad>", b"</ads>", b"<more/>"):
+        check.feed(chunk)
+    check.close()
+    assert not check.well_formed
+    assert [e["code"] for e in check.errors] == ["XML_NOT_WELL_FORMED"]
+
+
+def test_writer_meta_carries_structure_errors():
+    w = Evler101FeedWriter(FeedBuildContext(destination="101evler", config={}, listing_inclusion_policy="active_only"))
+    w.ads = [Evler101Ad(listing_id="l1", fields={"ad_key": "l1", "price": "5"}, pictures=[])]
+    out = w.finish()
+    b"".join(out.chunks)
+    assert out.meta["parse_ok"] is True
+    assert out.meta["structure_errors_count"] == 7
+    assert {e["listing_id"] for e in out.meta["structure_errors"]} == {"l1"}
@@ -0,0 +1,49 @@
+from app.services.geo_resolver import GeoResolver, fold_slug, geo_key
+from app.services.mapping_cache import DestinationMappings
+
+
+def test_fold_slug_folds_diacritics_case_and_separators():
+    assert fold_slug("Gönyeli") == fold_slug("GÖNYELİ") == "gonyeli"
+    assert fold_slug("Ağırdağ") == "agirdag"
+    assert fold_slug("Çatalköy") == "catalkoy"
+    assert fold_slug(" Lefkoşa  Merkez ") == fold_slug("lefkosa_merkez") == "lefkosa-merkez"
+    assert fold_slug(None) == ""
+
+
+def test_geo_key_applies_city_aliases():
+    assert geo_key("NCY", "Lefkoşa", "Gönyeli") == "nicosia:gonyeli"
+    assert geo_key("ncy", "Girne", "Alsancak") == "kyrenia:alsancak"
+    # aliases are per country
+    assert geo_key("TR", "Girne", "Alsancak") == "girne:alsancak"
+
+
+def test_resolver_matches_catalog_slugs_in_any_spelling():
+    geo = GeoResolver({
+        ("NCY", "nicosia", "lefkosa_merkez"): "7",
+        ("NCY", "kyrenia", "alsancak"): "17",
+        ("NCY", "kyrenia", "karaoglanoglu"): "",  # unmapped
+    })
+    assert geo.resolve("NCY", "Lefkoşa", "Lefkoşa Merkez") == "7"
+    assert geo.resolve("ncy", "KYRENIA", "alsancak") == "17"
+    assert geo.resolve("NCY", "Girne", "Karaoğlanoğlu") is None
+    assert geo.resolve_key("NCY", geo_key("NCY", "Girne", "Alsancak")) == "17"
+    assert geo.resolve_key("NCY", "no-colon") is None
+    assert geo.resolve_many("NCY", [("Girne", "Alsancak"), ("Girne", "Nowhere")]) == {
+        ("Girne", "Alsancak"): "17",
+        ("Girne", "Nowhere"): None,
+    }
+
+
+def test_destination_mappings_build_the_resolver_once():
+    m = DestinationMappings(destination="101evler", areas={("NCY", "iskele", "bogaz"): "3"})
+    assert m.geo is m.geo
+    assert m.geo.resolve("NCY", "İskele", "Boğaz") == "3"
+
+
+def test_resolver_keeps_the_first_of_colliding_spellings(caplog):
+    geo = GeoResolver({
+        ("NCY", "nicosia", "lefkosa_merkez"): "7",
+        ("NCY", "nicosia", "lefkosa-merkez"): "8",
+    })
+    assert geo.resolve("NCY", "Lefkoşa", "Lefkoşa Merkez") == "7"
+    assert "maps to both 7 and 8" in caplog.text
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+from ops import import_catalog
+from ops.import_catalog import CatalogImportError, Checkpoint, import_file, load_catalog, post_chunk
+
+
+def _write(path, items, **body):
+    path.write_text(json.dumps({**body, "items": items}), encoding="utf-8")
+    return path
+
+
+def _args(chunk_size: int) -> argparse.Namespace:
+    return argparse.Namespace(
+        base_url="http://hub", destination="101evler", mode="apply", chunk_size=chunk_size, no_gzip=False, retries=0,
+    )
+
+
+def _stub_post(monkeypatch, *, fail_at: int | None = None):
+    """
+    Replace post_chunk: records each chunk's items and fails on the chunk starting with `fail_at`.
+    """
+    posted = []
+
+    async def post(client, url, payload, *, compress, retries):
+        if payload["items"] and payload["items"][0] == fail_at:
+            raise CatalogImportError(f"{url}: HTTP 503")
+        posted.append(payload["items"])
+        return {"run_id": f"run_{len(posted)}", "summary": {"inserted": len(payload["items"])}}, 10
+
+    monkeypatch.setattr(import_catalog, "post_chunk", post)
+    return posted
+
+
+def test_load_catalog_chunks_items_and_infers_the_kind(tmp_path):
+    cf = load_catalog(_write(tmp_path / "enums_currency.json", [1, 2, 3, 4, 5]), kind=None, namespace=None, chunk_size=2)
+    assert (cf.kind, cf.namespace, cf.label) == ("enum", "currency", "enum/currency")
+    assert cf.chunks == [[1, 2], [3, 4], [5]]
+
+    geo = load_catalog(_write(tmp_path / "areas_ncy.json", [], country_code="NCY"), kind=None, namespace=None, chunk_size=2)
+    assert (geo.kind, geo.namespace, geo.label) == ("geo", None, "geo/NCY")
+    assert geo.chunks == [[]]  # an empty catalog still makes one request
+
+    with pytest.raises(CatalogImportError, match="requires --namespace"):
+        load_catalog(_write(tmp_path / "rooms.json", [1]), kind=None, namespace=None, chunk_size=2)
+    (tmp_path / "enums_bad.json").write_text("{", encoding="utf-8")
+    with pytest.raises(CatalogImportError, match="invalid JSON"):
+        load_catalog(tmp_path / "enums_bad.json", kind=None, namespace=None, chunk_size=2)
+
+
+async def test_import_resumes_from_the_checkpoint(tmp_path, monkeypatch):
+    path = _write(tmp_path / "enums_currency.json", [1, 2, 3, 4, 5])
+    cp_path = tmp_path / "cp.json"
+    cf = load_catalog(path, kind=None, namespace=None, chunk_size=2)
+
+    posted = _stub_post(monkeypatch, fail_at=3)
+    assert await import_file(None, asyncio.Semaphore(1), Checkpoint(cp_path, fresh=False), cf, _args(2)) is False
+    assert posted == [[1, 2]]
+    saved = json.loads(cp_path.read_text(encoding="utf-8"))["files"][str(path)]
+    assert saved == {"sha256": cf.sha256, "chunk_size": 2, "chunks": {"0": "run_1"}}
+
+    posted = _stub_post(monkeypatch)
+    checkpoint = Checkpoint(cp_path, fresh=False)
+    assert await import_file(None, asyncio.Semaphore(1), checkpoint, cf, _args(2)) is True
+    assert posted == [[3, 4], [5]]
+    assert checkpoint.done(cf, 2) == {"0": "run_1", "1": "run_1", "2": "run_2"}
+
+    # nothing left: a rerun sends nothing, --fresh sends everything again
+    posted = _stub_post(monkeypatch)
+    await import_file(None, asyncio.Semaphore(1), Checkpoint(cp_path, fresh=False), cf, _args(2))
+    assert posted == []
+    await import_file(None, asyncio.Semaphore(1), Checkpoint(cp_path, fresh=True), cf, _args(2))
+    assert posted == [[1, 2], [3, 4], [5]]
+
+
+def test_checkpoint_starts_over_when_the_file_or_chunking_changes(tmp_path):
+    path = _write(tmp_path / "enums_currency.json", [1, 2, 3])
+    checkpoint = Checkpoint(tmp_path / "cp.json", fresh=False)
+    cf = load_catalog(path, kind=None, namespace=None, chunk_size=2)
+    checkpoint.done(cf, 2)["0"] = "run_1"
+    checkpoint.save()
+
+    resumed = Checkpoint(tmp_path / "cp.json", fresh=False)
+    assert resumed.done(cf, 2) == {"0": "run_1"}
+    assert resumed.done(cf, 1) == {}  # other chunk boundaries
+    resumed.done(cf, 2)["0"] = "run_1"
+
+    changed = load_catalog(_write(path, [1, 2, 3, 4]), kind=None, namespace=None, chunk_size=2)
+    assert resumed.done(changed, 2) == {}  # other content
+
+    resumed.save()
+    resumed.clear()
+    assert not (tmp_path / "cp.json").exists() and not (tmp_path / "cp.json.tmp").exists()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(import_catalog.asyncio, "sleep", sleep)
+    return delays
+
+
+async def test_post_chunk_retries_transient_failures(no_backoff):
+    statuses = iter([None, 503, 429, 200])  # None: the connection fails
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(gzip.decompress(request.content)))
+        status = next(statuses)
+        if status is None:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(status, json={"run_id": "run_1"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        resp, sent = await post_chunk(client, "http://hub/x", {"items": [1]}, compress=True, retries=3)
+
+    assert resp == {"run_id": "run_1"} and sent > 0
+    assert bodies == [{"items": [1]}] * 4
+    assert no_backoff == [1, 2, 4]
+
+
+async def test_post_chunk_gives_up(no_backoff):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400 if request.url.path == "/bad" else 500, text="nope")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(CatalogImportError, match="HTTP 400"):
+            await post_chunk(client, "http://hub/bad", {"items": []}, compress=False, retries=3)
+        assert len(calls) == 1 and no_backoff == []  # client errors are not retried
+
+        with pytest.raises(CatalogImportError, match="HTTP 500"):
+            await post_chunk(client, "http://hub/down", {"items": []}, compress=False, retries=2)
+        assert len(calls) == 4 and no_backoff == [1, 2]
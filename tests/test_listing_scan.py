@@ -0,0 +1,84 @@
+import pytest
+from pydantic import ValidationError
+
+from app.canonical.trusted import load_stored_listing
+from app.core.config import settings
+from app.services.listing_scan import iter_partner_listings
+from tests.test_canonical_trusted import _stored
+
+
+class _Stream:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for r in self._rows:
+            yield r
+
+
+class _Session:
+    """
+    Answers the scan with rows shaped like the statement's columns, built from whole payloads.
+    """
+
+    def __init__(self, listings):
+        self.listings = listings  # (id, payload, content_hash)
+        self.stmt = None
+
+    async def stream(self, stmt):
+        self.stmt = stmt
+        names = [c.name for c in stmt.selected_columns]
+        rows = []
+        for lid, payload, content_hash in self.listings:
+            row = [lid, "agent", None, "canonical.listing", "1.0", content_hash]
+            if names[6:] == ["payload"]:
+                row.append(payload)
+            else:
+                trusted = content_hash.startswith("sha256:") and payload.get("schema") == "canonical.listing"
+                row += [payload.get("schema"), payload.get("schema_version"), payload.get("canonical_id"), payload.get("title")]
+                row.append(None if trusted else payload)
+            rows.append(tuple(row))
+        return _Stream(rows)
+
+
+async def _scan(db):
+    return [r async for r in iter_partner_listings(db, tenant_id="t", partner_id="p", payload_paths=["title"])]
+
+
+@pytest.mark.asyncio
+async def test_projected_rows_load_trusted():
+    payload, content_hash = _stored()
+    (r,) = await _scan(_Session([("l1", payload, content_hash)]))
+    assert set(r.payload) == {"schema", "schema_version", "canonical_id", "title"}
+    assert load_stored_listing(r).title == payload["title"]
+
+
+@pytest.mark.asyncio
+async def test_untrusted_rows_come_whole_and_validate():
+    payload, _ = _stored()
+    (r,) = await _scan(_Session([("l1", payload, "legacy-hash")]))
+    assert r.payload == payload
+    assert load_stored_listing(r).title == payload["title"]
+
+
+@pytest.mark.asyncio
+async def test_kill_switch_disables_projection(monkeypatch):
+    monkeypatch.setattr(settings, "canonical_trusted_load", False)
+    payload, content_hash = _stored()
+    db = _Session([("l1", payload, content_hash)])
+    (r,) = await _scan(db)
+
+    assert [c.name for c in db.stmt.selected_columns][6:] == ["payload"]
+    assert r.payload == payload
+    load_stored_listing(r)  # validates the whole document
+
+
+def test_partial_payloads_do_not_validate():
+    # why projection has to be skipped for validated loads
+    payload, _ = _stored()
+    partial = {k: payload[k] for k in ("schema", "schema_version", "canonical_id")}
+    with pytest.raises(ValidationError):
+        load_stored_listing(type("R", (), {"schema": "canonical.listing", "schema_version": "1.0", "payload": partial, "content_hash": None})())
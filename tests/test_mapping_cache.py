@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.services.mapping_cache import DestinationMappings, MappingCache
+
+
+def _mappings(dest: str, value: str) -> DestinationMappings:
+    return DestinationMappings(
+        destination=dest,
+        enums={"currency": {"EUR": value}},
+        areas={("NCY", "girne", "alsancak"): "17", ("TR", "mugla", "bodrum"): "99"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_mapping_cache_reloads_on_version_bump():
+    a = MappingCache(settings.redis_url, ttl_seconds=300)
+    b = MappingCache(settings.redis_url, ttl_seconds=300)
+    dest = f"dest_{uuid.uuid4().hex}"
+    other = f"dest_{uuid.uuid4().hex}"
+    loads = []
+
+    def loader(d: str, value: str):
+        async def load():
+            loads.append((d, value))
+            return _mappings(d, value)
+        return load
+
+    m = await a.get(dest, loader(dest, "601"))
+    assert m.enum("currency", "EUR") == "601"
+    assert m.area_index("ncy") == {("girne", "alsancak"): "17"}
+    assert (await a.get(dest, loader(dest, "602"))).enum("currency", "EUR") == "601"  # hit
+    await a.get(other, loader(other, "1"))
+
+    # an activation in another process bumps only its destination
+    await b.invalidate([dest])
+    assert (await a.get(dest, loader(dest, "602"))).enum("currency", "EUR") == "602"
+    assert (await a.get(other, loader(other, "2"))).enum("currency", "EUR") == "1"
+
+    # geo catalog changes reload every destination
+    await b.invalidate()
+    assert (await a.get(other, loader(other, "3"))).enum("currency", "EUR") == "3"
+    assert loads == [(dest, "601"), (other, "1"), (dest, "602"), (other, "3")]
+    await a.r.delete(f"mapcache:v:{dest}", f"mapcache:v:{other}")
@@ -0,0 +1,157 @@
+import operator
+
+import pytest
+from sqlalchemy.sql.elements import BindParameter, BooleanClauseList, CollectionAggregate
+
+from app.destinations.evler101 import mapping_plugin
+from app.destinations.evler101.mapping_plugin import Evler101MappingPlugin
+from app.destinations.mapping_base import MappingKeySet
+from app.models.destination_enum_mapping import DestinationEnumMapping
+from app.models.destination_geo_mapping import DestinationGeoMapping
+from app.models.geo_area import GeoArea
+from app.models.geo_city import GeoCity
+from app.models.geo_country import GeoCountry
+from app.services.geo_resolver import geo_key
+from app.services.mapping_cache import DestinationMappings
+from ops.bench_mapping_checks import _check_mappings_n_plus_1
+
+
+def _value(clause):
+    if isinstance(clause, CollectionAggregate):
+        return clause.element.element.value
+    assert isinstance(clause, BindParameter), clause
+    return clause.value
+
+
+def _matches(row, criterion) -> bool:
+    if isinstance(criterion, BooleanClauseList):
+        return all(_matches(row, c) for c in criterion.clauses)
+    actual, wanted = getattr(row, criterion.left.key), _value(criterion.right)
+    if isinstance(criterion.right, CollectionAggregate):
+        return actual in wanted
+    assert criterion.operator in (operator.eq, operator.ne), criterion
+    return criterion.operator(actual, wanted)
+
+
+class _Result:
+    def __init__(self, values):
+        self._values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._values)
+
+    def scalar_one_or_none(self):
+        assert len(self._values) <= 1
+        return self._values[0] if self._values else None
+
+
+class _CatalogSession:
+    """
+    Evaluates the single-table, AND-of-comparisons SELECTs both implementations issue against in-memory rows.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = 0
+
+    async def execute(self, stmt):
+        self.statements += 1
+        (desc,) = stmt.column_descriptions
+        rows = [r for r in self.rows.get(desc["entity"], []) if stmt.whereclause is None or _matches(r, stmt.whereclause)]
+        if desc["expr"] is desc["entity"]:
+            return _Result(rows)
+        return _Result([getattr(r, desc["name"]) for r in rows])
+
+
+def _world(dest: str):
+    country = GeoCountry(id="gct_1", code="NCY", name="North Cyprus")
+    cities = [GeoCity(id="gcy_1", country_id="gct_1", slug="kyrenia", name="Kyrenia"),
+              GeoCity(id="gcy_2", country_id="gct_1", slug="nicosia", name="Nicosia")]
+    areas = [GeoArea(id="gar_1", city_id="gcy_1", slug="alsancak", name="Alsancak"),
+             GeoArea(id="gar_2", city_id="gcy_1", slug="karaoglanoglu", name="Karaoğlanoğlu"),
+             GeoArea(id="gar_3", city_id="gcy_2", slug="gonyeli", name="Gönyeli"),
+             GeoArea(id="gar_4", city_id="gcy_2", slug="lefkosa_merkez", name="Lefkoşa Merkez")]
+    geo_maps = [DestinationGeoMapping(destination=dest, geo_country_id="gct_1", geo_city_id=a.city_id, geo_area_id=a.id,
+                                      destination_area_id=dai)
+                for a, dai in zip(areas, ["17", "", "31", "7"])]
+    enums = [DestinationEnumMapping(destination=dest, namespace=ns, source_key=k, destination_value=v)
+             for ns, k, v in [("currency", "EUR", "601"), ("currency", "TRY", ""), ("rooms", "3", "77"),
+                              ("property_type", "apartment", "123")]]
+    enums.append(DestinationEnumMapping(destination="other", namespace="currency", source_key="GBP", destination_value="602"))
+    return {
+        GeoCountry: [country], GeoCity: cities, GeoArea: areas,
+        DestinationGeoMapping: geo_maps, DestinationEnumMapping: enums,
+    }
+
+
+def _patch_resolver(monkeypatch, world, dest: str):
+    # what load_destination_mappings joins for the destination
+    cities = {c.id: c for c in world[GeoCity]}
+    areas = {a.id: a for a in world[GeoArea]}
+    index = {
+        ("NCY", cities[areas[m.geo_area_id].city_id].slug, areas[m.geo_area_id].slug): m.destination_area_id
+        for m in world[DestinationGeoMapping] if m.destination == dest
+    }
+
+    async def load_geo_resolver(db, *, destination):
+        return DestinationMappings(destination=destination, areas=index).geo
+
+    monkeypatch.setattr(mapping_plugin, "load_geo_resolver", load_geo_resolver)
+
+
+@pytest.mark.asyncio
+async def test_set_based_check_matches_the_per_key_queries(monkeypatch):
+    dest = "101evler"
+    world = _world(dest)
+    _patch_resolver(monkeypatch, world, dest)
+    keys = MappingKeySet(
+        enum_keys={
+            "currency": {"EUR", "TRY", "GBP", "<missing_price>"},
+            "rooms": {"3", "4"},
+            "property_type": {"apartment"},
+        },
+        geo_keys={"kyrenia:alsancak", "kyrenia:karaoglanoglu", "nicosia:gonyeli", "nicosia:nowhere", "iskele:bogaz", "no-colon"},
+    )
+
+    db = _CatalogSession(world)
+    new = await Evler101MappingPlugin().check_mappings(db=db, tenant_id="t", partner_id="p", keys=keys)
+    assert db.statements == 4
+    old = await _check_mappings_n_plus_1(_CatalogSession(world), dest=dest, keys=keys)
+
+    assert new == old
+    assert new.missing.enum_keys == {"currency": {"TRY", "GBP", "<missing_price>"}, "rooms": {"4"}, "property_type": set()}
+    assert new.missing.geo_keys == {"kyrenia:karaoglanoglu", "nicosia:nowhere", "iskele:bogaz", "no-colon"}
+    assert not new.ok
+
+
+@pytest.mark.asyncio
+async def test_set_based_check_matches_folded_and_aliased_keys(monkeypatch):
+    # Intended divergence: keys come from geo_key (folded, aliased); the per-key queries compared
+    # them verbatim with the stored slugs and missed lefkosa_merkez
+    dest = "101evler"
+    world = _world(dest)
+    _patch_resolver(monkeypatch, world, dest)
+    keys = MappingKeySet(enum_keys={}, geo_keys={geo_key("NCY", "Lefkoşa", "Lefkoşa Merkez"), geo_key("NCY", "Lefkoşa", "GÖNYELİ")})
+
+    new = await Evler101MappingPlugin().check_mappings(db=_CatalogSession(world), tenant_id="t", partner_id="p", keys=keys)
+    old = await _check_mappings_n_plus_1(_CatalogSession(world), dest=dest, keys=keys)
+
+    assert new.ok and new.missing.geo_keys == set()
+    assert old.missing.geo_keys == {"nicosia:lefkosa-merkez"}
+
+
+@pytest.mark.asyncio
+async def test_missing_country_catalog_marks_every_geo_key(monkeypatch):
+    dest = "101evler"
+    world = {**_world(dest), GeoCountry: []}
+    _patch_resolver(monkeypatch, world, dest)
+    keys = MappingKeySet(enum_keys={"currency": {"EUR"}}, geo_keys={"kyrenia:alsancak"})
+
+    new = await Evler101MappingPlugin().check_mappings(db=_CatalogSession(world), tenant_id="t", partner_id="p", keys=keys)
+    old = await _check_mappings_n_plus_1(_CatalogSession(world), dest=dest, keys=keys)
+
+    assert new == old
+    assert new.warnings == [{"code": "MISSING_COUNTRY_CATALOG", "message": "GeoCountry NCY not found"}]
@@ -0,0 +1,62 @@
+import csv
+import io
+
+import pytest
+
+from app.destinations.feeds.base import FeedBuildContext
+from app.destinations.feeds.pipeline import fan_out, payload_paths_for
+from app.destinations.partner_csv import feed_plugin
+from app.destinations.partner_csv.feed_plugin import PartnerCSVFeedPlugin, PartnerCSVFeedWriter, csv_columns
+
+
+def _row(lid: str, status: str, **payload):
+    return (lid, "agent", None, {"canonical_id": lid, "status": status, **payload}, None)
+
+
+def _render(config: dict, policy: str, rows) -> tuple[list[list[str]], dict]:
+    ctx = FeedBuildContext(destination="partner_csv", config=config, listing_inclusion_policy=policy)
+    (out,) = fan_out([PartnerCSVFeedWriter(ctx)], rows)
+    chunks = list(out.chunks)
+    assert all(len(c) <= feed_plugin.CSV_CHUNK_SIZE for c in chunks[1:])
+    data = b"".join(chunks).decode("utf-8")
+    return list(csv.reader(io.StringIO(data))), out.meta
+
+
+def test_default_columns_include_status_once(monkeypatch):
+    monkeypatch.setattr(feed_plugin, "CSV_CHUNK_SIZE", 16)  # several blocks
+    rows = [
+        _row("l1", "active", title="Flat, sea view", list_price={"amount": 150000, "currency": "EUR"}, address={"city": "Kyrenia"}),
+        _row("l2", "sold", title="House"),
+    ]
+    table, meta = _render({}, "include_with_status", rows)
+    assert table == [
+        ["listing_id", "title", "price_amount", "currency", "city", "status"],
+        ["l1", "Flat, sea view", "150000", "EUR", "Kyrenia", "active"],
+        ["l2", "House", "", "", "", "sold"],
+    ]
+    assert meta["columns"][-1] == "status"
+
+
+def test_status_column_is_canonical():
+    rows = [_row("l1", " ACTIVE "), _row("l2", "Sold")]
+    table, _ = _render({"columns": ["listing_id", "status"]}, "include_with_status", rows)
+    assert table == [["listing_id", "status"], ["l1", "active"], ["l2", "sold"]]
+
+
+def test_configured_columns_and_policy():
+    rows = [_row("l1", "active", property={"bedrooms": 3}), _row("l2", "withdrawn")]
+    table, meta = _render({"columns": ["listing_id", "bedrooms"]}, "exclude_inactive", rows)
+    assert table == [["listing_id", "bedrooms"], ["l1", "3"]]
+    assert meta["skipped_count"] == 1
+
+    with pytest.raises(ValueError):
+        csv_columns({"columns": ["listing_id", "payload"]}, policy="exclude_inactive")
+
+
+async def test_prepare_projects_only_configured_columns():
+    ctx = await PartnerCSVFeedPlugin().prepare(db=None, tenant_id="t", partner_id="p", config={"columns": ["listing_id", "bedrooms"]})
+    assert ctx.payload_paths == ("status", "canonical_id", "property.bedrooms")
+
+    other = FeedBuildContext(destination="101evler", config={}, listing_inclusion_policy="active_only")
+    assert payload_paths_for([ctx]) == ["status", "canonical_id", "property.bedrooms"]
+    assert payload_paths_for([ctx, other]) is None
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql import Select
+
+from app.services import partner_mapping_keys
+from app.services.canonical_validate import validate_and_normalize_canonical
+from app.services.partner_mapping_keys import GEO_NAMESPACE, listing_mapping_keys, load_partner_mapping_keys, mapping_key_set
+
+
+def _listing(*, is_active: bool = True, schema_version: str = "1.0", **overrides) -> SimpleNamespace:
+    payload = {
+        "canonical_id": "lst_1",
+        "title": "Flat",
+        "status": "active",
+        "address": {"city": "North Nicosia", "area": "Gonyeli"},
+        "list_price": {"currency": "eur", "amount": 100},
+        **overrides,
+    }
+    res = validate_and_normalize_canonical(schema="canonical.listing", schema_version="1.0", payload=payload)
+    assert res.ok
+    return SimpleNamespace(
+        schema="canonical.listing",
+        schema_version=schema_version,
+        payload=res.normalized,
+        content_hash="sha256:" + res.content_hash,
+        is_active=is_active,
+    )
+
+
+def test_listing_mapping_keys_cover_enums_and_geo():
+    assert listing_mapping_keys(_listing()) == {
+        ("101evler", "property_type", "<missing>"),
+        ("101evler", "currency", "EUR"),
+        ("101evler", GEO_NAMESPACE, "north-nicosia:gonyeli"),
+    }
+
+
+def test_inactive_and_foreign_listings_need_no_keys():
+    assert listing_mapping_keys(_listing(is_active=False)) == set()
+    assert listing_mapping_keys(_listing(schema_version="2.0")) == set()
+
+
+def test_listing_update_moves_only_changed_keys():
+    old = listing_mapping_keys(_listing())
+    new = listing_mapping_keys(_listing(list_price={"currency": "gbp", "amount": 100}))
+    assert new - old == {("101evler", "currency", "GBP")}
+    assert old - new == {("101evler", "currency", "EUR")}
+
+
+def test_mapping_key_set_splits_geo_from_enums():
+    ks = mapping_key_set([("currency", "EUR"), (GEO_NAMESPACE, "girne:alsancak"), ("currency", "GBP")])
+    assert ks.enum_keys == {"currency": {"EUR", "GBP"}}
+    assert ks.geo_keys == {"girne:alsancak"}
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalar_one_or_none(self):
+        return self._rows[0][0] if self._rows else None
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, built: bool, rows=()):
+        self.answers = [[("p",)] if built else [], list(rows)]
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result(self.answers[len(self.statements) - 1])
+
+
+@pytest.mark.asyncio
+async def test_reads_never_build_the_keys():
+    db = _Session(built=False)
+    assert await load_partner_mapping_keys(db, tenant_id="t", partner_id="p", destination="101evler") is None
+    assert len(db.statements) == 1 and isinstance(db.statements[0], Select)
+
+    db = _Session(built=True, rows=[("currency", "EUR"), (GEO_NAMESPACE, "kyrenia:alsancak")])
+    ks = await load_partner_mapping_keys(db, tenant_id="t", partner_id="p", destination="101evler")
+    assert ks.enum_keys == {"currency": {"EUR"}} and ks.geo_keys == {"kyrenia:alsancak"}
+    assert all(isinstance(s, Select) for s in db.statements)
+
+
+def test_build_is_queued_on_the_worker(monkeypatch, caplog):
+    sent = []
+    monkeypatch.setattr(partner_mapping_keys.celery, "send_task", lambda name, args: sent.append((name, args)))
+    partner_mapping_keys.request_mapping_key_build(tenant_id="t", partner_id="p")
+    assert sent == [("worker.tasks.rebuild_partner_mapping_keys", ["t", "p"])]
+
+    def broker_down(name, args):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(partner_mapping_keys.celery, "send_task", broker_down)
+    partner_mapping_keys.request_mapping_key_build(tenant_id="t", partner_id="p")
+    assert "could not queue the build for t/p" in caplog.text
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.v1.endpoints.public_feeds import _byte_range, _not_modified
+
+
+HEADERS = {"ETag": '"abc"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"}
+
+
+def _request(**headers: str) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_byte_range():
+    assert _byte_range(_request(), HEADERS, 100) is None
+    assert _byte_range(_request(range="bytes=10-19"), HEADERS, 100) == (10, 19)
+    assert _byte_range(_request(range="bytes=90-"), HEADERS, 100) == (90, 99)
+    assert _byte_range(_request(range="bytes=50-500"), HEADERS, 100) == (50, 99)
+    assert _byte_range(_request(range="bytes=-10"), HEADERS, 100) == (90, 99)
+    assert _byte_range(_request(range="bytes=-500"), HEADERS, 100) == (0, 99)
+    # multi-range / other units / junk: full body
+    assert _byte_range(_request(range="bytes=0-1,5-6"), HEADERS, 100) is None
+    assert _byte_range(_request(range="items=0-1"), HEADERS, 100) is None
+    assert _byte_range(_request(range="bytes=a-b"), HEADERS, 100) is None
+    # last-pos before first-pos is an invalid range, ignored (RFC 9110 14.1.1), even past the end
+    assert _byte_range(_request(range="bytes=20-10"), HEADERS, 100) is None
+    assert _byte_range(_request(range="bytes=150-120"), HEADERS, 100) is None
+
+    for bad in ("bytes=100-", "bytes=100-150", "bytes=-0"):
+        with pytest.raises(HTTPException) as e:
+            _byte_range(_request(range=bad), HEADERS, 100)
+        assert e.value.status_code == 416
+        assert e.value.headers["Content-Range"] == "bytes */100"
+
+
+def test_if_range_requires_exact_validator():
+    assert _byte_range(_request(range="bytes=10-19", if_range='"abc"'), HEADERS, 100) == (10, 19)
+    assert _byte_range(_request(range="bytes=10-19", if_range=HEADERS["Last-Modified"]), HEADERS, 100) == (10, 19)
+    assert _byte_range(_request(range="bytes=10-19", if_range='W/"abc"'), HEADERS, 100) is None
+    assert _byte_range(_request(range="bytes=10-19", if_range='"old"'), HEADERS, 100) is None
+
+
+def test_not_modified():
+    assert _not_modified(_request(if_none_match='"abc"'), HEADERS)
+    assert not _not_modified(_request(if_none_match='"old"'), HEADERS)
+    assert _not_modified(_request(if_modified_since="Mon, 19 Oct 2026 10:00:00 GMT"), HEADERS)
+    assert not _not_modified(_request(if_modified_since="Mon, 19 Oct 2026 09:59:59 GMT"), HEADERS)
+    assert not _not_modified(_request(if_modified_since="garbage"), HEADERS)
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not _not_modified(_request(if_none_match='"old"', if_modified_since="Mon, 19 Oct 2026 11:00:00 GMT"), HEADERS)
@@ -0,0 +1,172 @@
+import pytest
+
+from app.core.crypto import encrypt_json
+from app.models.agent_credential import AgentCredential
+from app.models.agent_external_identity import AgentExternalIdentity
+from app.models.delivery import Delivery, DeliveryAttempt
+from app.models.listing import Listing
+from app.models.listing_external_mapping import ListingExternalMapping
+from app.services import publish_service
+from app.services.publish_service import prepare_publish_batch
+from worker import publish
+
+
+class _Scalars:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return _Scalars(self._rows)
+
+
+class _Session:
+    """
+    Returns every row of the selected model (the WHERE clause is the database's job) and counts statements.
+    """
+
+    def __init__(self, rows_by_model, fail_commits=()):
+        self.rows_by_model = rows_by_model
+        self.fail_commits = set(fail_commits)
+        self.statements = 0
+        self.added = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, stmt):
+        self.statements += 1
+        return _Result(self.rows_by_model.get(stmt.column_descriptions[0]["entity"], []))
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+        if self.commits in self.fail_commits:
+            raise RuntimeError("commit failed")
+
+    async def rollback(self):
+        self.rollbacks += 1
+        self.added.clear()
+
+
+def _world(n: int, agents: int = 2):
+    deliveries, listings, mappings = [], [], []
+    for i in range(n):
+        agent = f"agt_{i % agents}"
+        listings.append(Listing(id=f"lst_{i}", tenant_id="t", partner_id="p", agent_id=agent, content_hash=f"h{i}", payload={}))
+        deliveries.append(Delivery(
+            id=f"dly_{i}", tenant_id="t", partner_id="p", agent_id=agent, listing_id=f"lst_{i}",
+            destination="dest", status="publishing", attempts=0,
+        ))
+        if i % 2:
+            mappings.append(ListingExternalMapping(
+                tenant_id="t", partner_id="p", agent_id=agent, listing_id=f"lst_{i}", destination="dest",
+                external_listing_id=f"ext_{i}", last_synced_hash=f"h{i}",
+            ))
+    creds = [
+        AgentCredential(tenant_id="t", partner_id="p", agent_id=f"agt_{a}", destination="dest", auth_type="api_key",
+                        secret_ciphertext=encrypt_json({"token": f"secret-{a}"}), is_active=True)
+        for a in range(agents)
+    ]
+    idents = [AgentExternalIdentity(tenant_id="t", partner_id="p", agent_id="agt_0", destination="dest", external_agent_id="ea0")]
+    return {
+        Delivery: deliveries, Listing: listings, ListingExternalMapping: mappings,
+        AgentCredential: creds, AgentExternalIdentity: idents,
+    }
+
+
+@pytest.mark.asyncio
+async def test_prepare_is_one_query_per_table():
+    db = _Session(_world(50))
+    batch = await prepare_publish_batch(db, [f"dly_{i}" for i in range(50)])
+
+    assert db.statements == 5
+    d1, d2 = batch.deliveries["dly_1"], batch.deliveries["dly_2"]
+    assert batch.listing(d1).id == "lst_1"
+    assert batch.mapping(d1).external_listing_id == "ext_1"
+    assert batch.mapping(d2) is None
+    assert batch.identity(d2).external_agent_id == "ea0"
+    assert batch.identity(d1) is None
+
+
+@pytest.mark.asyncio
+async def test_secrets_are_decrypted_once_per_agent_and_destination(monkeypatch):
+    calls = []
+    real = publish_service.decrypt_json
+    monkeypatch.setattr(publish_service, "decrypt_json", lambda token: calls.append(token) or real(token))
+
+    db = _Session(_world(20, agents=2))
+    batch = await prepare_publish_batch(db, [f"dly_{i}" for i in range(20)])
+    secrets = [batch.secrets(d)["token"] for d in batch.deliveries.values()]
+
+    assert len(calls) == 2
+    assert set(secrets) == {"secret-0", "secret-1"}
+
+
+def _patch_publish(monkeypatch, project, published):
+    async def publish_payload(*, destination, payload, credentials):
+        published.append(payload["id"])
+        return type("R", (), {"ok": True, "external_id": "x", "detail": {}, "error_code": None, "error_message": None})()
+
+    monkeypatch.setattr(publish, "project_delivery", project)
+    monkeypatch.setattr(publish, "publish_projected_payload", publish_payload)
+
+
+@pytest.mark.asyncio
+async def test_one_failing_delivery_does_not_stop_the_batch(monkeypatch):
+    world = _world(4, agents=1)
+    for d in world[Delivery]:
+        d.retryable, d.dead_lettered_at = True, None
+    db = _Session(world)
+    published = []
+
+    def project(batch, d):
+        if d.id == "dly_0":
+            raise RuntimeError("projection exploded")
+        return {"id": d.listing_id}, None
+
+    _patch_publish(monkeypatch, project, published)
+
+    await publish.publish_deliveries(db, [f"dly_{i}" for i in range(4)])
+
+    by_id = {d.id: d for d in world[Delivery]}
+    # odd listings are already synced at their current hash, dly_0 fails, dly_2 is published
+    assert published == ["lst_2"]
+    assert by_id["dly_0"].status == "failed" and by_id["dly_0"].status_detail == "PUBLISH_ERROR"
+    assert by_id["dly_0"].next_retry_at is not None
+    assert {by_id[k].status for k in ("dly_1", "dly_2", "dly_3")} == {"success"}
+    assert db.rollbacks == 1
+    # the rollback reloads the failed delivery and the rest of the batch
+    assert db.statements == 10 and db.commits == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_commit_is_rolled_back_and_recorded(monkeypatch):
+    world = _world(4, agents=1)
+    for d in world[Delivery]:
+        d.retryable, d.dead_lettered_at = True, None
+    db = _Session(world, fail_commits={2})  # dly_1 (already synced) fails to commit
+    published = []
+    _patch_publish(monkeypatch, lambda batch, d: ({"id": d.listing_id}, None), published)
+
+    await publish.publish_deliveries(db, [f"dly_{i}" for i in range(4)])
+
+    by_id = {d.id: d for d in world[Delivery]}
+    assert published == ["lst_0", "lst_2"]
+    assert db.rollbacks == 1 and db.commits == 5
+    assert by_id["dly_1"].status == "failed" and by_id["dly_1"].status_detail == "PUBLISH_ERROR"
+    assert by_id["dly_1"].attempts == 1 and by_id["dly_1"].next_retry_at is not None
+    attempts = [a for a in db.added if isinstance(a, DeliveryAttempt) and a.status == "failed"]
+    assert [(a.delivery_id, a.error_message) for a in attempts] == [("dly_1", "RuntimeError('commit failed')")]
+    assert {by_id[k].status for k in ("dly_0", "dly_2", "dly_3")} == {"success"}
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.services.rate_limit import TokenRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_gcra_allows_burst_then_refuses_with_retry_after():
+    limiter = TokenRateLimiter(settings.redis_url)
+    key = f"test:{uuid.uuid4().hex}"
+
+    results = [await limiter.allow(key=key, limit=5, window_seconds=60) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    assert results[-1].retry_after_seconds == 12  # one token per 60/5 s
+    assert 48 <= results[-1].reset_seconds <= 60
+
+    # TTL is set atomically with the bucket and covers the time until it is full again
+    ttl = await limiter.r.pttl(f"rl:gcra:{key}")
+    assert 0 < ttl <= 60_000
+
+
+@pytest.mark.asyncio
+async def test_local_lease_skips_redis_and_never_exceeds_limit():
+    key = f"test:{uuid.uuid4().hex}"
+    a = TokenRateLimiter(settings.redis_url, local_fraction=0.25, local_ttl_seconds=30)
+    b = TokenRateLimiter(settings.redis_url, local_fraction=0.25, local_ttl_seconds=30)
+
+    first = await a.allow(key=key, limit=8, window_seconds=60)
+    assert first.allowed and a._leases[key].tokens == 1  # leased 2, spent 1
+    await a.r.delete(f"rl:gcra:{key}")
+    assert (await a.allow(key=key, limit=8, window_seconds=60)).allowed  # served from the lease
+    assert await a.r.exists(f"rl:gcra:{key}") == 0
+
+    # two processes together stay within the limit
+    allowed = 0
+    for _ in range(10):
+        allowed += (await a.allow(key=key, limit=8, window_seconds=60)).allowed
+        allowed += (await b.allow(key=key, limit=8, window_seconds=60)).allowed
+    assert allowed == 8
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.request_encoding import GzipRequestMiddleware
+
+
+def _app(max_bytes: int | None = None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(GzipRequestMiddleware, max_bytes=max_bytes)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.json()
+        return {"items": len(body["items"]), "encoding": request.headers.get("content-encoding")}
+
+    return app
+
+
+async def _post(app: FastAPI, content: bytes, headers: dict[str, str]) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/echo", content=content, headers={"Content-Type": "application/json", **headers})
+
+
+PAYLOAD = json.dumps({"items": [{"source_key": f"k{i}", "destination_value": str(i)} for i in range(500)]}).encode()
+
+
+@pytest.mark.asyncio
+async def test_gzip_body_is_inflated_before_routing():
+    r = await _post(_app(), gzip.compress(PAYLOAD), {"Content-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json() == {"items": 500, "encoding": None}
+
+
+@pytest.mark.asyncio
+async def test_plain_body_passes_through():
+    r = await _post(_app(), PAYLOAD, {})
+    assert r.status_code == 200
+    assert r.json()["items"] == 500
+
+
+@pytest.mark.asyncio
+async def test_inflated_size_is_capped():
+    r = await _post(_app(max_bytes=len(PAYLOAD) - 1), gzip.compress(PAYLOAD), {"Content-Encoding": "gzip"})
+    assert r.status_code == 413
+
+    r = await _post(_app(max_bytes=len(PAYLOAD)), gzip.compress(PAYLOAD), {"Content-Encoding": "gzip"})
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_corrupt_or_truncated_gzip_is_rejected():
+    r = await _post(_app(), b"not gzip at all", {"Content-Encoding": "gzip"})
+    assert r.status_code == 400
+
+    r = await _post(_app(), gzip.compress(PAYLOAD)[:-20], {"Content-Encoding": "gzip"})
+    assert r.status_code == 400
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import os
+
+from app.destinations.feeds.base import FeedBuildOutput
+from app.services.hosted_feed import store_feed_output
+from app.services.storage import LocalObjectStore
+
+
+def test_content_addressed_put_dedupes(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+
+    uri = store.put_content_addressed(prefix="t/p/101evler", data=b"<feed/>", ext="xml")
+    path = store.resolve_path(uri)
+    assert path.name == hashlib.sha256(b"<feed/>").hexdigest() + ".xml"
+    assert path.parent.name == "sha256"
+    assert path.read_bytes() == b"<feed/>"
+
+    ino = path.stat().st_ino
+    assert store.put_content_addressed(prefix="t/p/101evler", data=b"<feed/>", ext="xml") == uri
+    assert path.stat().st_ino == ino  # reused, not rewritten
+
+    other = store.put_content_addressed(prefix="t/p/101evler", data=b"<other/>", ext="xml")
+    assert other != uri
+    assert sorted(k for k, _ in store.iter_content_addressed()) == sorted([store.key_for_uri(uri), store.key_for_uri(other)])
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_put_bytes_replaces_atomically(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+    uri = store.put_bytes(key="a/feed.xml", data=b"old")
+    assert store.put_bytes(key="a/feed.xml", data=b"new") == uri
+    assert store.resolve_path(uri).read_bytes() == b"new"
+    assert [p.name for p in store.resolve_path(uri).parent.iterdir()] == ["feed.xml"]
+
+
+def test_sink_streams_and_dedupes(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+
+    sink = store.open_sink(prefix="t/p/partner_csv", ext="csv")
+    for chunk in (b"a,b\n", b"1,2\n", b""):
+        sink.write(chunk)
+    obj = sink.commit()
+    assert obj.sha256 == hashlib.sha256(b"a,b\n1,2\n").hexdigest()
+    assert obj.size_bytes == 8
+    assert obj.uri == store.put_content_addressed(prefix="t/p/partner_csv", data=b"a,b\n1,2\n", ext="csv")
+
+    aborted = store.open_sink(prefix="t/p/partner_csv", ext="csv")
+    aborted.write(b"partial")
+    aborted.abort()
+    assert [k for k, _ in store.iter_content_addressed()] == [store.key_for_uri(obj.uri)]
+
+
+def test_store_feed_output_gzip_is_deterministic(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+
+    def out():
+        return FeedBuildOutput(format="xml", chunks=iter([b"<ads>", b"<ad/>" * 1000, b"</ads>"]), listing_count=1000, meta={})
+
+    first = store_feed_output(store, prefix="t/p/101evler", out=out())
+    second = store_feed_output(store, prefix="t/p/101evler", out=out())
+    assert first == second
+    assert gzip.decompress(store.resolve_path(first.variants["gzip"].uri).read_bytes()) == store.resolve_path(first.feed.uri).read_bytes()
+    assert first.variants["gzip"].size_bytes < first.feed.size_bytes
+
+
+def test_modified_at_tracks_reuse(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+    uri = store.put_content_addressed(prefix="t/p/101evler", data=b"<feed/>", ext="xml")
+    key = store.key_for_uri(uri)
+
+    os.utime(store.resolve_path(uri), (1, 1))
+    assert store.modified_at(key) == 1
+    store.put_content_addressed(prefix="t/p/101evler", data=b"<feed/>", ext="xml")
+    assert store.modified_at(key) > 1
+
+    assert store.delete_key(key)
+    assert store.modified_at(key) is None
@@ -16,5 +16,6 @@ celery.conf.update(
     task_routes={
         "worker.tasks.process_outbox_event": {"queue": "outbox"},
         "worker.tasks.publish_delivery": {"queue": "publish"},
+        "worker.tasks.publish_deliveries": {"queue": "publish"},
     },
 )
@@ -52,9 +52,12 @@ async def _tick():
 
     await engine.dispose()
 
-    log.info("tick: enqueueing %d tasks to celery...", len(ids))
-    for delivery_id in ids:
-        celery.send_task("worker.tasks.publish_delivery", args=[delivery_id], queue="publish")
+    # one task per chunk: the worker prepares each chunk with a query per table
+    size = max(1, settings.publish_batch_size)
+    chunks = [list(ids[i : i + size]) for i in range(0, len(ids), size)]
+    log.info("tick: enqueueing %d tasks to celery...", len(chunks))
+    for chunk in chunks:
+        celery.send_task("worker.tasks.publish_deliveries", args=[chunk], queue="publish")
     log.info("tick: done enqueueing")
 
     return len(ids)
@@ -1,14 +1,22 @@
 import asyncio
 import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+
 from app.destinations.registry import get_destination_connector
-from sqlalchemy import select, desc
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.core.config import settings
-from app.models.feed_snapshot import FeedSnapshot
 from app.models.partner_destination_setting import PartnerDestinationSetting
-from app.services.hosted_feed import build_partner_feed_snapshot
-from app.services.storage import LocalObjectStore
+from app.services.feed_meta_cache import get_feed_meta_cache
+from app.services.feed_snapshots import latest_feed_snapshots
+from app.services.hosted_feed import build_partner_feed_snapshots
+from app.services.feed_retention import prune_feed_snapshots
+from app.services.feed_storage_gc import gc_feed_storage
+from app.services.storage import ObjectStore, get_object_store
 from app.services.partner_destination_config import ensure_feed_token
 
 
@@ -16,80 +24,192 @@ log = logging.getLogger(__name__)
 
 POLL_SECONDS = 30
 
-async def _tick():
-    engine = create_async_engine(settings.database_url, pool_pre_ping=True)
-    Session = async_sessionmaker(engine, expire_on_commit=False)
 
-    store = LocalObjectStore(settings.feed_storage_dir)
+def _is_hosted_feed(destination: str) -> bool:
+    try:
+        connector = get_destination_connector(destination)
+    except KeyError:
+        log.warning("feed_dispatcher: unknown destination=%s (skipping)", destination)
+        return False
+    return connector.capabilities().transport == "hosted_feed"
+
+
+async def _build_partner(
+    Session: async_sessionmaker[AsyncSession],
+    *,
+    tenant_id: str,
+    partner_id: str,
+    destinations: list[str],
+    store: ObjectStore,
+    executor: Executor | None,
+) -> list[str]:
+    """
+    Build every hosted feed of one partner in its own session/transaction (one listing scan).
+    Returns "built" or "skipped" per destination; raises on failure (caller isolates it).
+    """
+    async with Session() as db:
+        for destination in destinations:
+            # Ensure destination has a feed_token before generating snapshot
+            await ensure_feed_token(
+                db,
+                tenant_id=tenant_id,
+                partner_id=partner_id,
+                destination=destination,
+            )
+
+        # Track latest snapshot before build; if build returns same snapshot -> no-op
+        latest_id_before = {
+            d: s.id
+            for d, s in (await latest_feed_snapshots(db, tenant_id=tenant_id, partner_id=partner_id, destinations=destinations)).items()
+        }
+
+        snaps = await build_partner_feed_snapshots(
+            db,
+            tenant_id=tenant_id,
+            partner_id=partner_id,
+            destinations=destinations,
+            store=store,
+            executor=executor,
+        )
+        await db.commit()
+
+    results = [
+        "built" if latest_id_before.get(d) is None or snaps[d].id != latest_id_before[d] else "skipped"
+        for d in destinations
+    ]
+    built = [d for d, r in zip(destinations, results) if r == "built"]
+    if built:
+        # public feed endpoints drop their cached snapshot metadata
+        await get_feed_meta_cache().invalidate(partner_id, built)
+    return results
+
+
+async def _build_isolated(
+    sem: asyncio.Semaphore,
+    Session,
+    *,
+    partner: tuple[str, str],
+    destinations: list[str],
+    store,
+    executor,
+) -> list[str]:
+    tenant_id, partner_id = partner
+    async with sem:
+        try:
+            return await asyncio.wait_for(
+                _build_partner(
+                    Session,
+                    tenant_id=tenant_id,
+                    partner_id=partner_id,
+                    destinations=destinations,
+                    store=store,
+                    executor=executor,
+                ),
+                timeout=settings.feed_build_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            # The session is rolled back on cancellation; an in-flight render job in the
+            # process pool finishes in the background and its result is discarded.
+            log.warning(
+                "feed_dispatcher: build timed out partner=%s destinations=%s after %ss",
+                partner_id, ",".join(destinations), settings.feed_build_timeout_seconds,
+            )
+        except Exception:
+            log.exception("feed_dispatcher: build failed partner=%s destinations=%s", partner_id, ",".join(destinations))
+    return ["failed"] * len(destinations)
+
 
+async def _tick(
+    Session: async_sessionmaker[AsyncSession],
+    *,
+    store: ObjectStore,
+    executor: Executor | None = None,
+) -> tuple[int, int, int]:
     async with Session() as db:
         rows = (await db.execute(
-            select(PartnerDestinationSetting).where(
+            select(
+                PartnerDestinationSetting.tenant_id,
+                PartnerDestinationSetting.partner_id,
+                PartnerDestinationSetting.destination,
+            ).where(
                 PartnerDestinationSetting.is_enabled.is_(True),
             )
-        )).scalars().all()
+        )).tuples().all()
 
-        built = 0
-        skipped = 0
+    # only handle hosted_feed destinations, grouped per partner so each partner is scanned once
+    by_partner: dict[tuple[str, str], list[str]] = defaultdict(list)
+    for tenant_id, partner_id, destination in rows:
+        if _is_hosted_feed(destination):
+            by_partner[(tenant_id, partner_id)].append(destination.lower().strip())
 
-        for s in rows:
-            # only handle hosted_feed destinations (we’ll check via registry later)
-            try:
-                connector = get_destination_connector(s.destination)
-            except KeyError:
-                log.warning("feed_dispatcher: unknown destination=%s (skipping)", s.destination)
-                continue
+    # Bounded fan-out: each partner gets its own session, so one slow or failing
+    # partner neither delays nor rolls back the others.
+    sem = asyncio.Semaphore(max(1, settings.feed_build_concurrency))
+    per_partner = await asyncio.gather(*(
+        _build_isolated(sem, Session, partner=p, destinations=dests, store=store, executor=executor)
+        for p, dests in by_partner.items()
+    ))
+    results = [r for rs in per_partner for r in rs]
 
-            caps = connector.capabilities()
-            if caps.transport != "hosted_feed":
-                continue
+    return results.count("built"), results.count("skipped"), results.count("failed")
 
-            # Ensure destination has a feed_token before generating snapshot
-            await ensure_feed_token(
-                db,
-                tenant_id=s.tenant_id,
-                partner_id=s.partner_id,
-                destination=s.destination,
-            )
 
-            # Track latest snapshot before build; if build returns same snapshot -> no-op
-            latest_id_before = (
-                await db.execute(
-                    select(FeedSnapshot.id).where(
-                        FeedSnapshot.tenant_id == s.tenant_id,
-                        FeedSnapshot.partner_id == s.partner_id,
-                        FeedSnapshot.destination == s.destination.lower().strip(),
-                    ).order_by(desc(FeedSnapshot.created_at)).limit(1)
-                )
-            ).scalar_one_or_none()
-
-            snap = await build_partner_feed_snapshot(
-                db,
-                tenant_id=s.tenant_id,
-                partner_id=s.partner_id,
-                destination=s.destination,
-                store=store,
-            )
-            
-            if latest_id_before is None or snap.id != latest_id_before:
-                built += 1
-            else:
-                skipped += 1
+def _make_executor() -> Executor | None:
+    if settings.feed_build_processes <= 0:
+        return None
+    # spawn: never fork a process that holds an event loop and live DB connections
+    return ProcessPoolExecutor(
+        max_workers=settings.feed_build_processes,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
 
-        await db.commit()
-
-    await engine.dispose()
-    return built, skipped
 
 async def main():
     logging.basicConfig(level=logging.INFO)
-    while True:
-        try:
-            built, skipped = await _tick()
-            log.info("feed_dispatcher: built=%d skipped=%d", built, skipped)
-        except Exception:
-            log.exception("feed_dispatcher: tick crashed")
-        await asyncio.sleep(POLL_SECONDS)
+
+    concurrency = max(1, settings.feed_build_concurrency)
+    engine = create_async_engine(
+        settings.database_url,
+        pool_pre_ping=True,
+        pool_size=concurrency + 1,
+        max_overflow=concurrency,
+    )
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    store = get_object_store()
+    executor = _make_executor()
+
+    last_gc = 0.0
+    try:
+        while True:
+            try:
+                built, skipped, failed = await _tick(Session, store=store, executor=executor)
+                log.info("feed_dispatcher: built=%d skipped=%d failed=%d", built, skipped, failed)
+            except Exception:
+                log.exception("feed_dispatcher: tick crashed")
+
+            if time.monotonic() - last_gc >= settings.feed_storage_gc_interval_seconds:
+                last_gc = time.monotonic()
+                # history first (retention policy), then whatever objects nothing references
+                try:
+                    async with Session() as db:
+                        pruned = await prune_feed_snapshots(db, store=store)
+                    log.info(
+                        "feed_dispatcher: retention snapshots_deleted=%d objects_deleted=%d",
+                        pruned.snapshots_deleted, pruned.objects_deleted,
+                    )
+                except Exception:
+                    log.exception("feed_dispatcher: snapshot retention crashed")
+                try:
+                    async with Session() as db:
+                        await gc_feed_storage(db, store=store)
+                except Exception:
+                    log.exception("feed_dispatcher: storage gc crashed")
+
+            await asyncio.sleep(POLL_SECONDS)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        await engine.dispose()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,37 +1,79 @@
 from __future__ import annotations
+import logging
 from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
-from app.core.crypto import decrypt_json
-from app.models.agent_credential import AgentCredential
 from app.models.delivery import Delivery, DeliveryAttempt
-from app.models.listing import Listing
 from app.models.listing_external_mapping import ListingExternalMapping
-from app.services.publish_service import build_projected_payload, publish_projected_payload
+from app.services.publish_service import PublishBatch, prepare_publish_batch, project_delivery, publish_projected_payload
 
 from app.services.retry import compute_backoff_seconds
 
 
+log = logging.getLogger(__name__)
+
 MAX_DELIVERY_ATTEMPTS = 5
 
 
 async def publish_delivery(db: AsyncSession, delivery_id: str) -> None:
-    d = (await db.execute(select(Delivery).where(Delivery.id == delivery_id))).scalar_one_or_none()
-    if not d or d.dead_lettered_at is not None:
+    batch = await prepare_publish_batch(db, [delivery_id])
+    d = batch.deliveries.get(delivery_id)
+    if d is not None:
+        await _publish_prepared(db, batch, d)
+
+
+async def publish_deliveries(db: AsyncSession, delivery_ids: Iterable[str]) -> None:
+    """
+    Publish claimed deliveries from one prepared batch (a handful of reads in total), committing
+    after each so a crash mid-batch does not publish the finished ones again.
+    """
+    ids = list(delivery_ids)
+    batch = await prepare_publish_batch(db, ids)
+    for pos, delivery_id in enumerate(ids):
+        d = batch.deliveries.get(delivery_id)
+        if d is None:
+            continue
+        try:
+            await _publish_prepared(db, batch, d)
+            await db.commit()
+        except Exception as e:
+            # one bad delivery must not take the rest of the batch down
+            log.exception("publish: delivery %s failed", delivery_id)
+            await db.rollback()
+            # the rollback expired every loaded row: reload this delivery and the rest of the batch
+            batch = await prepare_publish_batch(db, ids[pos:])
+            d = batch.deliveries.get(delivery_id)
+            if d is None:
+                continue
+            await _record_attempt_failure(db, d, error_code="PUBLISH_ERROR", error_message=repr(e)[:2000], retryable=True)
+            if d.attempts >= MAX_DELIVERY_ATTEMPTS:
+                d.status = "dead_lettered"
+                d.dead_lettered_at = func.now()
+                d.next_retry_at = None
+            else:
+                d.next_retry_at = datetime.now(timezone.utc) + timedelta(seconds=compute_backoff_seconds(d.attempts))
+            await db.commit()
+
+
+async def _publish_prepared(db: AsyncSession, batch: PublishBatch, d: Delivery) -> None:
+    if d.dead_lettered_at is not None:
         return
 
-    listing = (await db.execute(select(Listing).where(Listing.id == d.listing_id))).scalar_one()
-
-    mapping = (await db.execute(
-        select(ListingExternalMapping).where(
-            ListingExternalMapping.tenant_id == d.tenant_id,
-            ListingExternalMapping.destination == d.destination,
-            ListingExternalMapping.listing_id == listing.id,
+    listing = batch.listing(d)
+    if listing is None:
+        await _record_attempt_failure(
+            db, d,
+            error_code="LISTING_NOT_FOUND",
+            error_message="Listing no longer exists",
+            retryable=False,
         )
-    )).scalar_one_or_none()
+        d.next_retry_at = None
+        return
+
+    mapping = batch.mapping(d)
 
     # SKIP if already synced same hash (regardless of current status)
     if mapping and mapping.last_synced_hash == listing.content_hash:
@@ -43,17 +85,7 @@ async def publish_delivery(db: AsyncSession, delivery_id: str) -> None:
         return
 
     # Credentials by agent+destination
-    cred = (await db.execute(
-        select(AgentCredential).where(
-            AgentCredential.tenant_id == d.tenant_id,
-            AgentCredential.partner_id == d.partner_id,
-            AgentCredential.agent_id == d.agent_id,
-            AgentCredential.destination == d.destination,
-            AgentCredential.is_active.is_(True),
-        )
-    )).scalar_one_or_none()
-
-    if not cred:
+    if batch.credential(d) is None:
         await _record_attempt_failure(
             db, d,
             error_code="NO_CREDENTIALS",
@@ -71,10 +103,10 @@ async def publish_delivery(db: AsyncSession, delivery_id: str) -> None:
         return
 
 
-    secrets = decrypt_json(cred.secret_ciphertext)
+    secrets = batch.secrets(d)
     
     # Build projected payload + current external_listing_id (if any)
-    projected_payload, external_listing_id = await build_projected_payload(db, delivery=d)
+    projected_payload, external_listing_id = project_delivery(batch, d)
 
     # Publish via destination connector
     result = await publish_projected_payload(
@@ -111,6 +143,7 @@ async def publish_delivery(db: AsyncSession, delivery_id: str) -> None:
                 metadata={},
             )
             db.add(mapping)
+            batch.add_mapping(mapping)
         else:
             if result.external_id:
                 mapping.external_listing_id = result.external_id
@@ -12,6 +12,7 @@ from app.models.agent import Agent
 from app.models.delivery import Delivery
 
 from app.services.destinations import get_enabled_destinations_for_partner
+from app.services.partner_mapping_keys import mapping_keys_built, rebuild_partner_mapping_keys
 
 
 async def _process_outbox_event(outbox_id: str, lease_id: str) -> None:
@@ -123,3 +124,21 @@ async def _process_outbox_event(outbox_id: str, lease_id: str) -> None:
 @celery.task(name="worker.tasks.process_outbox_event", bind=True, max_retries=5)
 def process_outbox_event(self, outbox_id: str, lease_id: str) -> None:
     asyncio.run(_process_outbox_event(outbox_id, lease_id))
+
+
+async def _rebuild_partner_mapping_keys(tenant_id: str, partner_id: str) -> None:
+    engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with Session() as db:
+        # reads queue a build until they see one; only the first does the scan
+        if not await mapping_keys_built(db, tenant_id=tenant_id, partner_id=partner_id):
+            await rebuild_partner_mapping_keys(db, tenant_id=tenant_id, partner_id=partner_id)
+            await db.commit()
+
+    await engine.dispose()
+
+
+@celery.task(name="worker.tasks.rebuild_partner_mapping_keys", bind=True, max_retries=5)
+def rebuild_partner_mapping_keys_task(self, tenant_id: str, partner_id: str) -> None:
+    asyncio.run(_rebuild_partner_mapping_keys(tenant_id, partner_id))